@@ -0,0 +1,109 @@
+import json
+import logging
+import threading
+from datetime import datetime
+
+from mysql.connector import Error
+
+
+logger = logging.getLogger("library.audit")
+
+
+class AuditLog:
+    """
+    Deferred audit trail of loans, returns and donations.
+
+    ``record`` only appends the event to an in-memory buffer, so audit
+    writes never run inside the transaction they describe. A background
+    thread drains the buffer into ``logs`` with one multi-row INSERT
+    every FLUSH_MS, or as soon as BATCH_SIZE events are waiting. Batches
+    the database rejects are appended to FALLBACK_FILE as JSON lines
+    rather than dropped. Events still buffered when the process dies are
+    lost, which bounds the loss to one flush interval.
+    """
+
+    ACTIONS = ("loan", "return", "donate")
+    BATCH_SIZE = 500
+    FLUSH_MS = 2000
+    FALLBACK_FILE = "audit_fallback.jsonl"
+
+    def __init__(self, db_connection, flush_ms=None, fallback_file=None):
+        self.db = db_connection
+        self.flush_ms = flush_ms or AuditLog.FLUSH_MS
+        self.fallback_file = fallback_file or AuditLog.FALLBACK_FILE
+        self.buffer = []
+        self.lock = threading.Lock()
+        # Serialises flushes so batches reach the table in order
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = False
+        self.thread = None
+
+    def record(self, user_id, action_type, description):
+        """Queue one event; returns immediately."""
+        if action_type not in AuditLog.ACTIONS:
+            raise ValueError(f"Unknown audit action {action_type!r}.")
+        event = (user_id, action_type, description, datetime.now())
+        with self.lock:
+            self.buffer.append(event)
+            full = len(self.buffer) >= AuditLog.BATCH_SIZE
+            # Started lazily so that forked server workers each get their own
+            if self.thread is None and not self.stopping:
+                self.thread = threading.Thread(
+                    target=self.run, name="library-audit", daemon=True
+                )
+                self.thread.start()
+        if full:
+            self.wakeup.set()
+
+    def run(self):
+        while not self.stopping:
+            self.wakeup.wait(self.flush_ms / 1000)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Write every buffered event now; returns how many were written."""
+        with self.flush_lock:
+            with self.lock:
+                batch, self.buffer = self.buffer, []
+            if not batch:
+                return 0
+            try:
+                # executemany folds the rows into a single INSERT statement
+                with self.db.cursor(commit=True, operation="audit_flush") as cursor:
+                    cursor.executemany(
+                        "INSERT INTO logs "
+                        "(user_id, action_type, description, created_at) "
+                        "VALUES (%s, %s, %s, %s)",
+                        batch,
+                    )
+            except Error as e:
+                logger.error("audit flush of %d events failed: %s", len(batch), e)
+                self.spill(batch)
+            return len(batch)
+
+    def spill(self, batch):
+        with open(self.fallback_file, "a", encoding="utf-8") as f:
+            for user_id, action_type, description, created_at in batch:
+                f.write(
+                    json.dumps(
+                        {
+                            "user_id": user_id,
+                            "action_type": action_type,
+                            "description": description,
+                            "created_at": created_at.isoformat(sep=" "),
+                        }
+                    )
+                    + "\n"
+                )
+
+    def close(self):
+        """Stop the flusher and write out whatever is still buffered."""
+        with self.lock:
+            self.stopping = True
+            thread = self.thread
+        if thread is not None:
+            self.wakeup.set()
+            thread.join()
+        self.flush()
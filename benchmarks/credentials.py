@@ -0,0 +1,66 @@
+"""
+Pick a password-hashing work factor that fits a login-latency budget.
+
+Times Credentials.hash at increasing scrypt costs (or PBKDF2 iteration
+counts where scrypt is unavailable) and reports the most expensive
+setting whose median stays within the budget. No database is needed.
+
+    python -m benchmarks.credentials --budget-ms 250 --runs 5
+"""
+import argparse
+import statistics
+import time
+
+from credentials import Credentials
+
+
+SCRYPT_COSTS = [2 ** exponent for exponent in range(12, 19)]
+PBKDF2_COSTS = [100000, 200000, 400000, 600000, 900000, 1200000]
+
+
+def measure(credentials, runs):
+    """Hash a password ``runs`` times and return the timings in seconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        credentials.hash("correct horse battery staple")
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=250)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    scheme = Credentials(None).scheme
+    costs = SCRYPT_COSTS if scheme == "scrypt" else PBKDF2_COSTS
+    print(f"scheme: {scheme}  budget: {args.budget_ms:.0f} ms  runs: {args.runs}")
+
+    chosen = None
+    for cost in costs:
+        if scheme == "scrypt":
+            credentials = Credentials(None, n=cost)
+        else:
+            credentials = Credentials(None, iterations=cost)
+        timings = measure(credentials, args.runs)
+        median = statistics.median(timings) * 1000
+        print(
+            f"{cost:>9}  min {min(timings) * 1000:9.2f} ms"
+            f"  median {median:9.2f} ms"
+        )
+        if median > args.budget_ms:
+            break
+        chosen = cost
+
+    if chosen is None:
+        print("No setting fits the budget; keep the default.")
+    elif scheme == "scrypt":
+        print(f"Suggested Credentials.SCRYPT_N = {chosen}")
+    else:
+        print(f"Suggested Credentials.PBKDF2_ITERATIONS = {chosen}")
+
+
+if __name__ == "__main__":
+    main()
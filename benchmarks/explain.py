@@ -0,0 +1,110 @@
+"""
+Run the plan checks in benchmarks/explain_indexes.sql and record the
+EXPLAIN output.
+
+Each EXPLAIN is preceded by "-- expect: <table>  type=...  key=..." lines;
+a plan whose table does not use the expected access type and key is
+reported as a mismatch. Point it at a populated database (see
+benchmarks.workload) so the optimizer sees realistic statistics.
+
+    python -m benchmarks.explain --output benchmarks/explain_indexes.txt
+"""
+import argparse
+import os
+import re
+
+from database import Connection
+
+
+CHECKS_FILE = os.path.join(os.path.dirname(__file__), "explain_indexes.sql")
+
+
+def read_checks(path):
+    """Yield (title, {table: {field: value}}, statement) per EXPLAIN."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    for block in text.split(";"):
+        lines = [line.strip() for line in block.strip().splitlines()]
+        statement = " ".join(line for line in lines if not line.startswith("--"))
+        if not statement.startswith("EXPLAIN"):
+            continue
+
+        comments = [line[2:].strip() for line in lines if line.startswith("--")]
+        title = comments[0] if comments else statement
+        expected, table = {}, None
+        for comment in comments[1:]:
+            words = comment.removeprefix("expect:").split()
+            if comment.startswith("expect:") or (words and "=" not in words[0]):
+                table, words = words[0], words[1:]
+            for word in words:
+                field, _, value = word.partition("=")
+                if table and value:
+                    expected.setdefault(table, {})[field] = value
+        yield title, expected, statement
+
+
+def mismatches(expected, columns, rows):
+    """Expected type/key values the captured plan does not have."""
+    plan = {row[columns.index("table")]: row for row in rows}
+    problems = []
+    for table, fields in expected.items():
+        row = plan.get(table)
+        if row is None:
+            problems.append(f"{table}: not in plan")
+            continue
+        for field in ("type", "key"):
+            if field in fields and str(row[columns.index(field)]) != fields[field]:
+                problems.append(
+                    f"{table}: {field}={row[columns.index(field)]}, "
+                    f"expected {fields[field]}"
+                )
+    return problems
+
+
+def format_plan(columns, rows):
+    cells = [columns] + [["NULL" if v is None else str(v) for v in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(columns))]
+    return "\n".join(
+        "  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip()
+        for row in cells
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--checks", default=CHECKS_FILE)
+    parser.add_argument("--output", help="also write the captured plans here")
+    args = parser.parse_args()
+
+    db = Connection(pool_size=1)
+    if not db.available:
+        raise SystemExit("No valid database connection found.")
+
+    report, failed = [], 0
+    with db.cursor(operation="explain") as cursor:
+        cursor.execute("SELECT VERSION()")
+        report.append(f"-- Captured on {cursor.fetchone()[0]}")
+        for title, expected, statement in read_checks(args.checks):
+            cursor.execute(statement)
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+            problems = mismatches(expected, columns, rows)
+            failed += bool(problems)
+
+            report.append(f"\n-- {title}")
+            report.append(re.sub(r"\s+", " ", statement))
+            report.append(format_plan(columns, rows))
+            report.extend(f"MISMATCH {problem}" for problem in problems)
+
+    text = "\n".join(report) + "\n"
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="\r\n") as f:
+            f.write(text)
+    db.close_connection()
+    if failed:
+        raise SystemExit(f"{failed} plan(s) differ from the expectations.")
+
+
+if __name__ == "__main__":
+    main()
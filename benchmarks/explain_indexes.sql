@@ -0,0 +1,59 @@
+-- Plan checks for migrations/001_indexes.sql; not a migration.
+-- Each statement lists the plan it must produce. python -m
+-- benchmarks.explain runs them against a loaded database, compares the
+-- plans and records the real EXPLAIN output in explain_indexes.txt.
+-- A plan with type=ALL on the named table means the index is not used.
+USE librarydb;
+
+-- LoginWindow.login
+-- expect: users  type=const  key=uq_users_user_name  rows=1
+EXPLAIN SELECT user_id, password FROM users WHERE user_name = 'dex';
+
+-- register_user duplicate check
+-- expect: users  type=index_merge  key=uq_users_user_name,uq_users_email
+--         Extra=Using union(uq_users_user_name,uq_users_email)
+EXPLAIN SELECT COUNT(*) FROM users
+WHERE user_name = 'dex' OR email = 'main@random.com';
+
+-- donate_book author lookup
+-- expect: authors  type=const  key=uq_authors_name  rows=1
+EXPLAIN SELECT author_id FROM authors
+WHERE first_name = 'George' AND last_name = 'Orwell';
+
+-- donate_book genre lookup
+-- expect: genres  type=const  key=uq_genres_name  rows=1
+EXPLAIN SELECT genre_id FROM genres WHERE genre_name = 'Dystopian';
+
+-- donate_book publisher lookup
+-- expect: publishers  type=const  key=uq_publishers_name  rows=1
+EXPLAIN SELECT publisher_id FROM publishers
+WHERE publisher_name = 'Penguin Random House';
+
+-- Dashboard.return_book open loans
+-- expect: loans  type=ref  key=idx_loans_user_return  ref=const,const
+--         books  type=eq_ref  key=PRIMARY
+EXPLAIN SELECT loans.loan_id, books.title, loans.loan_date
+FROM loans
+INNER JOIN books ON loans.book_id = books.book_id
+WHERE loans.user_id = 2 AND loans.return_date IS NULL;
+
+-- Fines.outstanding (fine_balance through the merged fine_balances view)
+-- expect: l  type=ref  key=idx_loans_user_return
+--         f  type=ref  key=loan_id  ref=librarydb.l.loan_id
+EXPLAIN SELECT COALESCE(SUM(amount), 0), COUNT(*)
+FROM fine_balances
+WHERE user_id = 2 AND status = 'unpaid';
+
+-- fetch_unrated_books: current and archived loans of the user
+-- expect: loans  type=ref  key=idx_loans_user_return
+--         loan_history  type=ref  key=idx_loan_history_user_book
+--         r  type=ref  key=idx_ratings_user_book  ref=const,borrowed.book_id
+EXPLAIN SELECT b.book_id, b.title
+FROM (
+    SELECT book_id FROM loans WHERE user_id = 2
+    UNION
+    SELECT book_id FROM loan_history WHERE user_id = 2
+) borrowed
+JOIN books b ON borrowed.book_id = b.book_id
+LEFT JOIN ratings r ON borrowed.book_id = r.book_id AND r.user_id = 2
+WHERE r.rating IS NULL;
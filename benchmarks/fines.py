@@ -0,0 +1,112 @@
+"""
+Compare the legacy full-table update_fines event with accrue_fines().
+
+Every run executes inside a transaction that is rolled back, so the
+benchmark can be pointed at a populated database without changing it.
+
+    python -m benchmarks.fines --runs 10
+"""
+import argparse
+import statistics
+import time
+
+from database import Connection
+
+
+# Body of the update_fines event before fines became incremental
+LEGACY_UPDATE_FINES = (
+    """
+    UPDATE fines f
+    JOIN loans l ON f.loan_id = l.loan_id
+    SET f.amount = DATEDIFF(CURDATE(), DATE_ADD(l.loan_date, INTERVAL 14 DAY)) * 5
+    WHERE
+        l.return_date IS NULL
+        AND CURDATE() > DATE_ADD(l.loan_date, INTERVAL 14 DAY)
+        AND f.status = 'unpaid'
+    """,
+    """
+    INSERT INTO fines (loan_id, amount, status)
+    SELECT
+        l.loan_id,
+        DATEDIFF(CURDATE(), DATE_ADD(l.loan_date, INTERVAL 14 DAY)) * 5,
+        'unpaid'
+    FROM loans l
+    LEFT JOIN fines f ON l.loan_id = f.loan_id AND f.status = 'unpaid'
+    WHERE
+        l.return_date IS NULL
+        AND CURDATE() > DATE_ADD(l.loan_date, INTERVAL 14 DAY)
+        AND f.loan_id IS NULL
+    """,
+)
+
+
+def legacy(cursor):
+    for statement in LEGACY_UPDATE_FINES:
+        cursor.execute(statement)
+
+
+def incremental_daily(cursor):
+    # Steady state: the job last ran yesterday
+    cursor.execute(
+        "INSERT INTO job_state (job_name, last_run) "
+        "VALUES ('accrue_fines', CURDATE() - INTERVAL 1 DAY) "
+        "ON DUPLICATE KEY UPDATE last_run = CURDATE() - INTERVAL 1 DAY"
+    )
+    cursor.callproc("accrue_fines")
+
+
+def incremental_bootstrap(cursor):
+    # First run after the migration scans every open loan once
+    cursor.execute("DELETE FROM job_state WHERE job_name = 'accrue_fines'")
+    cursor.callproc("accrue_fines")
+
+
+def measure(db, job, runs):
+    """Run ``job`` ``runs`` times, rolling back each run, and return seconds."""
+    timings = []
+    for _ in range(runs):
+        with db.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                start = time.perf_counter()
+                job(cursor)
+                timings.append(time.perf_counter() - start)
+            finally:
+                conn.rollback()
+                cursor.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    db = Connection(pool_size=1)
+    if not db.available:
+        raise SystemExit("No valid database connection found.")
+
+    with db.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM loans")
+        loans = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM fines")
+        fines = cursor.fetchone()[0]
+    print(f"loans: {loans}  fines: {fines}  runs: {args.runs}")
+
+    jobs = (
+        ("legacy update_fines", legacy),
+        ("accrue_fines (bootstrap)", incremental_bootstrap),
+        ("accrue_fines (daily)", incremental_daily),
+    )
+    for name, job in jobs:
+        timings = measure(db, job, args.runs)
+        print(
+            f"{name:<28} min {min(timings) * 1000:9.2f} ms"
+            f"  median {statistics.median(timings) * 1000:9.2f} ms"
+        )
+
+    db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,424 @@
+"""
+Synthesize a library at scale and replay a mixed workload against it.
+
+``populate`` fills an empty librarydb (schema from librarySetup.sql and
+the migrations, without populate.sql) with deterministic synthetic data.
+The aggregate triggers are switched off with @bulk_load for the load and
+the aggregates are rebuilt at the end with rebuild_recommendation_stats().
+The rebuild pairs each borrowed book with at most 100 others, so it grows
+linearly with --loans (pass --skip-rebuild to run it separately).
+
+``run`` replays logins, issues, returns, reviews, recommendations, review
+browsing and catalog searches from several threads through the
+LibraryService the GUI uses, and reports p50/p95/p99 latency and throughput per operation.
+
+    python -m benchmarks.workload populate --books 1000000 --users 100000 \\
+        --loans 10000000 --ratings 5000000
+    python -m benchmarks.workload run --threads 8 --duration 60
+"""
+import argparse
+import math
+import random
+import string
+import threading
+import time
+from datetime import date, timedelta
+
+from credentials import Credentials
+from database import Connection
+from reviews import Reviews
+from service import LibraryService
+
+
+# Every synthetic user is "<USER_PREFIX><n>" with this password
+USER_PREFIX = "bench_user"
+PASSWORD = "bench-password"
+
+FIRST_NAMES = (
+    "Sophia", "Liam", "Emma", "Noah", "Olivia", "Ava", "Isabella", "Mason",
+    "Lucas", "Mia", "Amelia", "Harper", "Evelyn", "James", "Benjamin", "Ella",
+)
+LAST_NAMES = (
+    "Miller", "Johnson", "Brown", "Williams", "Jones", "Garcia", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Moore",
+)
+TITLE_WORDS = (
+    "Shadow", "River", "Empire", "Silent", "Garden", "Winter", "Crown",
+    "Glass", "Memory", "Ocean", "Stone", "Night", "Golden", "Forgotten",
+    "City", "Storm", "Letters", "House", "Journey", "Fire", "Secret", "Moon",
+)
+REVIEWS = (
+    "Loved it.", "Could not put it down.", "Slow start, great ending.",
+    "Not for me.", "A classic.", "Overrated.", "Beautifully written.", "",
+)
+
+DEFAULT_MIX = "login=5,issue=10,return=10,review=5,recommend=10,browse=30,search=30"
+
+
+def skewed(rng, items):
+    """Pick from ``items`` with a popularity skew towards the front."""
+    return items[int(len(items) * rng.random() ** 3)]
+
+
+def insert_batches(conn, cursor, label, sql, rows, batch_size):
+    """executemany ``rows`` in batches of ``batch_size``, one commit each."""
+    start = time.perf_counter()
+    batch = []
+    count = 0
+
+    def flush():
+        cursor.executemany(sql, batch)
+        conn.commit()
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+            count += len(batch)
+            batch = []
+            rate = count / (time.perf_counter() - start)
+            print(f"\r{label}: {count} rows ({rate:.0f} rows/s)", end="", flush=True)
+    if batch:
+        flush()
+        count += len(batch)
+    print(f"\r{label}: {count} rows in {time.perf_counter() - start:.1f}s" + " " * 20)
+
+
+def fetch_ids(cursor, table, id_column):
+    cursor.execute(f"SELECT {id_column} FROM {table} ORDER BY {id_column}")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def populate(db, args):
+    rng = random.Random(args.seed)
+    today = date.today()
+    password_hash = Credentials(None).hash(PASSWORD)
+
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT COUNT(*) FROM books")
+            if cursor.fetchone()[0] and not args.append:
+                raise SystemExit(
+                    "librarydb already has books; load into an empty database "
+                    "or pass --append."
+                )
+
+            # Generated rows are consistent by construction
+            cursor.execute("SET @bulk_load = 1")
+            cursor.execute("SET foreign_key_checks = 0, unique_checks = 0")
+
+            authors = max(args.books // 10, 1)
+            publishers = max(args.books // 1000, 10)
+            insert_batches(
+                conn, cursor, "genres",
+                "INSERT IGNORE INTO genres (genre_name) VALUES (%s)",
+                ((f"Genre {n}",) for n in range(args.genres)),
+                args.batch,
+            )
+            insert_batches(
+                conn, cursor, "publishers",
+                "INSERT IGNORE INTO publishers (publisher_name) VALUES (%s)",
+                ((f"Publisher {n}",) for n in range(publishers)),
+                args.batch,
+            )
+            insert_batches(
+                conn, cursor, "authors",
+                "INSERT IGNORE INTO authors (first_name, last_name) VALUES (%s, %s)",
+                (
+                    (f"{rng.choice(FIRST_NAMES)}{n}", rng.choice(LAST_NAMES))
+                    for n in range(authors)
+                ),
+                args.batch,
+            )
+            genre_ids = fetch_ids(cursor, "genres", "genre_id")
+            publisher_ids = fetch_ids(cursor, "publishers", "publisher_id")
+            author_ids = fetch_ids(cursor, "authors", "author_id")
+
+            insert_batches(
+                conn, cursor, "books",
+                "INSERT INTO books "
+                "(title, author_id, genre_id, publisher_id, available_copies) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                (
+                    (
+                        f"{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_WORDS)} {n}",
+                        rng.choice(author_ids),
+                        skewed(rng, genre_ids),
+                        rng.choice(publisher_ids),
+                        rng.randint(1, 5),
+                    )
+                    for n in range(args.books)
+                ),
+                args.batch,
+            )
+            insert_batches(
+                conn, cursor, "users",
+                "INSERT INTO users "
+                "(first_name, last_name, user_name, password, email, phone_number) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                (
+                    (
+                        rng.choice(FIRST_NAMES),
+                        rng.choice(LAST_NAMES),
+                        f"{USER_PREFIX}{n}",
+                        password_hash,
+                        f"{USER_PREFIX}{n}@example.com",
+                        "".join(rng.choices(string.digits, k=9)),
+                    )
+                    for n in range(args.users)
+                ),
+                args.batch,
+            )
+            book_ids = fetch_ids(cursor, "books", "book_id")
+            user_ids = fetch_ids(cursor, "users", "user_id")
+
+            def loans():
+                # Two years of history; loans from the last month may still
+                # be open. Open loans do not take copies off the shelf.
+                for _ in range(args.loans):
+                    loan_date = today - timedelta(days=rng.randint(0, 730))
+                    if (today - loan_date).days < 30 and rng.random() < 0.5:
+                        return_date = None
+                    else:
+                        return_date = min(
+                            loan_date + timedelta(days=rng.randint(1, 28)), today
+                        )
+                    yield (
+                        rng.choice(user_ids),
+                        skewed(rng, book_ids),
+                        loan_date,
+                        return_date,
+                    )
+
+            insert_batches(
+                conn, cursor, "loans",
+                "INSERT INTO loans (user_id, book_id, loan_date, return_date) "
+                "VALUES (%s, %s, %s, %s)",
+                loans(),
+                args.batch,
+            )
+            insert_batches(
+                conn, cursor, "ratings",
+                "INSERT INTO ratings (user_id, book_id, rating, review) "
+                "VALUES (%s, %s, %s, %s)",
+                (
+                    (
+                        rng.choice(user_ids),
+                        skewed(rng, book_ids),
+                        rng.choices((1, 2, 3, 4, 5), weights=(1, 2, 4, 6, 5))[0],
+                        rng.choice(REVIEWS),
+                    )
+                    for _ in range(args.ratings)
+                ),
+                args.batch,
+            )
+
+            cursor.execute("SET foreign_key_checks = 1, unique_checks = 1")
+            cursor.execute("SET @bulk_load = NULL")
+            if args.skip_rebuild:
+                print("Skipped rebuild; CALL rebuild_recommendation_stats(); later.")
+            else:
+                start = time.perf_counter()
+                cursor.callproc("rebuild_recommendation_stats")
+                conn.commit()
+                print(f"aggregates rebuilt in {time.perf_counter() - start:.1f}s")
+        finally:
+            cursor.close()
+
+
+class Workload:
+    """
+    The operations replayed by ``run``, each a method taking an RNG.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.library = LibraryService(db)
+
+        with db.cursor() as cursor:
+            cursor.execute(
+                "SELECT user_id, user_name FROM users WHERE user_name LIKE %s",
+                (USER_PREFIX + "%",),
+            )
+            self.users = cursor.fetchall()
+            cursor.execute("SELECT book_id FROM books ORDER BY book_id")
+            self.book_ids = [row[0] for row in cursor.fetchall()]
+        if not self.users or not self.book_ids:
+            raise SystemExit("No synthetic data found; run populate first.")
+
+    def login(self, rng):
+        user_id, username = rng.choice(self.users)
+        return self.library.login(username, PASSWORD)
+
+    def issue(self, rng):
+        self.library.issue(rng.choice(self.users)[0], skewed(rng, self.book_ids))
+
+    def return_(self, rng):
+        user_id = rng.choice(self.users)[0]
+        with self.db.cursor(operation="open_loans") as cursor:
+            cursor.execute(
+                "SELECT loan_id FROM loans "
+                "WHERE user_id = %s AND return_date IS NULL LIMIT 1",
+                (user_id,),
+            )
+            loan = cursor.fetchone()
+        if loan:
+            self.library.return_loan(user_id, loan[0])
+
+    def review(self, rng):
+        self.library.add_review(
+            rng.choice(self.users)[0],
+            skewed(rng, self.book_ids),
+            rng.randint(1, 5),
+            rng.choice(REVIEWS),
+        )
+
+    def recommend(self, rng):
+        return self.library.recommend(rng.choice(self.users)[0])
+
+    def browse(self, rng):
+        sort = rng.choice(tuple(Reviews.SORT_COLUMNS))
+        rating = rng.choice((None, None, None, rng.randint(1, 5)))
+        return self.library.reviews_page(
+            sort=sort, descending=rng.random() < 0.5, rating=rating
+        )
+
+    def search(self, rng):
+        term = rng.choice(TITLE_WORDS)[: rng.randint(1, 5)]
+        return self.library.search_books(term)
+
+    OPERATIONS = {
+        "login": login,
+        "issue": issue,
+        "return": return_,
+        "review": review,
+        "recommend": recommend,
+        "browse": browse,
+        "search": search,
+    }
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(math.ceil(len(sorted_values) * p / 100) - 1, 0)
+    return sorted_values[index]
+
+
+def run(db, args):
+    mix = {}
+    for item in args.mix.split(","):
+        name, weight = item.split("=")
+        if name not in Workload.OPERATIONS:
+            raise SystemExit(f"Unknown operation {name!r}")
+        mix[name] = float(weight)
+
+    workload = Workload(db)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    # operation -> [latencies in seconds], [error messages]
+    latencies = {name: [] for name in names}
+    errors = {name: [] for name in names}
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local = {name: [] for name in names}
+        failed = {name: [] for name in names}
+        while time.monotonic() < deadline:
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                Workload.OPERATIONS[name](workload, rng)
+            except Exception as e:
+                failed[name].append(str(e))
+            local[name].append(time.perf_counter() - start)
+        with lock:
+            for name in names:
+                latencies[name].extend(local[name])
+                errors[name].extend(failed[name])
+
+    print(f"threads: {args.threads}  duration: {args.duration}s  mix: {args.mix}")
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=worker, args=(args.seed + n,))
+        for n in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    # Write out the audit events the operations queued
+    workload.library.close()
+
+    print(
+        f"{'operation':<12}{'ops':>9}{'ops/s':>9}{'err %':>7}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    )
+    total = 0
+    for name in names:
+        timings = sorted(latencies[name])
+        if not timings:
+            continue
+        total += len(timings)
+        print(
+            f"{name:<12}{len(timings):>9}{len(timings) / elapsed:>9.1f}"
+            f"{len(errors[name]) / len(timings) * 100:>7.1f}"
+            f"{percentile(timings, 50) * 1000:>10.2f}"
+            f"{percentile(timings, 95) * 1000:>10.2f}"
+            f"{percentile(timings, 99) * 1000:>10.2f}"
+            f"{timings[-1] * 1000:>10.2f}"
+        )
+    print(f"{'total':<12}{total:>9}{total / elapsed:>9.1f}")
+
+    for name in names:
+        if errors[name]:
+            # Business rule rejections (no copies left, ...) show up here too
+            print(f"{name} errors, e.g.: {errors[name][0]}")
+    if args.stats:
+        print(f"per-statement stats written to {db.instrumentation.export(args.stats)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seed", type=int, default=42)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("populate", help="generate synthetic data")
+    load.add_argument("--books", type=int, default=100000)
+    load.add_argument("--users", type=int, default=10000)
+    load.add_argument("--loans", type=int, default=1000000)
+    load.add_argument("--ratings", type=int, default=500000)
+    load.add_argument("--genres", type=int, default=30)
+    load.add_argument("--batch", type=int, default=5000)
+    load.add_argument("--append", action="store_true")
+    load.add_argument(
+        "--skip-rebuild",
+        action="store_true",
+        help="leave book_stats and the recommendation tables for later",
+    )
+
+    replay = commands.add_parser("run", help="replay the workload mix")
+    replay.add_argument("--threads", type=int, default=4)
+    replay.add_argument("--duration", type=float, default=30)
+    replay.add_argument("--mix", default=DEFAULT_MIX)
+    replay.add_argument("--stats", help="also export instrumentation JSON here")
+
+    args = parser.parse_args()
+
+    pool_size = args.threads + 1 if args.command == "run" else 1
+    db = Connection(pool_size=pool_size)
+    if not db.available:
+        raise SystemExit("No valid database connection found.")
+
+    if args.command == "populate":
+        populate(db, args)
+    else:
+        run(db, args)
+    db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Rebuild the book_neighbours table for personalised recommendations.
+
+Builds a sparse user x book interaction matrix from every loan (archived
+ones included) and every rating, computes item-item cosine similarities
+block by block and keeps the top neighbours of each book. The new table
+is filled on the side and swapped in atomically, so the dashboard keeps
+serving the previous neighbours while the job runs. Meant to run
+nightly, e.g. from cron:
+
+    python build_neighbours.py --neighbours 30 --block-size 2000
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+from scipy import sparse
+
+from database import Connection
+
+
+# Interaction strength of a loan; a rating r counts r / RATING_SCALE, so a
+# five star rating outweighs a plain loan and a one star rating does not
+LOAN_WEIGHT = 1.0
+RATING_SCALE = 3.0
+
+FETCH_SIZE = 100000
+
+
+def read_interactions(db):
+    """
+    Return ``(users, books, weights)`` arrays with one entry per
+    (user, book) pair, keeping the strongest signal of each pair.
+    """
+    chunks = []
+    with db.cursor(operation="neighbour_interactions") as cursor:
+        for query, weight in (
+            ("SELECT user_id, book_id, %s FROM all_loans", LOAN_WEIGHT),
+            (
+                "SELECT user_id, book_id, rating / %s FROM ratings "
+                "WHERE rating IS NOT NULL",
+                RATING_SCALE,
+            ),
+        ):
+            cursor.execute(query, (weight,))
+            while True:
+                rows = cursor.fetchmany(FETCH_SIZE)
+                if not rows:
+                    break
+                chunks.append(np.array(rows, dtype=np.float64))
+                print(
+                    f"\r{sum(len(chunk) for chunk in chunks)} interactions read",
+                    end="",
+                    file=sys.stderr,
+                )
+    print(file=sys.stderr)
+
+    if not chunks:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0)
+    data = np.concatenate(chunks)
+    users, books = data[:, 0].astype(np.int64), data[:, 1].astype(np.int64)
+    weights = data[:, 2]
+
+    # Strongest signal per pair: sort by pair, then weight, keep the last
+    order = np.lexsort((weights, books, users))
+    users, books, weights = users[order], books[order], weights[order]
+    last = np.ones(len(users), dtype=bool)
+    last[:-1] = (users[1:] != users[:-1]) | (books[1:] != books[:-1])
+    return users[last], books[last], weights[last]
+
+
+def interaction_matrix(users, books, weights):
+    """
+    Column-normalised user x book CSC matrix and the book id of each
+    column.
+    """
+    user_index = np.unique(users, return_inverse=True)[1]
+    book_ids, book_index = np.unique(books, return_inverse=True)
+    matrix = sparse.csc_matrix(
+        (weights, (user_index, book_index)),
+        shape=(user_index.max() + 1, len(book_ids)),
+    )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+    norms[norms == 0] = 1
+    return matrix @ sparse.diags(1 / norms), book_ids
+
+
+def top_neighbours(matrix, book_ids, k, min_score, block_size):
+    """
+    Yield ``(book_id, neighbour_id, score)`` for the ``k`` most similar
+    books of every book, one block of books at a time so that only a
+    block x books slice of the similarity matrix is ever materialised.
+    """
+    transposed = matrix.T.tocsr()
+    for start in range(0, matrix.shape[1], block_size):
+        block = (transposed[start:start + block_size] @ matrix).tocsr()
+        for row in range(block.shape[0]):
+            begin, end = block.indptr[row], block.indptr[row + 1]
+            columns = block.indices[begin:end]
+            scores = block.data[begin:end]
+
+            # A book is not its own neighbour
+            keep = (columns != start + row) & (scores >= min_score)
+            columns, scores = columns[keep], scores[keep]
+            if len(scores) > k:
+                best = np.argpartition(scores, -k)[-k:]
+                columns, scores = columns[best], scores[best]
+
+            book_id = int(book_ids[start + row])
+            for column, score in zip(columns, scores):
+                yield book_id, int(book_ids[column]), float(score)
+
+        print(
+            f"\r{min(start + block_size, matrix.shape[1])}/{matrix.shape[1]} books",
+            end="",
+            file=sys.stderr,
+        )
+    print(file=sys.stderr)
+
+
+def write_neighbours(db, neighbours, batch_size):
+    """Fill a fresh copy of book_neighbours and swap it in; returns rows."""
+    written = 0
+    with db.cursor(commit=True, operation="neighbour_write") as cursor:
+        cursor.execute("DROP TABLE IF EXISTS book_neighbours_next")
+        cursor.execute("CREATE TABLE book_neighbours_next LIKE book_neighbours")
+
+        batch = []
+        for row in neighbours:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                cursor.executemany(
+                    "INSERT INTO book_neighbours_next "
+                    "(book_id, neighbour_id, score) VALUES (%s, %s, %s)",
+                    batch,
+                )
+                written += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(
+                "INSERT INTO book_neighbours_next "
+                "(book_id, neighbour_id, score) VALUES (%s, %s, %s)",
+                batch,
+            )
+            written += len(batch)
+
+        # RENAME commits the inserts and swaps both names atomically, so
+        # readers see either the old or the new table, never a mix
+        cursor.execute(
+            "RENAME TABLE book_neighbours TO book_neighbours_old, "
+            "book_neighbours_next TO book_neighbours"
+        )
+        cursor.execute("DROP TABLE book_neighbours_old")
+        cursor.execute(
+            "INSERT INTO job_state (job_name, last_run) "
+            "VALUES ('build_neighbours', CURDATE()) "
+            "ON DUPLICATE KEY UPDATE last_run = CURDATE()"
+        )
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--neighbours", type=int, default=30)
+    parser.add_argument("--min-score", type=float, default=0.01)
+    parser.add_argument("--block-size", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    db = Connection(pool_size=1)
+    if not db.available:
+        raise SystemExit("No valid database connection found.")
+
+    started = time.perf_counter()
+    users, books, weights = read_interactions(db)
+    if not len(users):
+        raise SystemExit("No loans or ratings to learn from.")
+    matrix, book_ids = interaction_matrix(users, books, weights)
+    print(
+        f"{matrix.shape[0]} users x {matrix.shape[1]} books, "
+        f"{matrix.nnz} interactions"
+    )
+
+    neighbours = top_neighbours(
+        matrix, book_ids, args.neighbours, args.min_score, args.block_size
+    )
+    written = write_neighbours(db, neighbours, args.batch_size)
+    print(f"{written} neighbours written in {time.perf_counter() - started:.1f}s")
+    print(db.instrumentation.report())
+    db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+from database import fulltext_prefix, like_prefix
+
+
+class Catalog:
+    """
+    Read-side access to the book catalog.
+
+    Searches are keyset-paginated on (title, book_id): every page is an
+    index range scan that starts where the previous page ended, so the
+    cost of a page does not depend on how deep the user has scrolled.
+    """
+
+    PAGE_SIZE = 50
+
+    # Relevance weight of a match in each indexed source: title, author
+    # and genre words together (books.search_text), a bonus when every
+    # word is in the title, and mentions in reviews
+    BOOK_WEIGHT = 2
+    TITLE_WEIGHT = 1
+    REVIEW_WEIGHT = 1
+
+    def __init__(self, db_connection):
+        self.db = db_connection
+
+    def search_books(self, term="", after=None, limit=None, available_only=True,
+                     genre=None):
+        """
+        Return one page of books whose title, author or genre starts with
+        ``term``, ordered by title, optionally within the genre named
+        ``genre``.
+
+        ``after`` is the ``next_page`` key returned by the previous call;
+        pass None for the first page. Returns ``(rows, next_page)`` where
+        each row is ``(book_id, title, available_copies, author, genre)``
+        and ``next_page`` is None once the last page has been reached.
+        """
+        limit = limit or Catalog.PAGE_SIZE
+        prefix = like_prefix(term.strip())
+
+        query = """
+            SELECT b.book_id, b.title, b.available_copies,
+                   CONCAT(a.first_name, ' ', a.last_name) AS author,
+                   g.genre_name
+            FROM books b
+            LEFT JOIN authors a ON b.author_id = a.author_id
+            LEFT JOIN genres g ON b.genre_id = g.genre_id
+            WHERE (b.title LIKE %s
+                   OR a.first_name LIKE %s
+                   OR a.last_name LIKE %s
+                   OR g.genre_name LIKE %s)
+        """
+        params = [prefix, prefix, prefix, prefix]
+
+        if available_only:
+            query += " AND b.available_copies > 0"
+        if genre:
+            query += " AND g.genre_name = %s"
+            params.append(genre)
+
+        if after is not None:
+            query += " AND (b.title > %s OR (b.title = %s AND b.book_id > %s))"
+            params.extend([after[0], after[0], after[1]])
+
+        # Fetch one extra row to know whether another page exists
+        query += " ORDER BY b.title, b.book_id LIMIT %s"
+        params.append(limit + 1)
+
+        with self.db.cursor(operation="search_books") as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+
+        next_page = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_page = (rows[-1][1], rows[-1][0])
+        return rows, next_page
+
+    def search(self, term, genre=None, after=None, limit=None,
+               available_only=True):
+        """
+        Ranked full-text search over titles, author names, genres and
+        reviews.
+
+        Every word of ``term`` must match as a word prefix, either all in
+        the book's title, author and genre taken together (so "orwell
+        1984" finds the book) or all in one of its reviews. Book matches
+        outrank review mentions, and books with every word in the title
+        rank first. ``genre`` restricts results to one genre name. Rows
+        and paging are as for ``search_books``, ordered by descending
+        relevance; terms with no indexable word fall back to
+        ``search_books``.
+        """
+        against = fulltext_prefix(term)
+        if against is None:
+            return self.search_books(term, after, limit, available_only, genre)
+        limit = limit or Catalog.PAGE_SIZE
+
+        # Each branch is answered by its own FULLTEXT index; the scores
+        # are only combined for the (few) books that matched somewhere.
+        query = """
+            SELECT b.book_id, b.title, b.available_copies,
+                   CONCAT(a.first_name, ' ', a.last_name) AS author,
+                   g.genre_name, hits.score
+            FROM (
+                SELECT book_id, SUM(score) AS score
+                FROM (
+                    SELECT book_id,
+                           MATCH (search_text) AGAINST (%s IN BOOLEAN MODE) * %s
+                           + MATCH (title) AGAINST (%s IN BOOLEAN MODE) * %s
+                               AS score
+                    FROM books
+                    WHERE MATCH (search_text) AGAINST (%s IN BOOLEAN MODE)
+                    UNION ALL
+                    SELECT book_id,
+                           MAX(MATCH (review) AGAINST (%s IN BOOLEAN MODE)) * %s
+                    FROM ratings
+                    WHERE MATCH (review) AGAINST (%s IN BOOLEAN MODE)
+                    GROUP BY book_id
+                ) matches
+                GROUP BY book_id
+            ) hits
+            JOIN books b ON b.book_id = hits.book_id
+            LEFT JOIN authors a ON b.author_id = a.author_id
+            LEFT JOIN genres g ON b.genre_id = g.genre_id
+            WHERE 1 = 1
+        """
+        params = [
+            against, Catalog.BOOK_WEIGHT, against, Catalog.TITLE_WEIGHT, against,
+            against, Catalog.REVIEW_WEIGHT, against,
+        ]
+
+        if available_only:
+            query += " AND b.available_copies > 0"
+        if genre:
+            query += " AND g.genre_name = %s"
+            params.append(genre)
+
+        if after is not None:
+            query += (
+                " AND (hits.score < %s"
+                " OR (hits.score = %s AND b.book_id > %s))"
+            )
+            params.extend([after[0], after[0], after[1]])
+
+        query += " ORDER BY hits.score DESC, b.book_id LIMIT %s"
+        params.append(limit + 1)
+
+        with self.db.cursor(operation="fulltext_search") as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+
+        next_page = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_page = (rows[-1][5], rows[-1][0])
+        return [row[:5] for row in rows], next_page
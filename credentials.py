@@ -0,0 +1,139 @@
+import base64
+import hashlib
+import hmac
+import os
+
+from queries import QueryRegistry
+
+
+class Credentials:
+    """
+    Password hashing, verification and registration.
+
+    Hashes are stored as ``scheme$cost...$salt$digest`` so the work factor
+    can be raised later: a login against an older scheme or cost, or
+    against a legacy plaintext row, re-hashes the password with the
+    current settings. Hashing is deliberately slow, so callers on the UI
+    thread should run these methods through the TaskRunner.
+    """
+
+    # scrypt cost; ~16 MiB per hash. Use benchmarks.credentials to tune.
+    SCRYPT_N = 2 ** 14
+    SCRYPT_R = 8
+    SCRYPT_P = 1
+
+    # Used where OpenSSL was built without scrypt
+    PBKDF2_ITERATIONS = 600000
+
+    SALT_BYTES = 16
+
+    def __init__(self, db_connection, queries=None, n=None, iterations=None):
+        self.db = db_connection
+        self.queries = queries or QueryRegistry(db_connection)
+        self.n = n or Credentials.SCRYPT_N
+        self.iterations = iterations or Credentials.PBKDF2_ITERATIONS
+        self.scheme = "scrypt" if hasattr(hashlib, "scrypt") else "pbkdf2"
+        # Verified against when the user does not exist, so unknown
+        # user names take as long to reject as wrong passwords
+        self.dummy_hash = None
+
+    def hash(self, password):
+        """Return a storable hash of ``password`` with the current settings."""
+        salt = os.urandom(Credentials.SALT_BYTES)
+        if self.scheme == "scrypt":
+            params = (self.n, Credentials.SCRYPT_R, Credentials.SCRYPT_P)
+        else:
+            params = (self.iterations,)
+        digest = Credentials.derive(self.scheme, params, password, salt)
+        return "$".join(
+            [self.scheme, *map(str, params), Credentials.encode(salt),
+             Credentials.encode(digest)]
+        )
+
+    def verify(self, stored, password):
+        """
+        Check ``password`` against a stored value.
+
+        Returns ``(matches, needs_rehash)``; ``needs_rehash`` is set when
+        the stored value is plaintext or uses older settings.
+        """
+        scheme, _, rest = stored.partition("$")
+        if scheme not in ("scrypt", "pbkdf2") or not rest:
+            # Rows written before passwords were hashed
+            matches = hmac.compare_digest(
+                stored.encode("utf-8"), password.encode("utf-8")
+            )
+            return matches, True
+
+        *params, salt, digest = rest.split("$")
+        params = tuple(int(value) for value in params)
+        expected = Credentials.decode(digest)
+        actual = Credentials.derive(
+            scheme, params, password, Credentials.decode(salt), len(expected)
+        )
+        if not hmac.compare_digest(actual, expected):
+            return False, False
+
+        if self.scheme == "scrypt":
+            current = (self.n, Credentials.SCRYPT_R, Credentials.SCRYPT_P)
+        else:
+            current = (self.iterations,)
+        return True, (scheme, params) != (self.scheme, current)
+
+    def authenticate(self, username, password):
+        """
+        Return the user_id for a valid login, or None.
+
+        Upgrades the stored hash in place when ``verify`` asks for it.
+        """
+        result = self.queries.fetchone("login", (username,))
+
+        if result is None:
+            if self.dummy_hash is None:
+                self.dummy_hash = self.hash("")
+            self.verify(self.dummy_hash, password)
+            return None
+
+        user_id, stored = result
+        matches, needs_rehash = self.verify(stored, password)
+        if not matches:
+            return None
+
+        if needs_rehash:
+            # Only replaces the value that was verified
+            self.queries.run(
+                "upgrade_password", (self.hash(password), user_id, stored)
+            )
+        return user_id
+
+    def register(self, first_name, last_name, username, phone_number, email,
+                 password):
+        """Create a user through register_user, storing only the hash."""
+        hashed = self.hash(password)
+        self.queries.call(
+            "register_user",
+            (first_name, last_name, username, phone_number, email, hashed),
+            commit=True,
+        )
+
+    @staticmethod
+    def derive(scheme, params, password, salt, length=32):
+        password = password.encode("utf-8")
+        if scheme == "scrypt":
+            n, r, p = params
+            return hashlib.scrypt(
+                password, salt=salt, n=n, r=r, p=p, dklen=length,
+                maxmem=256 * r * (n + p + 2),
+            )
+        (iterations,) = params
+        return hashlib.pbkdf2_hmac(
+            "sha256", password, salt, iterations, dklen=length
+        )
+
+    @staticmethod
+    def encode(raw):
+        return base64.b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def decode(text):
+        return base64.b64decode(text.encode("ascii"))
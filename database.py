@@ -1,16 +1,81 @@
-import mysql.connector
-from mysql.connector import Error
+import re
+import time
+from contextlib import contextmanager
+
+from mysql.connector import Error, PoolError, pooling
+
+from instrumentation import Instrumentation
+
+
+def like_prefix(term):
+    """Escape LIKE wildcards in ``term`` and turn it into a prefix pattern."""
+    escaped = (
+        term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    )
+    return escaped + "%"
+
+
+# InnoDB's default innodb_ft_min_token_size; shorter words are not indexed
+FULLTEXT_MIN_WORD = 3
+
+# INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD (plus "and"). Stopwords are
+# not indexed, and a required "+the*" would only match other words
+# starting with "the", so they are left out of queries.
+FULLTEXT_STOPWORDS = frozenset(
+    """
+    a about an and are as at be by com de en for from how i in is it la of
+    on or that the this to was what when where who will with und www
+    """.split()
+)
+
+
+def fulltext_prefix(term):
+    """
+    Turn ``term`` into a BOOLEAN MODE query requiring every word as a
+    prefix, e.g. "the harry pot" -> "+harry* +pot*". Returns None when no
+    word is long enough to be in a FULLTEXT index.
+    """
+    words = re.findall(r"\w+", term.lower())
+    words = [
+        word
+        for word in words
+        if len(word) >= FULLTEXT_MIN_WORD and word not in FULLTEXT_STOPWORDS
+    ]
+    if not words:
+        return None
+    return " ".join(f"+{word}*" for word in words)
 
 
 class Connection:
+    """
+    Pooled connection manager for the library database.
+
+    Every operation checks a connection out of the pool, verifies it is
+    still alive and hands it back when done, so concurrent windows never
+    queue behind a single shared cursor and a restarted server is picked
+    up transparently on the next checkout.
+    """
+
     __HOST = "" # Replace with your host
     __USER = "" # Replace with your username
     __PASSWORD = "" # Replace with your password
     __DATABASE = "" # Replace with your database name
+    __POOL_NAME = "library_pool"
+    __POOL_SIZE = 5
+    __RECONNECT_ATTEMPTS = 3
+    __RECONNECT_DELAY = 1
+    __CHECKOUT_TIMEOUT = 10
 
-    def __init__(self):
+    def __init__(self, pool_size=None, instrumentation=None):
+        self.pool_size = pool_size or Connection.__POOL_SIZE
+        self.instrumentation = instrumentation or Instrumentation()
         try:
-            self.conn = mysql.connector.connect(
+            self.pool = pooling.MySQLConnectionPool(
+                pool_name=Connection.__POOL_NAME,
+                pool_size=self.pool_size,
+                # Resetting the session would drop the prepared statements
+                # the QueryRegistry keeps per connection
+                pool_reset_session=False,
                 host=Connection.__HOST,
                 user=Connection.__USER,
                 password=Connection.__PASSWORD,
@@ -18,17 +83,114 @@ class Connection:
                 charset="utf8mb4",
                 collation='utf8mb4_general_ci'
             )
-            if self.conn.is_connected():
-                print("Successfully connected to the database")
+            print("Successfully connected to the database")
         except Error as e:
             print(f"Error while connecting to MySQL: {e}")
-            self.conn = None
+            self.pool = None
 
-    def close_connection(self):
-        if self.conn and self.conn.is_connected():
-            self.conn.close()
-            print("Database connection closed")
+    @property
+    def available(self):
+        """True when the pool was created and connections can be checked out."""
+        return self.pool is not None
+
+    def get_connection(self):
+        """
+        Check a healthy connection out of the pool.
+
+        The connection is pinged before use and reconnected if the server
+        dropped it, e.g. after a MariaDB restart.
+        """
+        if self.pool is None:
+            raise Error("No valid database connection found.")
 
+        deadline = time.monotonic() + Connection.__CHECKOUT_TIMEOUT
+        while True:
+            try:
+                conn = self.pool.get_connection()
+                break
+            except PoolError:
+                # Every pooled connection is checked out; wait for a release
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.05)
 
+        try:
+            conn.ping(
+                reconnect=True,
+                attempts=Connection.__RECONNECT_ATTEMPTS,
+                delay=Connection.__RECONNECT_DELAY,
+            )
+        except Error:
+            conn.close()
+            raise
+        return conn
 
+    @contextmanager
+    def connection(self):
+        """
+        Context manager yielding a pooled connection.
 
+        Uncommitted work is rolled back if the block raises, and the
+        connection is always returned to the pool. A transaction the block
+        left open, e.g. by reading without committing, is ended before the
+        connection is handed to the next caller.
+        """
+        conn = self.get_connection()
+        try:
+            yield conn
+        except Exception:
+            if conn.is_connected():
+                conn.rollback()
+            raise
+        finally:
+            if conn.in_transaction:
+                try:
+                    conn.rollback()
+                except Error:
+                    # A dead connection is reconnected on its next checkout
+                    pass
+            conn.close()
+
+    @contextmanager
+    def cursor(self, commit=False, operation="unlabelled", **kwargs):
+        """
+        Context manager yielding a cursor on a pooled connection.
+
+        With ``commit=True`` the transaction is committed when the block
+        exits cleanly; any exception rolls it back. The block is timed and
+        recorded under ``operation`` by the connection's Instrumentation.
+        """
+        with self.connection() as conn:
+            cur = conn.cursor(**kwargs)
+            start = time.perf_counter()
+            try:
+                yield cur
+                if commit:
+                    conn.commit()
+            except Exception:
+                self.instrumentation.record(
+                    operation, (time.perf_counter() - start) * 1000, failed=True
+                )
+                raise
+            else:
+                self.instrumentation.observe(
+                    conn,
+                    operation,
+                    cur.statement,
+                    None,
+                    time.perf_counter() - start,
+                    cur.rowcount,
+                )
+            finally:
+                cur.close()
+
+    def close_connection(self):
+        """
+        Stop handing out connections. The pool is released rather than
+        drained through connector internals: its idle connections are
+        closed when it is garbage-collected, and checked-out ones go back
+        to it on release.
+        """
+        if self.pool is not None:
+            self.pool = None
+            print("Database connection closed")
@@ -0,0 +1,48 @@
+from queries import MAX_ID, QueryRegistry
+
+
+class Fines:
+    """
+    Per-user fines: paged detail, outstanding balance and payment.
+
+    Balances are not cached: fines are opened by a server-side event and
+    paid or stopped from any process (GUI, API workers), so no single
+    process could tell when a cached balance went stale. The balance query
+    is an indexed lookup of the user's fines.
+    """
+
+    PAGE_SIZE = 20
+
+    def __init__(self, db_connection, queries=None):
+        self.db = db_connection
+        self.queries = queries or QueryRegistry(db_connection)
+
+    def outstanding(self, user_id):
+        """
+        Return ``(total, count)`` of the user's unpaid fines.
+        """
+        return self.queries.fetchone("fine_balance", (user_id,))
+
+    def fetch_page(self, user_id, after=None, limit=None):
+        """
+        Return one page of the user's fines, newest first, as
+        ``(rows, next_page)``.
+
+        Rows are ``(fine_id, title, loan_date, return_date, amount,
+        status)``; pass ``next_page`` back as ``after`` for the next page.
+        """
+        limit = limit or Fines.PAGE_SIZE
+        rows = self.queries.fetchall(
+            "fines_page",
+            (user_id, MAX_ID if after is None else after, limit + 1),
+        )
+
+        next_page = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_page = rows[-1][0]
+        return rows, next_page
+
+    def pay(self, user_id, fine_id):
+        """Settle one of the user's unpaid fines at its current amount."""
+        self.queries.run("pay_fine", (user_id, fine_id))
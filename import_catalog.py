@@ -0,0 +1,244 @@
+"""
+Bulk import books from a CSV or JSONL publisher feed.
+
+Each record needs a title, author ("First Last", or author_first_name and
+author_last_name), genre and publisher, and may carry a copies count.
+Rows are streamed and written in chunks, one transaction per chunk:
+authors, genres and publishers are resolved in batches through the
+reference cache, new books go in with a single executemany, and titles
+already in the catalog get their copies added instead of a duplicate.
+
+    python import_catalog.py feed.csv --chunk-size 1000 --rejects bad.jsonl
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+
+from database import Connection
+from reference import ReferenceCache
+
+
+# Width of the VARCHAR columns in librarySetup.sql
+MAX_LENGTH = 50
+
+
+class ImportStats:
+    """
+    Counters reported at the end of an import.
+    """
+
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.merged_existing = 0
+        self.merged_in_feed = 0
+        self.rejected = 0
+        self.started = time.perf_counter()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        rate = self.read / elapsed if elapsed else 0
+        return (
+            f"read {self.read} rows in {elapsed:.1f}s ({rate:.0f} rows/s)\n"
+            f"  inserted:              {self.inserted}\n"
+            f"  added to existing:     {self.merged_existing}\n"
+            f"  duplicates in feed:    {self.merged_in_feed}\n"
+            f"  rejected:              {self.rejected}"
+        )
+
+
+def read_records(path, file_format=None):
+    """
+    Yield (line_number, record) from a CSV or JSONL file. CSV records are
+    dicts; JSONL records are the raw line, parsed by ``normalise`` so a
+    malformed line is rejected like any other bad row.
+    """
+    file_format = file_format or ("jsonl" if path.endswith(".jsonl") else "csv")
+    with open(path, newline="", encoding="utf-8") as feed:
+        if file_format == "jsonl":
+            for line_number, line in enumerate(feed, start=1):
+                if line.strip():
+                    yield line_number, line
+        else:
+            # Line 1 is the header
+            for line_number, record in enumerate(csv.DictReader(feed), start=2):
+                yield line_number, record
+
+
+def normalise(record):
+    """
+    Turn a raw record into (title, author names, genre, publisher, copies)
+    or raise ValueError describing why it was rejected.
+    """
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}") from None
+    if not isinstance(record, dict):
+        raise ValueError("record is not a JSON object")
+
+    def field(name):
+        return str(record.get(name) or "").strip()
+
+    # Title-cased like every other field, and like donated books
+    title = field("title").title()
+    genre = field("genre").title()
+    publisher = field("publisher").title()
+
+    if field("author_first_name") and field("author_last_name"):
+        author = (field("author_first_name").title(), field("author_last_name").title())
+    else:
+        author = ReferenceCache.split_author(field("author").title())
+
+    if not all([title, genre, publisher]):
+        raise ValueError("title, genre and publisher are required")
+    for value in (title, genre, publisher, *author):
+        if len(value) > MAX_LENGTH:
+            raise ValueError(f"{value!r} is longer than {MAX_LENGTH} characters")
+
+    copies = field("copies") or "1"
+    if not copies.isdigit() or int(copies) < 1:
+        raise ValueError(f"invalid copies count {copies!r}")
+
+    return title, author, genre, publisher, int(copies)
+
+
+def import_chunk(cursor, cache, rows, stats):
+    """
+    Write one chunk of normalised rows; returns the rejected rows as
+    (line_number, reason) pairs.
+    """
+    authors = cache.resolve_many(cursor, "author", [row[2] for row in rows])
+    genres = cache.resolve_many(cursor, "genre", [(row[3],) for row in rows])
+    publishers = cache.resolve_many(
+        cursor, "publisher", [(row[4],) for row in rows]
+    )
+
+    rejected = []
+    books = {}
+    for line_number, title, author, genre, publisher, copies in rows:
+        author_id = authors.get(ReferenceCache.key(author))
+        genre_id = genres.get(ReferenceCache.key((genre,)))
+        publisher_id = publishers.get(ReferenceCache.key((publisher,)))
+        if None in (author_id, genre_id, publisher_id):
+            rejected.append((line_number, "could not resolve reference data"))
+            continue
+
+        key = (title.casefold(), author_id)
+        if key in books:
+            books[key][4] += copies
+            stats.merged_in_feed += 1
+        else:
+            books[key] = [title, author_id, genre_id, publisher_id, copies]
+
+    if not books:
+        return rejected
+
+    # Titles already in the catalog gain copies instead of a new row
+    cursor.execute(
+        "SELECT book_id, title, author_id FROM books "
+        f"WHERE (title, author_id) IN ({', '.join(['(%s, %s)'] * len(books))})",
+        [value for title, author_id, *_ in books.values() for value in (title, author_id)],
+    )
+    existing = {
+        (title.casefold(), author_id): book_id
+        for book_id, title, author_id in cursor.fetchall()
+    }
+
+    restock = [
+        (book[4], existing[key]) for key, book in books.items() if key in existing
+    ]
+    new_books = [
+        tuple(book) for key, book in books.items() if key not in existing
+    ]
+
+    if restock:
+        cursor.executemany(
+            "UPDATE books SET available_copies = available_copies + %s "
+            "WHERE book_id = %s",
+            restock,
+        )
+    if new_books:
+        # Rewritten by the connector into a single multi-row INSERT
+        cursor.executemany(
+            "INSERT INTO books "
+            "(title, author_id, genre_id, publisher_id, available_copies) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            new_books,
+        )
+
+    stats.merged_existing += len(restock)
+    stats.inserted += len(new_books)
+    return rejected
+
+
+def run_import(db, path, chunk_size, file_format=None, rejects_path=None):
+    """Import ``path`` in chunks of ``chunk_size`` rows and return the stats."""
+    cache = ReferenceCache(db)
+    stats = ImportStats()
+    rejects = open(rejects_path, "w", encoding="utf-8") if rejects_path else None
+
+    def reject(line_number, reason):
+        stats.rejected += 1
+        if rejects:
+            rejects.write(json.dumps({"line": line_number, "reason": reason}) + "\n")
+
+    def flush(rows):
+        try:
+            with db.cursor(commit=True, operation="import_chunk") as cursor:
+                failed = import_chunk(cursor, cache, rows, stats)
+        except Exception:
+            # Reference rows upserted by the failed chunk were rolled back
+            cache.invalidate()
+            raise
+        for line_number, reason in failed:
+            reject(line_number, reason)
+
+    try:
+        chunk = []
+        for line_number, record in read_records(path, file_format):
+            stats.read += 1
+            try:
+                chunk.append((line_number, *normalise(record)))
+            except ValueError as e:
+                reject(line_number, str(e))
+                continue
+
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+                print(f"\r{stats.read} rows read", end="", file=sys.stderr)
+
+        if chunk:
+            flush(chunk)
+        print(file=sys.stderr)
+    finally:
+        if rejects:
+            rejects.close()
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="CSV or JSONL file to import")
+    parser.add_argument("--format", choices=("csv", "jsonl"))
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--rejects", help="write rejected rows to this JSONL file")
+    args = parser.parse_args()
+
+    db = Connection(pool_size=1)
+    if not db.available:
+        raise SystemExit("No valid database connection found.")
+
+    stats = run_import(db, args.path, args.chunk_size, args.format, args.rejects)
+    print(stats.report())
+    print(db.instrumentation.report())
+    db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
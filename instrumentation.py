@@ -0,0 +1,206 @@
+import json
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger("library.queries")
+
+
+class Histogram:
+    """
+    Latency histogram over fixed, roughly logarithmic millisecond buckets.
+    """
+
+    # Upper bounds in milliseconds; the last bucket is open-ended
+    BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self):
+        self.counts = [0] * (len(Histogram.BOUNDS) + 1)
+
+    def add(self, ms):
+        for index, bound in enumerate(Histogram.BOUNDS):
+            if ms <= bound:
+                self.counts[index] += 1
+                return
+        self.counts[-1] += 1
+
+    def percentile(self, p):
+        """
+        Upper bound of the bucket holding the ``p``th percentile, or None
+        when it falls in the open-ended bucket or there are no samples
+        (never the case for a recorded operation).
+        """
+        total = sum(self.counts)
+        if not total:
+            return None
+        rank = total * p / 100
+        seen = 0
+        for bound, count in zip(Histogram.BOUNDS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def buckets(self):
+        labels = [f"<={bound}ms" for bound in Histogram.BOUNDS]
+        labels.append(f">{Histogram.BOUNDS[-1]}ms")
+        return dict(zip(labels, self.counts))
+
+
+class Instrumentation:
+    """
+    Per-operation query statistics and a slow-query log.
+
+    Every database operation is recorded under a logical name (login,
+    issue_book, all_reviews, ...) with its latency, rows returned and
+    whether it failed. Operations slower than SLOW_MS are logged together
+    with the EXPLAIN plan of their statement, and ``export`` writes a JSON
+    snapshot of everything to STATS_FILE.
+
+    Slow queries go to the "library.queries" logger; applications send
+    it to SLOW_LOG with ``log_to_file``.
+    """
+
+    SLOW_MS = 200
+    SLOW_LOG = "slow_queries.log"
+    STATS_FILE = "query_stats.json"
+    EXPORT_MS = 60000
+
+    # Statements EXPLAIN understands; CALLs are logged without a plan
+    EXPLAINABLE = ("select", "with", "update", "delete")
+
+    def __init__(self, slow_ms=None, stats_file=None):
+        self.slow_ms = slow_ms or Instrumentation.SLOW_MS
+        self.stats_file = stats_file or Instrumentation.STATS_FILE
+        # operation -> {"calls", "errors", "rows", "total_ms", "max_ms",
+        #               "histogram"}
+        self.operations = {}
+        self.slow_queries = 0
+        self.started = time.time()
+        self.lock = threading.Lock()
+
+    def log_to_file(self, path=None):
+        """Append slow-query entries to ``path`` or SLOW_LOG."""
+        handler = logging.FileHandler(path or Instrumentation.SLOW_LOG)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+
+    def observe(self, conn, operation, statement, params, elapsed,
+                rows=0, failed=False):
+        """
+        Record one operation that ran ``statement`` on ``conn`` in
+        ``elapsed`` seconds, and log it if it was slow.
+        """
+        ms = elapsed * 1000
+        self.record(operation, ms, rows, failed)
+        if ms >= self.slow_ms:
+            self.log_slow(conn, operation, statement, params, ms)
+
+    def record(self, operation, ms, rows=0, failed=False):
+        with self.lock:
+            stats = self.operations.get(operation)
+            if stats is None:
+                stats = self.operations[operation] = {
+                    "calls": 0,
+                    "errors": 0,
+                    "rows": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "histogram": Histogram(),
+                }
+            stats["calls"] += 1
+            stats["errors"] += failed
+            stats["rows"] += max(rows, 0)
+            stats["total_ms"] += ms
+            stats["max_ms"] = max(stats["max_ms"], ms)
+            stats["histogram"].add(ms)
+
+    def log_slow(self, conn, operation, statement, params, ms):
+        with self.lock:
+            self.slow_queries += 1
+
+        if isinstance(statement, (bytes, bytearray)):
+            statement = statement.decode("utf-8", "replace")
+        statement = " ".join((statement or "").split())
+
+        plan = None
+        if statement.lower().startswith(Instrumentation.EXPLAINABLE):
+            cursor = None
+            try:
+                cursor = conn.cursor()
+                cursor.execute("EXPLAIN " + statement, params or ())
+                columns = [column[0] for column in cursor.description]
+                plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            except Exception as e:
+                plan = f"unavailable: {e}"
+            finally:
+                if cursor is not None:
+                    cursor.close()
+
+        logger.warning(
+            "slow query: %s took %.1f ms\n  %s\n  params: %r\n  plan: %s",
+            operation, ms, statement, params, json.dumps(plan, default=str),
+        )
+
+    def snapshot(self):
+        """
+        Return the statistics of every operation, slowest p95 first.
+        """
+        rows = []
+        with self.lock:
+            for name, stats in self.operations.items():
+                histogram = stats["histogram"]
+                rows.append({
+                    "operation": name,
+                    "calls": stats["calls"],
+                    "errors": stats["errors"],
+                    "error_rate": stats["errors"] / stats["calls"],
+                    "rows": stats["rows"],
+                    "mean_ms": stats["total_ms"] / stats["calls"],
+                    "max_ms": stats["max_ms"],
+                    "p50_ms": histogram.percentile(50),
+                    "p95_ms": histogram.percentile(95),
+                    "p99_ms": histogram.percentile(99),
+                    "histogram": histogram.buckets(),
+                })
+            slow_queries = self.slow_queries
+
+        # None is the open-ended bucket, i.e. slower than any bound
+        rows.sort(
+            key=lambda row: (row["p95_ms"] is None, row["p95_ms"] or 0),
+            reverse=True,
+        )
+        return {
+            "since": self.started,
+            "exported": time.time(),
+            "slow_ms": self.slow_ms,
+            "slow_queries": slow_queries,
+            "operations": rows,
+        }
+
+    def export(self, path=None):
+        """Write ``snapshot`` as JSON to ``path`` or STATS_FILE."""
+        path = path or self.stats_file
+        with open(path, "w", encoding="utf-8") as stats_file:
+            json.dump(self.snapshot(), stats_file, indent=2, default=str)
+        return path
+
+    def report(self):
+        """Format ``snapshot`` as a table."""
+        def bound(ms):
+            return f">{Histogram.BOUNDS[-1]}" if ms is None else str(ms)
+
+        lines = [
+            f"{'operation':<26}{'calls':>8}{'err %':>7}{'rows':>9}"
+            f"{'mean ms':>10}{'p50':>7}{'p95':>7}{'p99':>7}{'max ms':>10}"
+        ]
+        for row in self.snapshot()["operations"]:
+            lines.append(
+                f"{row['operation']:<26}{row['calls']:>8}"
+                f"{row['error_rate'] * 100:>7.1f}{row['rows']:>9}"
+                f"{row['mean_ms']:>10.2f}{bound(row['p50_ms']):>7}"
+                f"{bound(row['p95_ms']):>7}{bound(row['p99_ms']):>7}"
+                f"{row['max_ms']:>10.2f}"
+            )
+        return "\n".join(lines)
@@ -42,7 +42,9 @@ CREATE TABLE books (
     author_id INT,
     genre_id INT,
     publisher_id INT,
-    available_copies INT DEFAULT 1,
+    available_copies INT DEFAULT 1 CHECK (available_copies >= 0),
+    -- Title, author and genre words, maintained by triggers for Catalog.search
+    search_text VARCHAR(255),
     FOREIGN KEY (author_id) REFERENCES authors(author_id),
     FOREIGN KEY (genre_id) REFERENCES genres(genre_id),
     FOREIGN KEY (publisher_id) REFERENCES publishers(publisher_id)
@@ -79,25 +81,42 @@ CREATE TABLE memberships (
 );
 
 
+-- Not partitioned: the feed is read by user and id, never by date, so
+-- partitions could not be pruned; history_maintenance expires old rows
 CREATE TABLE notifications (
     notification_id INT AUTO_INCREMENT PRIMARY KEY,
     user_id INT,
     notification_type ENUM('info', 'warning') DEFAULT 'info',
     message TEXT,
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(user_id)
 );
 
 
+CREATE TABLE notification_reads (
+    user_id INT PRIMARY KEY,
+    last_read_id INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+
 CREATE TABLE fines (
     fine_id INT AUTO_INCREMENT PRIMARY KEY,
     loan_id INT,
-    amount DECIMAL(5,2),
+    accrues_from DATE,
+    -- Settled amount, set on payment; unpaid amounts live in fine_balances
+    amount DECIMAL(7,2),
     status ENUM('unpaid', 'paid') DEFAULT 'unpaid',
     FOREIGN KEY (loan_id) REFERENCES loans(loan_id)
 );
 
 
+CREATE TABLE job_state (
+    job_name VARCHAR(50) PRIMARY KEY,
+    last_run DATE
+);
+
+
 CREATE TABLE deleted_users (
     user_id INT PRIMARY KEY,
     first_name VARCHAR(50),
@@ -109,13 +128,30 @@ CREATE TABLE deleted_users (
 );
 
 
+-- Partitioned by month (see maintain_partitions), hence no foreign key
 CREATE TABLE logs (
-    log_id INT AUTO_INCREMENT PRIMARY KEY,
+    log_id INT AUTO_INCREMENT,
     user_id INT,
     action_type ENUM('loan', 'return', 'donate'),
     description TEXT,
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (user_id) REFERENCES users(user_id)
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (log_id, created_at),
+    KEY (user_id)
+)
+PARTITION BY RANGE COLUMNS (created_at) (
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+
+-- Closed loans moved out of loans by archive_loans
+CREATE TABLE loan_history (
+    loan_id INT PRIMARY KEY,
+    user_id INT NOT NULL,
+    book_id INT NOT NULL,
+    loan_date DATE NOT NULL,
+    return_date DATE NOT NULL,
+    -- Sum of the paid fines of the loan, if any
+    fine_amount DECIMAL(7,2)
 );
 
 
@@ -130,6 +166,95 @@ CREATE TABLE ratings (
     FOREIGN KEY (book_id) REFERENCES books(book_id) ON DELETE CASCADE
 );
 
+-- Recommendation aggregates, maintained incrementally by triggers
+CREATE TABLE book_stats (
+    book_id INT PRIMARY KEY,
+    rating_count INT NOT NULL DEFAULT 0,
+    rating_sum INT NOT NULL DEFAULT 0,
+    avg_rating DECIMAL(3,2) AS (rating_sum / NULLIF(rating_count, 0)) PERSISTENT,
+    loan_count INT NOT NULL DEFAULT 0,
+    last_loaned_date DATE,
+    FOREIGN KEY (book_id) REFERENCES books(book_id) ON DELETE CASCADE
+);
+
+
+CREATE TABLE user_genre_affinity (
+    user_id INT,
+    genre_id INT,
+    loan_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, genre_id),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (genre_id) REFERENCES genres(genre_id) ON DELETE CASCADE
+);
+
+
+CREATE TABLE book_co_loans (
+    book_id INT,
+    other_book_id INT,
+    co_loan_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (book_id, other_book_id),
+    FOREIGN KEY (book_id) REFERENCES books(book_id) ON DELETE CASCADE,
+    FOREIGN KEY (other_book_id) REFERENCES books(book_id) ON DELETE CASCADE
+);
+
+
+-- Most similar books of each book, rebuilt offline by build_neighbours.py.
+-- No foreign keys: the job swaps in a fresh copy with RENAME TABLE.
+CREATE TABLE book_neighbours (
+    book_id INT,
+    neighbour_id INT,
+    score FLOAT NOT NULL,
+    PRIMARY KEY (book_id, neighbour_id)
+);
+
+-- Indexes
+-- Login and register_user look users up by user_name or email
+CREATE UNIQUE INDEX uq_users_user_name ON users (user_name);
+CREATE UNIQUE INDEX uq_users_email ON users (email);
+
+-- Donations probe the reference tables by name
+CREATE UNIQUE INDEX uq_authors_name ON authors (first_name, last_name);
+CREATE UNIQUE INDEX uq_genres_name ON genres (genre_name);
+CREATE UNIQUE INDEX uq_publishers_name ON publishers (publisher_name);
+
+-- Title-ordered catalog pages (the primary key rides along in InnoDB)
+CREATE INDEX idx_books_title ON books (title);
+
+-- Open loans of a user (return_book, fines, recommendations)
+CREATE INDEX idx_loans_user_return ON loans (user_id, return_date);
+
+-- Loans crossing the overdue threshold (accrue_fines)
+CREATE INDEX idx_loans_date_return ON loans (loan_date, return_date);
+
+-- Latest loan of a book (book_stats maintenance)
+CREATE INDEX idx_loans_book_date ON loans (book_id, loan_date);
+
+-- Rating-based ranking straight from the summary table
+CREATE INDEX idx_book_stats_rating ON book_stats (avg_rating);
+
+-- Newest notifications of a user and incremental polling by id
+CREATE INDEX idx_notifications_user ON notifications (user_id, notification_id);
+
+-- Expiry of old notifications (history_maintenance)
+CREATE INDEX idx_notifications_created ON notifications (created_at);
+
+-- Ratings already given by a user (fetch_unrated_books)
+CREATE INDEX idx_ratings_user_book ON ratings (user_id, book_id);
+
+-- Books a user borrowed before their loans were archived
+CREATE INDEX idx_loan_history_user_book ON loan_history (user_id, book_id);
+
+-- Review browser sorted or filtered by rating
+CREATE INDEX idx_ratings_rating ON ratings (rating);
+
+-- Review browser sorted by reviewer: each user's ratings in rating_id order
+CREATE INDEX idx_ratings_user_rating ON ratings (user_id, rating_id);
+
+-- Ranked full-text catalog and review search (Catalog.search)
+CREATE FULLTEXT INDEX ft_books_title ON books (title);
+CREATE FULLTEXT INDEX ft_books_search ON books (search_text);
+CREATE FULLTEXT INDEX ft_ratings_review ON ratings (review);
+
 -- Events
 DELIMITER $$
 CREATE EVENT update_fines
@@ -137,27 +262,18 @@ ON SCHEDULE EVERY 1 DAY
 STARTS CURRENT_TIMESTAMP
 DO
 BEGIN
-    -- Update existing penalties
-    UPDATE fines f
-    JOIN loans l ON f.loan_id = l.loan_id
-    SET f.amount = DATEDIFF(CURDATE(), DATE_ADD(l.loan_date, INTERVAL 14 DAY)) * 5
-    WHERE 
-        l.return_date IS NULL
-        AND CURDATE() > DATE_ADD(l.loan_date, INTERVAL 14 DAY)
-        AND f.status = 'unpaid';
-
-    -- Adding new penalties if they don't already exist
-    INSERT INTO fines (loan_id, amount, status)
-    SELECT 
-        l.loan_id,
-        DATEDIFF(CURDATE(), DATE_ADD(l.loan_date, INTERVAL 14 DAY)) * 5 AS fine_amount,
-        'unpaid'
-    FROM loans l
-    LEFT JOIN fines f ON l.loan_id = f.loan_id AND f.status = 'unpaid'
-    WHERE 
-        l.return_date IS NULL
-        AND CURDATE() > DATE_ADD(l.loan_date, INTERVAL 14 DAY)
-        AND f.loan_id IS NULL;
+    CALL accrue_fines();
+END$$
+
+CREATE EVENT history_maintenance
+ON SCHEDULE EVERY 1 DAY
+STARTS CURRENT_TIMESTAMP
+DO
+BEGIN
+    CALL maintain_partitions('logs', 24);
+    DELETE FROM notifications
+    WHERE created_at < DATE_SUB(CURDATE(), INTERVAL 12 MONTH);
+    CALL archive_loans(12);
 END$$
 
 DELIMITER ;
@@ -202,11 +318,15 @@ CREATE PROCEDURE fetch_unrated_books (
     IN p_user_id INT
 )
 BEGIN
-    SELECT DISTINCT b.book_id, b.title
-    FROM loans l
-    JOIN books b ON l.book_id = b.book_id
-    LEFT JOIN ratings r ON l.book_id = r.book_id AND r.user_id = p_user_id
-    WHERE l.user_id = p_user_id AND r.rating IS NULL;
+    SELECT b.book_id, b.title
+    FROM (
+        SELECT book_id FROM loans WHERE user_id = p_user_id
+        UNION
+        SELECT book_id FROM loan_history WHERE user_id = p_user_id
+    ) borrowed
+    JOIN books b ON borrowed.book_id = b.book_id
+    LEFT JOIN ratings r ON borrowed.book_id = r.book_id AND r.user_id = p_user_id
+    WHERE r.rating IS NULL;
 END$$
 
 DELIMITER ;
@@ -216,32 +336,670 @@ DELIMITER $$
 
 CREATE PROCEDURE recommend_books(IN p_user_id INT)
 BEGIN
-    SELECT b.book_id, b.title, a.first_name, a.last_name, g.genre_name, AVG(r.rating) AS avg_rating
-    FROM books b
+    -- Well rated books from the user's five most borrowed genres
+    SELECT b.book_id, b.title, a.first_name, a.last_name, g.genre_name,
+           s.avg_rating
+    FROM (
+        SELECT genre_id
+        FROM user_genre_affinity
+        WHERE user_id = p_user_id
+        ORDER BY loan_count DESC
+        LIMIT 5
+    ) top_genres
+    JOIN books b ON b.genre_id = top_genres.genre_id
+    JOIN book_stats s ON b.book_id = s.book_id
     LEFT JOIN authors a ON b.author_id = a.author_id
     LEFT JOIN genres g ON b.genre_id = g.genre_id
-    LEFT JOIN ratings r ON b.book_id = r.book_id
-    LEFT JOIN loans l ON b.book_id = l.book_id AND l.user_id = p_user_id
-    JOIN (
-        SELECT b.genre_id
+    WHERE s.avg_rating >= 3.5
+        AND NOT EXISTS (
+            SELECT 1 FROM loans l
+            WHERE l.user_id = p_user_id AND l.book_id = b.book_id
+        )
+        AND NOT EXISTS (
+            SELECT 1 FROM loan_history h
+            WHERE h.user_id = p_user_id AND h.book_id = b.book_id
+        )
+    ORDER BY avg_rating DESC, b.title ASC
+    LIMIT 20;
+
+    -- Books most often borrowed together with the user's recent loans
+    -- (archived loans are old enough not to count as recent)
+    SELECT b.book_id, b.title, a.first_name, a.last_name, g.genre_name,
+           s.avg_rating
+    FROM (
+        SELECT c.other_book_id AS book_id, SUM(c.co_loan_count) AS score
+        FROM (
+            SELECT book_id
+            FROM loans
+            WHERE user_id = p_user_id
+            GROUP BY book_id
+            ORDER BY MAX(loan_id) DESC
+            LIMIT 20
+        ) recent
+        JOIN book_co_loans c ON c.book_id = recent.book_id
+        GROUP BY c.other_book_id
+    ) co_borrowed
+    JOIN books b ON b.book_id = co_borrowed.book_id
+    LEFT JOIN book_stats s ON b.book_id = s.book_id
+    LEFT JOIN authors a ON b.author_id = a.author_id
+    LEFT JOIN genres g ON b.genre_id = g.genre_id
+    WHERE NOT EXISTS (
+        SELECT 1 FROM loans l
+        WHERE l.user_id = p_user_id AND l.book_id = b.book_id
+    )
+        AND NOT EXISTS (
+            SELECT 1 FROM loan_history h
+            WHERE h.user_id = p_user_id AND h.book_id = b.book_id
+        )
+    ORDER BY co_borrowed.score DESC, b.title ASC
+    LIMIT 10;
+END$$
+
+DELIMITER ;
+
+
+DELIMITER $$
+
+CREATE PROCEDURE rebuild_book_stats()
+BEGIN
+    -- Recompute book_stats from ratings and loans. Used to backfill the
+    -- table and to repair drift, e.g. after ratings were removed by a
+    -- cascading delete (which fires no triggers).
+    DELETE FROM book_stats;
+    INSERT INTO book_stats
+        (book_id, rating_count, rating_sum, loan_count, last_loaned_date)
+    SELECT b.book_id,
+           COALESCE(r.rating_count, 0),
+           COALESCE(r.rating_sum, 0),
+           COALESCE(l.loan_count, 0),
+           l.last_loaned_date
+    FROM books b
+    LEFT JOIN (
+        SELECT book_id, COUNT(rating) AS rating_count, SUM(rating) AS rating_sum
+        FROM ratings
+        GROUP BY book_id
+    ) r ON b.book_id = r.book_id
+    LEFT JOIN (
+        SELECT book_id, COUNT(*) AS loan_count, MAX(loan_date) AS last_loaned_date
+        FROM all_loans
+        GROUP BY book_id
+    ) l ON b.book_id = l.book_id
+    WHERE r.book_id IS NOT NULL OR l.book_id IS NOT NULL;
+END$$
+
+DELIMITER ;
+
+
+DELIMITER $$
+
+CREATE PROCEDURE rebuild_co_loans()
+BEGIN
+    -- Same rule as track_loan_recommendations: number each user's books
+    -- in order of first loan, and pair every book with the 50 books
+    -- numbered just before and after it. At most 100 pairs per borrowed
+    -- book, so the cost grows linearly with the loans.
+    DECLARE v_user_id INT DEFAULT 0;
+    DECLARE v_last_user_id INT;
+
+    DROP TEMPORARY TABLE IF EXISTS first_loans;
+    CREATE TEMPORARY TABLE first_loans (
+        user_id INT NOT NULL,
+        seq INT NOT NULL,
+        book_id INT NOT NULL,
+        PRIMARY KEY (user_id, seq)
+    );
+    INSERT INTO first_loans (user_id, seq, book_id)
+    SELECT user_id,
+           ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY first_loan_id),
+           book_id
+    FROM (
+        SELECT user_id, book_id, MIN(loan_id) AS first_loan_id
+        FROM all_loans
+        GROUP BY user_id, book_id
+    ) f;
+    SELECT MAX(user_id) INTO v_last_user_id FROM first_loans;
+
+    DELETE FROM book_co_loans;
+    COMMIT;
+
+    -- A thousand users per statement keeps each sort and transaction small
+    WHILE v_user_id <= v_last_user_id DO
+        INSERT INTO book_co_loans (book_id, other_book_id, co_loan_count)
+        SELECT x.book_id, y.book_id, COUNT(*)
+        FROM first_loans x
+        JOIN first_loans y
+            ON y.user_id = x.user_id
+            AND y.seq BETWEEN x.seq - 50 AND x.seq + 50
+            AND y.seq <> x.seq
+        WHERE x.user_id BETWEEN v_user_id AND v_user_id + 999
+        GROUP BY x.book_id, y.book_id
+        ON DUPLICATE KEY UPDATE
+            co_loan_count = co_loan_count + VALUES(co_loan_count);
+        COMMIT;
+        SET v_user_id = v_user_id + 1000;
+    END WHILE;
+
+    DROP TEMPORARY TABLE first_loans;
+END$$
+
+DELIMITER ;
+
+
+DELIMITER $$
+
+CREATE PROCEDURE rebuild_recommendation_stats()
+BEGIN
+    -- Recompute every recommendation aggregate from the source tables
+    CALL rebuild_book_stats();
+
+    DELETE FROM user_genre_affinity;
+    INSERT INTO user_genre_affinity (user_id, genre_id, loan_count)
+    SELECT l.user_id, b.genre_id, COUNT(*)
+    FROM all_loans l
+    JOIN books b ON l.book_id = b.book_id
+    WHERE b.genre_id IS NOT NULL
+    GROUP BY l.user_id, b.genre_id;
+
+    CALL rebuild_co_loans();
+END$$
+
+DELIMITER ;
+
+
+DELIMITER $$
+
+CREATE PROCEDURE accrue_fines()
+BEGIN
+    -- Open a fine for every loan that became overdue since the last run.
+    -- Amounts are not stored while a fine is unpaid: fine_balances derives
+    -- them from accrues_from, so existing fines never need rewriting.
+    DECLARE v_last_run DATE;
+
+    SELECT last_run INTO v_last_run
+    FROM job_state
+    WHERE job_name = 'accrue_fines';
+
+    INSERT INTO fines (loan_id, accrues_from, status)
+    SELECT l.loan_id, DATE_ADD(l.loan_date, INTERVAL 14 DAY), 'unpaid'
+    FROM loans l
+    WHERE l.loan_date < DATE_SUB(CURDATE(), INTERVAL 14 DAY)
+        -- Loans already overdue at the previous run were handled then
+        AND (v_last_run IS NULL
+             OR l.loan_date >= DATE_SUB(v_last_run, INTERVAL 14 DAY))
+        AND l.return_date IS NULL
+        AND NOT EXISTS (
+            SELECT 1 FROM fines f WHERE f.loan_id = l.loan_id
+        );
+
+    INSERT INTO job_state (job_name, last_run)
+    VALUES ('accrue_fines', CURDATE())
+    ON DUPLICATE KEY UPDATE last_run = CURDATE();
+END$$
+
+DELIMITER ;
+
+
+DELIMITER $$
+
+CREATE PROCEDURE maintain_partitions(
+    IN p_table VARCHAR(64),
+    IN p_keep_months INT
+)
+BEGIN
+    -- Partition pYYYYMM holds the rows created before the month after
+    -- YYYYMM (the oldest one also holds everything before); p_future
+    -- catches rows beyond the last monthly partition.
+    DECLARE v_month DATE DEFAULT DATE_FORMAT(CURDATE(), '%Y-%m-01');
+    DECLARE v_oldest_kept VARCHAR(64) DEFAULT CONCAT(
+        'p', DATE_FORMAT(DATE_SUB(CURDATE(), INTERVAL p_keep_months MONTH), '%Y%m')
+    );
+    DECLARE v_name VARCHAR(64);
+
+    IF p_table <> 'logs' THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Table is not partitioned by month.';
+    END IF;
+
+    -- Split this month and the next two off p_future ahead of time
+    WHILE v_month <= DATE_ADD(CURDATE(), INTERVAL 2 MONTH) DO
+        SET v_name = CONCAT('p', DATE_FORMAT(v_month, '%Y%m'));
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = p_table
+                AND PARTITION_NAME >= v_name
+                AND PARTITION_NAME <> 'p_future'
+        ) THEN
+            EXECUTE IMMEDIATE CONCAT(
+                'ALTER TABLE ', p_table,
+                ' REORGANIZE PARTITION p_future INTO (PARTITION ', v_name,
+                ' VALUES LESS THAN (''', DATE_ADD(v_month, INTERVAL 1 MONTH),
+                '''), PARTITION p_future VALUES LESS THAN (MAXVALUE))'
+            );
+        END IF;
+        SET v_month = DATE_ADD(v_month, INTERVAL 1 MONTH);
+    END WHILE;
+
+    -- Expire whole months past the retention period
+    drop_expired: LOOP
+        SELECT MIN(PARTITION_NAME) INTO v_name
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE()
+            AND TABLE_NAME = p_table
+            AND PARTITION_NAME < v_oldest_kept
+            AND PARTITION_NAME <> 'p_future';
+
+        IF v_name IS NULL THEN
+            LEAVE drop_expired;
+        END IF;
+        EXECUTE IMMEDIATE CONCAT(
+            'ALTER TABLE ', p_table, ' DROP PARTITION ', v_name
+        );
+    END LOOP;
+END$$
+
+DELIMITER ;
+
+
+DELIMITER $$
+
+CREATE PROCEDURE archive_loans(IN p_months INT)
+BEGIN
+    -- Move loans returned more than p_months ago, and their paid fines,
+    -- into loan_history in batches. Loans with unpaid fines stay put.
+    DECLARE v_cutoff DATE DEFAULT DATE_SUB(CURDATE(), INTERVAL p_months MONTH);
+    DECLARE v_moved INT DEFAULT 1;
+
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        SET @archiving = NULL;
+        DROP TEMPORARY TABLE IF EXISTS archive_batch;
+        RESIGNAL;
+    END;
+
+    -- Archived loans still count towards book_stats and the other
+    -- aggregates, so remove_loan_stats must not undo them
+    SET @archiving = 1;
+    CREATE TEMPORARY TABLE archive_batch (loan_id INT PRIMARY KEY);
+
+    WHILE v_moved > 0 DO
+        START TRANSACTION;
+
+        -- A loan is returned after it was made, so the loan_date range
+        -- (idx_loans_date_return) bounds the scan
+        INSERT INTO archive_batch (loan_id)
+        SELECT l.loan_id
         FROM loans l
-        JOIN books b ON l.book_id = b.book_id
-        WHERE l.user_id = p_user_id
-        GROUP BY b.genre_id
-        ORDER BY COUNT(*) / (SELECT COUNT(*) FROM loans WHERE user_id = p_user_id) DESC
-        LIMIT 5
-    ) top_genres ON b.genre_id = top_genres.genre_id
-    WHERE l.book_id IS NULL
-    GROUP BY b.book_id, b.title, a.first_name, a.last_name, g.genre_name
-    HAVING AVG(r.rating) >= 3.5
-    ORDER BY avg_rating DESC, b.title ASC;
+        WHERE l.loan_date < v_cutoff
+            AND l.return_date < v_cutoff
+            AND NOT EXISTS (
+                SELECT 1 FROM fines f
+                WHERE f.loan_id = l.loan_id AND f.status = 'unpaid'
+            )
+        LIMIT 5000;
+
+        INSERT INTO loan_history
+            (loan_id, user_id, book_id, loan_date, return_date, fine_amount)
+        SELECT l.loan_id, l.user_id, l.book_id, l.loan_date, l.return_date,
+               (SELECT SUM(f.amount) FROM fines f WHERE f.loan_id = l.loan_id)
+        FROM archive_batch a
+        JOIN loans l ON l.loan_id = a.loan_id;
+
+        DELETE f FROM fines f JOIN archive_batch a ON f.loan_id = a.loan_id;
+        DELETE l FROM loans l JOIN archive_batch a ON l.loan_id = a.loan_id;
+        SET v_moved = ROW_COUNT();
+
+        DELETE FROM archive_batch;
+        COMMIT;
+    END WHILE;
+
+    DROP TEMPORARY TABLE archive_batch;
+    SET @archiving = NULL;
+END$$
+
+DELIMITER ;
+
+
+DELIMITER $$
+
+CREATE PROCEDURE issue_book(
+    IN p_user_id INT,
+    IN p_book_id INT
+)
+BEGIN
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+
+    -- Claim a copy only if one is still available; the row lock taken by
+    -- the UPDATE serialises concurrent checkouts of the same book
+    UPDATE books
+    SET available_copies = available_copies - 1
+    WHERE book_id = p_book_id AND available_copies > 0;
+
+    IF ROW_COUNT() = 0 THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'No copies of this book are available.';
+    END IF;
+
+    INSERT INTO loans (user_id, book_id, loan_date)
+    VALUES (p_user_id, p_book_id, CURDATE());
+
+    COMMIT;
+END$$
+
+DELIMITER ;
+
+
+DELIMITER $$
+
+CREATE PROCEDURE return_book(
+    IN p_user_id INT,
+    IN p_loan_id INT
+)
+BEGIN
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+
+    -- Close the loan and give the copy back in a single statement
+    UPDATE loans l
+    JOIN books b ON l.book_id = b.book_id
+    SET l.return_date = CURDATE(),
+        b.available_copies = b.available_copies + 1
+    WHERE l.loan_id = p_loan_id
+        AND l.user_id = p_user_id
+        AND l.return_date IS NULL;
+
+    IF ROW_COUNT() = 0 THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'This loan is not open.';
+    END IF;
+
+    COMMIT;
+END$$
+
+DELIMITER ;
+
+
+DELIMITER $$
+
+CREATE PROCEDURE issue_books(
+    IN p_user_id INT,
+    IN p_book_ids TEXT
+)
+BEGIN
+    -- Lend one copy per entry of the JSON array p_book_ids (an id repeated
+    -- n times asks for n copies) in a single transaction. Entries without
+    -- a copy left are skipped; the loans opened are returned in request
+    -- order as (loan_id, book_id, title, loan_date).
+    DECLARE v_locked INT;
+    DECLARE v_first_loan INT;
+    DECLARE v_issued INT;
+
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        DROP TEMPORARY TABLE IF EXISTS issue_claims;
+        RESIGNAL;
+    END;
+
+    DROP TEMPORARY TABLE IF EXISTS issue_claims;
+    START TRANSACTION;
+
+    -- Lock every requested book with one read so the claims below see
+    -- the final counts
+    SELECT COUNT(*) INTO v_locked
+    FROM books
+    WHERE book_id IN (
+        SELECT book_id
+        FROM JSON_TABLE(p_book_ids, '$[*]' COLUMNS (book_id INT PATH '$')) req
+    )
+    FOR UPDATE;
+
+    -- The nth request for a book is granted if it has at least n copies
+    CREATE TEMPORARY TABLE issue_claims ENGINE = MEMORY AS
+    SELECT req.item, req.book_id
+    FROM (
+        SELECT item, book_id,
+               ROW_NUMBER() OVER (PARTITION BY book_id ORDER BY item) AS copy
+        FROM JSON_TABLE(
+            p_book_ids, '$[*]'
+            COLUMNS (item FOR ORDINALITY, book_id INT PATH '$')
+        ) j
+    ) req
+    JOIN books b ON b.book_id = req.book_id
+    WHERE req.copy <= b.available_copies;
+
+    UPDATE books b
+    JOIN (
+        SELECT book_id, COUNT(*) AS copies
+        FROM issue_claims
+        GROUP BY book_id
+    ) c ON b.book_id = c.book_id
+    SET b.available_copies = b.available_copies - c.copies;
+
+    INSERT INTO loans (user_id, book_id, loan_date)
+    SELECT p_user_id, book_id, CURDATE()
+    FROM issue_claims
+    ORDER BY item;
+    SET v_issued = ROW_COUNT();
+    SET v_first_loan = LAST_INSERT_ID();
+
+    COMMIT;
+    DROP TEMPORARY TABLE issue_claims;
+
+    SELECT l.loan_id, l.book_id, b.title, l.loan_date
+    FROM loans l
+    JOIN books b ON l.book_id = b.book_id
+    WHERE l.loan_id >= v_first_loan AND l.user_id = p_user_id
+    ORDER BY l.loan_id
+    LIMIT v_issued;
+END$$
+
+DELIMITER ;
+
+
+DELIMITER $$
+
+CREATE PROCEDURE return_books(
+    IN p_user_id INT,
+    IN p_loan_ids TEXT
+)
+BEGIN
+    -- Close every open loan of the user listed in the JSON array
+    -- p_loan_ids and restock the copies in a single transaction. Returns
+    -- the loan_id of each loan that was closed.
+    DECLARE v_locked INT;
+
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        DROP TEMPORARY TABLE IF EXISTS return_claims;
+        RESIGNAL;
+    END;
+
+    DROP TEMPORARY TABLE IF EXISTS return_claims;
+    START TRANSACTION;
+
+    SELECT COUNT(*) INTO v_locked
+    FROM loans
+    WHERE loan_id IN (
+        SELECT loan_id
+        FROM JSON_TABLE(p_loan_ids, '$[*]' COLUMNS (loan_id INT PATH '$')) req
+    )
+        AND user_id = p_user_id
+    FOR UPDATE;
+
+    CREATE TEMPORARY TABLE return_claims ENGINE = MEMORY AS
+    SELECT l.loan_id, l.book_id
+    FROM loans l
+    WHERE l.loan_id IN (
+        SELECT loan_id
+        FROM JSON_TABLE(p_loan_ids, '$[*]' COLUMNS (loan_id INT PATH '$')) req
+    )
+        AND l.user_id = p_user_id
+        AND l.return_date IS NULL;
+
+    UPDATE loans l
+    JOIN return_claims c ON l.loan_id = c.loan_id
+    SET l.return_date = CURDATE();
+
+    -- Several loans may return copies of the same book
+    UPDATE books b
+    JOIN (
+        SELECT book_id, COUNT(*) AS copies
+        FROM return_claims
+        GROUP BY book_id
+    ) c ON b.book_id = c.book_id
+    SET b.available_copies = b.available_copies + c.copies;
+
+    COMMIT;
+
+    SELECT loan_id FROM return_claims ORDER BY loan_id;
+    DROP TEMPORARY TABLE return_claims;
+END$$
+
+DELIMITER ;
+
+
+DELIMITER $$
+
+CREATE PROCEDURE pay_fine(
+    IN p_user_id INT,
+    IN p_fine_id INT
+)
+BEGIN
+    DECLARE v_loan_id INT;
+    DECLARE v_open BOOLEAN;
+
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
 
+    -- Only fines with something accrued are payable; one opened today by
+    -- an earlier payment owes nothing yet
+    SELECT f.loan_id, l.return_date IS NULL
+    INTO v_loan_id, v_open
+    FROM fines f
+    JOIN loans l ON f.loan_id = l.loan_id
+    WHERE f.fine_id = p_fine_id
+        AND l.user_id = p_user_id
+        AND f.status = 'unpaid'
+        AND f.accrues_from < COALESCE(l.return_date, CURDATE())
+    FOR UPDATE;
+
+    IF v_loan_id IS NULL THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'This fine is not payable.';
+    END IF;
+
+    -- Freeze the amount accrued so far (every day before today) and mark
+    -- the fine as settled
+    UPDATE fines f
+    JOIN loans l ON f.loan_id = l.loan_id
+    SET f.amount = DATEDIFF(COALESCE(l.return_date, CURDATE()), f.accrues_from) * 5,
+        f.status = 'paid'
+    WHERE f.fine_id = p_fine_id;
+
+    -- The book is still out: keep charging from today on. accrue_fines
+    -- never revisits a loan that already has a fine.
+    IF v_open THEN
+        INSERT INTO fines (loan_id, accrues_from, status)
+        VALUES (v_loan_id, CURDATE(), 'unpaid');
+    END IF;
+
+    COMMIT;
+END$$
+
+DELIMITER ;
+
+
+DELIMITER $$
+
+CREATE PROCEDURE load_user_context(IN p_user_id INT)
+BEGIN
+    -- Everything the dashboard needs at login, one result set each
+
+    -- Profile with the current membership, if any
+    SELECT u.first_name, u.last_name, u.email, u.role,
+           m.membership_type, m.end_date
+    FROM users u
+    LEFT JOIN memberships m ON m.membership_id = (
+        SELECT membership_id
+        FROM memberships
+        WHERE user_id = u.user_id
+            AND (end_date IS NULL OR end_date >= CURDATE())
+        ORDER BY end_date DESC
+        LIMIT 1
+    )
+    WHERE u.user_id = p_user_id;
+
+    -- Open loans
+    SELECT l.loan_id, l.book_id, b.title, l.loan_date
+    FROM loans l
+    JOIN books b ON l.book_id = b.book_id
+    WHERE l.user_id = p_user_id AND l.return_date IS NULL
+    ORDER BY l.loan_date, l.loan_id;
+
+    -- Outstanding fines
+    SELECT COALESCE(SUM(amount), 0), COUNT(*)
+    FROM fine_balances
+    WHERE user_id = p_user_id AND status = 'unpaid';
+
+    -- Unread notifications
+    SELECT COUNT(*)
+    FROM notifications n
+    LEFT JOIN notification_reads r ON r.user_id = n.user_id
+    WHERE n.user_id = p_user_id
+        AND n.notification_id > COALESCE(r.last_read_id, 0);
+
+    -- Reviews written
+    SELECT COUNT(*)
+    FROM ratings
+    WHERE user_id = p_user_id;
 END$$
 
 DELIMITER ;
 
 
 -- Views
+-- Every loan ever made, for rebuilds and reporting
+CREATE VIEW all_loans AS
+SELECT loan_id, user_id, book_id, loan_date, return_date FROM loans
+UNION ALL
+SELECT loan_id, user_id, book_id, loan_date, return_date FROM loan_history;
+
+CREATE VIEW fine_balances AS
+SELECT
+    f.fine_id,
+    f.loan_id,
+    l.user_id,
+    l.book_id,
+    l.loan_date,
+    l.return_date,
+    f.status,
+    CASE
+        WHEN f.status = 'paid' THEN f.amount
+        -- 5 per day from the first overdue day until today or the return
+        ELSE DATEDIFF(COALESCE(l.return_date, CURDATE()), f.accrues_from) * 5
+    END AS amount
+FROM fines f
+JOIN loans l ON f.loan_id = l.loan_id;
+
 CREATE VIEW all_reviews AS
 SELECT 
     u.user_name AS reviewer,
@@ -262,7 +1020,7 @@ FROM
 JOIN 
     memberships m ON u.user_id = m.user_id
 JOIN 
-    loans l ON u.user_id = l.user_id
+    all_loans l ON u.user_id = l.user_id
 WHERE 
     m.membership_type = 'standard'
 GROUP BY 
@@ -278,7 +1036,7 @@ FROM
 JOIN 
     memberships m ON u.user_id = m.user_id
 JOIN 
-    loans l ON u.user_id = l.user_id
+    all_loans l ON u.user_id = l.user_id
 WHERE 
     m.membership_type = 'premium'
 GROUP BY 
@@ -287,26 +1045,92 @@ GROUP BY
 -- Triggers
 
 DELIMITER $$
-CREATE TRIGGER after_user_delete
-AFTER DELETE ON users
+
+-- Words a catalog search matches: title, author name and genre name
+CREATE FUNCTION book_search_text(
+    p_title VARCHAR(50),
+    p_author_id INT,
+    p_genre_id INT
+)
+RETURNS VARCHAR(255)
+READS SQL DATA
+BEGIN
+    RETURN CONCAT_WS(
+        ' ',
+        p_title,
+        (SELECT CONCAT_WS(' ', first_name, last_name)
+         FROM authors WHERE author_id = p_author_id),
+        (SELECT genre_name FROM genres WHERE genre_id = p_genre_id)
+    );
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER add_book_search_text
+BEFORE INSERT ON books
 FOR EACH ROW
 BEGIN
-    INSERT INTO deleted_users (user_id, first_name, last_name, user_name, password, email, phone_number)
-    VALUES (OLD.user_id, OLD.first_name, OLD.last_name, OLD.user_name, OLD.password, OLD.email, OLD.phone_number);
+    SET NEW.search_text = book_search_text(NEW.title, NEW.author_id, NEW.genre_id);
 END$$
+
 DELIMITER ;
 
 DELIMITER $$
-CREATE TRIGGER log_loan_operations
-AFTER INSERT ON loans
+
+CREATE TRIGGER update_book_search_text
+BEFORE UPDATE ON books
 FOR EACH ROW
 BEGIN
-    INSERT INTO logs (user_id, action_type, description)
-    VALUES (NEW.user_id, 'loan', CONCAT('User borrowed the book with ID: ', NEW.book_id));
+    -- Loans update available_copies; only recompute when the words change,
+    -- or when an author or genre rename cleared the column
+    IF NEW.search_text IS NULL
+       OR NOT (NEW.title <=> OLD.title)
+       OR NOT (NEW.author_id <=> OLD.author_id)
+       OR NOT (NEW.genre_id <=> OLD.genre_id) THEN
+        SET NEW.search_text = book_search_text(NEW.title, NEW.author_id, NEW.genre_id);
+    END IF;
 END$$
 
+DELIMITER ;
+
 DELIMITER $$
 
+CREATE TRIGGER rename_author_search_text
+AFTER UPDATE ON authors
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.first_name <=> OLD.first_name AND NEW.last_name <=> OLD.last_name) THEN
+        UPDATE books SET search_text = NULL WHERE author_id = NEW.author_id;
+    END IF;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER rename_genre_search_text
+AFTER UPDATE ON genres
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.genre_name <=> OLD.genre_name) THEN
+        UPDATE books SET search_text = NULL WHERE genre_id = NEW.genre_id;
+    END IF;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER after_user_delete
+AFTER DELETE ON users
+FOR EACH ROW
+BEGIN
+    INSERT INTO deleted_users (user_id, first_name, last_name, user_name, password, email, phone_number)
+    VALUES (OLD.user_id, OLD.first_name, OLD.last_name, OLD.user_name, OLD.password, OLD.email, OLD.phone_number);
+END$$
+DELIMITER ;
+
 DELIMITER $$
 
 CREATE TRIGGER notify_membership
@@ -352,16 +1176,203 @@ END$$
 
 DELIMITER ;
 
+DELIMITER $$
+
+CREATE TRIGGER track_loan_recommendations
+AFTER INSERT ON loans
+FOR EACH ROW
+BEGIN
+    DECLARE v_genre_id INT;
+
+    -- Bulk loads set @bulk_load and rebuild the aggregates afterwards
+    IF @bulk_load IS NULL THEN
+        SELECT genre_id INTO v_genre_id FROM books WHERE book_id = NEW.book_id;
+
+        IF v_genre_id IS NOT NULL THEN
+            INSERT INTO user_genre_affinity (user_id, genre_id, loan_count)
+            VALUES (NEW.user_id, v_genre_id, 1)
+            ON DUPLICATE KEY UPDATE loan_count = loan_count + 1;
+        END IF;
+
+        -- The first loan of a book by a user pairs it with the 50 books
+        -- that user first borrowed just before it (rebuild_co_loans
+        -- applies the same rule)
+        IF NOT EXISTS (
+            SELECT 1 FROM loans
+            WHERE user_id = NEW.user_id
+                AND book_id = NEW.book_id
+                AND loan_id <> NEW.loan_id
+        ) AND NOT EXISTS (
+            SELECT 1 FROM loan_history
+            WHERE user_id = NEW.user_id AND book_id = NEW.book_id
+        ) THEN
+            INSERT INTO book_co_loans (book_id, other_book_id, co_loan_count)
+            SELECT NEW.book_id, prior.book_id, 1
+            FROM (
+                SELECT book_id
+                FROM (
+                    SELECT book_id, loan_id FROM loans
+                    WHERE user_id = NEW.user_id
+                    UNION ALL
+                    SELECT book_id, loan_id FROM loan_history
+                    WHERE user_id = NEW.user_id
+                ) seen
+                WHERE book_id <> NEW.book_id
+                GROUP BY book_id
+                ORDER BY MIN(loan_id) DESC
+                LIMIT 50
+            ) prior
+            ON DUPLICATE KEY UPDATE co_loan_count = co_loan_count + 1;
+
+            INSERT INTO book_co_loans (book_id, other_book_id, co_loan_count)
+            SELECT prior.book_id, NEW.book_id, 1
+            FROM (
+                SELECT book_id
+                FROM (
+                    SELECT book_id, loan_id FROM loans
+                    WHERE user_id = NEW.user_id
+                    UNION ALL
+                    SELECT book_id, loan_id FROM loan_history
+                    WHERE user_id = NEW.user_id
+                ) seen
+                WHERE book_id <> NEW.book_id
+                GROUP BY book_id
+                ORDER BY MIN(loan_id) DESC
+                LIMIT 50
+            ) prior
+            ON DUPLICATE KEY UPDATE co_loan_count = co_loan_count + 1;
+        END IF;
+    END IF;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER add_rating_stats
+AFTER INSERT ON ratings
+FOR EACH ROW
+BEGIN
+    -- Bulk loads set @bulk_load and rebuild the aggregates afterwards;
+    -- reviews without a rating count for nothing, as in rebuild_book_stats
+    IF @bulk_load IS NULL AND NEW.rating IS NOT NULL THEN
+        INSERT INTO book_stats (book_id, rating_count, rating_sum)
+        VALUES (NEW.book_id, 1, NEW.rating)
+        ON DUPLICATE KEY UPDATE
+            rating_count = rating_count + 1,
+            rating_sum = rating_sum + NEW.rating;
+    END IF;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
 
+CREATE TRIGGER update_rating_stats
+AFTER UPDATE ON ratings
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.book_id <=> NEW.book_id) OR NOT (OLD.rating <=> NEW.rating) THEN
+        IF OLD.rating IS NOT NULL THEN
+            UPDATE book_stats
+            SET rating_count = rating_count - 1,
+                rating_sum = rating_sum - OLD.rating
+            WHERE book_id = OLD.book_id;
+        END IF;
+
+        IF NEW.rating IS NOT NULL THEN
+            INSERT INTO book_stats (book_id, rating_count, rating_sum)
+            VALUES (NEW.book_id, 1, NEW.rating)
+            ON DUPLICATE KEY UPDATE
+                rating_count = rating_count + 1,
+                rating_sum = rating_sum + NEW.rating;
+        END IF;
+    END IF;
+END$$
 
+DELIMITER ;
 
+DELIMITER $$
 
+CREATE TRIGGER remove_rating_stats
+AFTER DELETE ON ratings
+FOR EACH ROW
+BEGIN
+    IF OLD.rating IS NOT NULL THEN
+        UPDATE book_stats
+        SET rating_count = rating_count - 1,
+            rating_sum = rating_sum - OLD.rating
+        WHERE book_id = OLD.book_id;
+    END IF;
+END$$
 
+DELIMITER ;
 
+DELIMITER $$
 
+CREATE TRIGGER add_loan_stats
+AFTER INSERT ON loans
+FOR EACH ROW
+BEGIN
+    -- Bulk loads set @bulk_load and rebuild the aggregates afterwards
+    IF @bulk_load IS NULL THEN
+        INSERT INTO book_stats (book_id, loan_count, last_loaned_date)
+        VALUES (NEW.book_id, 1, NEW.loan_date)
+        ON DUPLICATE KEY UPDATE
+            loan_count = loan_count + 1,
+            last_loaned_date = GREATEST(
+                COALESCE(last_loaned_date, NEW.loan_date), NEW.loan_date
+            );
+    END IF;
+END$$
 
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER update_loan_stats
+AFTER UPDATE ON loans
+FOR EACH ROW
+BEGIN
+    -- Returning a book only sets return_date and leaves the stats alone
+    IF NOT (OLD.book_id <=> NEW.book_id) OR NOT (OLD.loan_date <=> NEW.loan_date) THEN
+        UPDATE book_stats
+        SET loan_count = loan_count - 1,
+            last_loaned_date = (
+                SELECT MAX(loan_date) FROM loans WHERE book_id = OLD.book_id
+            )
+        WHERE book_id = OLD.book_id;
+
+        INSERT INTO book_stats (book_id, loan_count, last_loaned_date)
+        VALUES (NEW.book_id, 1, NEW.loan_date)
+        ON DUPLICATE KEY UPDATE
+            loan_count = loan_count + 1,
+            last_loaned_date = (
+                SELECT MAX(loan_date) FROM loans WHERE book_id = NEW.book_id
+            );
+    END IF;
+END$$
 
+DELIMITER ;
 
+DELIMITER $$
 
+CREATE TRIGGER remove_loan_stats
+AFTER DELETE ON loans
+FOR EACH ROW
+BEGIN
+    -- Archiving moves loans to loan_history; they still count
+    IF @archiving IS NULL THEN
+        UPDATE book_stats
+        SET loan_count = loan_count - 1,
+            last_loaned_date = (
+                SELECT MAX(loan_date) FROM loans WHERE book_id = OLD.book_id
+            )
+        WHERE book_id = OLD.book_id;
+    END IF;
+END$$
 
+DELIMITER ;
 
+-- Monthly partitions for the current and the next two months
+CALL maintain_partitions('logs', 24);
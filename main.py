@@ -1,7 +1,10 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-from mysql.connector import Error
 from database import Connection
+from notifications import Notifications
+from reviews import Reviews
+from service import LibraryService
+from tasks import TaskRunner
 
 
 BG_COLOR = "#1E1E2F"
@@ -10,7 +13,21 @@ BUTTON_COLOR = "#3F3C6E"
 BUTTON_HOVER_COLOR = "#5A5A8F"
 
 db_connection = Connection()
-cursor = db_connection.conn.cursor() if db_connection.conn else None
+library = LibraryService(db_connection)
+task_runner = TaskRunner()
+
+
+def report_error(title):
+    """
+    Return an on_error callback: rejected input is shown as a warning,
+    anything else as an error under ``title``.
+    """
+    def on_error(e):
+        if isinstance(e, ValueError):
+            messagebox.showwarning("Input Error", str(e))
+        else:
+            messagebox.showerror(title, f"An error occurred: {e}")
+    return on_error
 
 
 class App:
@@ -46,7 +63,7 @@ class App:
         """Show the login frame."""
         self.clear_window()
         self.current_frame = LoginWindow(
-            self.window, self.show_dashboard, self.show_main_menu
+            self.window, self.on_login_success, self.show_main_menu
         )
 
     def show_register(self):
@@ -54,18 +71,49 @@ class App:
         self.clear_window()
         self.current_frame = RegisterWindow(self.window, self.show_main_menu)
 
-    def show_dashboard(self, username, user_id):
+    def show_dashboard(self, context):
         """Show the dashboard frame."""
         self.clear_window()
-        self.username = username
-        self.current_user_id = user_id
+        self.username = context.username
+        self.current_user_id = context.user_id
         self.current_frame = Dashboard(
-            self.window, username, user_id, self.show_main_menu
+            self.window, context, self.show_main_menu
+        )
+
+    def on_login_success(self, context):
+        """Callback for successful login with the loaded session context."""
+        self.show_dashboard(context)
+
+
+class LoadingIndicator(tk.Label):
+    """
+    Animated label shown while a background query is running.
+    """
+
+    def __init__(self, parent, text="Loading"):
+        super().__init__(
+            parent,
+            text=text,
+            font=("Consolas", 12),
+            fg=FG_COLOR,
+            bg=BG_COLOR,
         )
+        self.base_text = text
+        self.dots = 0
+        self.animation = None
+        self.animate()
+
+    def animate(self):
+        """Cycle the trailing dots every few hundred milliseconds."""
+        self.dots = (self.dots + 1) % 4
+        self.configure(text=self.base_text + "." * self.dots)
+        self.animation = self.after(300, self.animate)
 
-    def on_login_success(self, username, user_id):
-        """Callback for successful login."""
-        self.show_dashboard(username, user_id)
+    def destroy(self):
+        if self.animation:
+            self.after_cancel(self.animation)
+            self.animation = None
+        super().destroy()
 
 
 class MainMenu(tk.Frame):
@@ -162,7 +210,8 @@ class LoginWindow(tk.Frame):
         )
         self.password_entry.pack(pady=5)
 
-        self.create_button("Login", self.login).pack(pady=5)
+        self.login_button = self.create_button("Login", self.login)
+        self.login_button.pack(pady=5)
         self.create_button("Back", self.back_callback).pack(pady=5)
 
     def create_button(self, text, command):
@@ -194,33 +243,32 @@ class LoginWindow(tk.Frame):
         username = self.username_entry.get()
         password = self.password_entry.get()
 
-        if not username or not password:
-            messagebox.showerror(
-                "Login Failed", "Username and password are required."
-            )
-            return
-
-        if cursor is None:
+        if not library.available:
             messagebox.showerror(
                 "Database Error", "No valid database connection found."
             )
             return
 
-        try:
-            query = "SELECT user_id, password FROM users WHERE user_name = %s"
-            cursor.execute(query, (username,))
-            result = cursor.fetchone()
-
-            if result and result[1] == password:
-                user_id = result[0]
+        def on_verified(context):
+            if context is not None:
                 messagebox.showinfo("Login Success", "Welcome!")
-                self.success_callback(username, user_id)
+                self.success_callback(context)
             else:
                 messagebox.showerror(
                     "Login Failed", "Invalid username or password."
                 )
-        except Error as e:
-            messagebox.showerror("Database Error", f"An error occurred: {e}")
+
+        # Password hashing is slow on purpose; keep it off the Tk thread
+        self.login_button.configure(state="disabled")
+        task_runner.submit(
+            self,
+            library.login,
+            username,
+            password,
+            on_success=on_verified,
+            on_error=report_error("Database Error"),
+            on_done=lambda: self.login_button.configure(state="normal"),
+        )
 
 
 class RegisterWindow(tk.Frame):
@@ -381,50 +429,45 @@ class RegisterWindow(tk.Frame):
         """
         Handles registration logic and inserts a new user into the DB.
         """
-        name = self.name_entry.get().title()
-        last_name = self.last_name_entry.get().title()
+        name = self.name_entry.get()
+        last_name = self.last_name_entry.get()
         username = self.username_entry.get()
         phone_number = self.phone_number_entry.get()
         email = self.email_entry.get()
         password = self.password_entry.get()
         confirm_password = self.confirm_password_entry.get()
 
-        # Validate
-        if not all(
-            [name, last_name, username, password, confirm_password, email]
-        ):
-            messagebox.showerror(
-                "Registration Failed", "All fields are required."
-            )
-            return
-
         if password != confirm_password:
             messagebox.showerror(
                 "Registration Failed", "Passwords do not match."
             )
             return
 
-        if cursor is None:
+        if not library.available:
             messagebox.showerror(
                 "Database Error", "No valid database connection found."
             )
             return
 
-        try:
-            # call the register procedure
-            cursor.callproc(
-                "register_user",
-                (name, last_name, username, phone_number, email, password),
-            )
-            db_connection.conn.commit()
-
+        def on_registered(_):
             messagebox.showinfo(
                 "Registration Success", "You have registered successfully!"
             )
             self.back_callback()
 
-        except Error as e:
-            messagebox.showerror("Database Error", f"An error occurred: {e}")
+        # Hashes the password, then calls the register procedure
+        task_runner.submit(
+            self,
+            library.register,
+            name,
+            last_name,
+            username,
+            phone_number,
+            email,
+            password,
+            on_success=on_registered,
+            on_error=report_error("Database Error"),
+        )
 
 
 class Dashboard(tk.Frame):
@@ -433,10 +476,15 @@ class Dashboard(tk.Frame):
     and check fines/notifications.
     """
 
-    def __init__(self, parent, username, user_id, logout_callback):
+    NOTIFICATIONS_SHOWN = 5
+    NOTIFICATION_POLL_MS = 30000
+
+    def __init__(self, parent, context, logout_callback):
         super().__init__(parent, bg=BG_COLOR)
-        self.username = username
-        self.user_id = user_id
+        self.notification_poll = None
+        self.context = context
+        self.username = context.username
+        self.user_id = context.user_id
         self.logout_callback = logout_callback
         self.pack(fill="both", expand=True)
         self.render()
@@ -459,6 +507,15 @@ class Dashboard(tk.Frame):
             fg=FG_COLOR,
         ).pack(side="left", padx=20, pady=15)
 
+        self.balance_label = tk.Label(
+            top_bar,
+            text="",
+            font=("Roboto", 11),
+            bg=BUTTON_COLOR,
+            fg=FG_COLOR,
+        )
+        self.balance_label.pack(side="left", padx=10)
+
         logout_button = tk.Button(
             top_bar,
             text="Log Out",
@@ -554,6 +611,7 @@ class Dashboard(tk.Frame):
             pady=5,
         ).pack(anchor="nw")
         self.display_notifications(notifications_frame)
+        self.render_summary()
 
 
     def show_recommendations(self):
@@ -574,20 +632,26 @@ class Dashboard(tk.Frame):
             bg=BG_COLOR,
         ).pack(pady=10)
 
-        if cursor is None:
+        if not library.available:
             messagebox.showerror(
                 "Database Error", "No valid database connection found."
             )
             return
 
-        try:
-            cursor.callproc('recommend_books', (self.user_id,))
+        loading = LoadingIndicator(recom_window)
+        loading.pack(pady=20)
 
-            result = cursor.stored_results()
-            recommendations = []
-            for res in result:
-                recommendations.extend(res.fetchall())
+        def fetch_recommendations():
+            # One section per signal: neighbours, then (only when those
+            # are too few) top genres and co-borrowing
+            return library.recommend(self.user_id)
 
+        def render_recommendations(sections):
+            headings = (
+                "Picked for you from your recent loans",
+                "Top rated in your favourite genres",
+                "Readers who borrowed your books also borrowed",
+            )
             canvas = tk.Canvas(recom_window, bd=0, highlightthickness=0)
             scrollbar = tk.Scrollbar(recom_window, orient="vertical", command=canvas.yview, bd=0, highlightthickness=0)
             canvas.configure(yscrollcommand=scrollbar.set)
@@ -596,7 +660,7 @@ class Dashboard(tk.Frame):
 
             canvas.create_window((0, 0), window=recommendation_frame, anchor="nw")
             
-            if not recommendations:
+            if not any(sections):
                 tk.Label(
                     recommendation_frame,
                     text="No recommendations available.",
@@ -604,13 +668,31 @@ class Dashboard(tk.Frame):
                     fg=FG_COLOR,
                     bg=BG_COLOR,
                 ).pack(pady=20)
-            else:
+            shown = set()
+            for heading, recommendations in zip(headings, sections):
+                # Skip books already suggested by an earlier signal
+                recommendations = [
+                    book for book in recommendations if book[0] not in shown
+                ]
+                if not recommendations:
+                    continue
+
+                tk.Label(
+                    recommendation_frame,
+                    text=heading,
+                    font=("Roboto", 11, "bold"),
+                    fg=FG_COLOR,
+                    bg=BG_COLOR,
+                ).pack(pady=(10, 0), anchor="w")
+
                 for book in recommendations:
                     book_id, title, author_first_name, author_last_name, genre_name, avg_rating = book
+                    shown.add(book_id)
+                    rating = f"{avg_rating:.2f}" if avg_rating is not None else "n/a"
                     tk.Label(
                         recommendation_frame,
                         text=f"{title} by {author_first_name} {author_last_name} "
-                            f"(Genre: {genre_name}, Rating: {avg_rating:.2f})",
+                            f"(Genre: {genre_name}, Rating: {rating})",
                         font=("Consolas", 10),
                         fg=FG_COLOR,
                         bg=BG_COLOR,
@@ -624,72 +706,293 @@ class Dashboard(tk.Frame):
             recommendation_frame.update_idletasks()
             canvas.config(scrollregion=canvas.bbox("all"), bg=BG_COLOR, bd=0)
 
-        except Exception as e:
+        def on_error(e):
             messagebox.showerror("Error", f"Could not fetch recommendations: {e}")
 
+        task_runner.submit(
+            recom_window,
+            fetch_recommendations,
+            on_success=render_recommendations,
+            on_error=on_error,
+            on_done=loading.destroy,
+        )
+
 
 
-    # change query after adding self.user_id --------------------
     def show_fines(self):
         """
-        Fetch and display the user's fines.
+        Open a panel listing the user's fines with their outstanding total.
         """
-        if cursor is None:
+        if not library.available:
             messagebox.showerror(
                 "Database Error", "No valid database connection found."
             )
             return
 
-        try:
-            query = "SELECT user_id FROM users WHERE user_name = %s"
-            cursor.execute(query, (self.username,))
-            result = cursor.fetchone()
-            if result:
-                user_id = result[0]
-                query = (
-                    "SELECT amount, status FROM fines "
-                    "WHERE loan_id IN (SELECT loan_id FROM loans "
-                    "WHERE user_id = %s)"
+        fines_window = tk.Toplevel(self)
+        fines_window.title("Fines")
+        fines_window.geometry("600x400")
+        fines_window.configure(bg=BG_COLOR)
+
+        tk.Label(
+            fines_window,
+            text="Fines",
+            font=("Roboto", 18, "bold"),
+            fg=FG_COLOR,
+            bg=BG_COLOR,
+        ).pack(pady=10)
+
+        total_label = tk.Label(
+            fines_window,
+            text="Outstanding: ...",
+            font=("Consolas", 12),
+            fg=FG_COLOR,
+            bg=BG_COLOR,
+        )
+        total_label.pack()
+
+        columns = ("Book", "Loaned", "Returned", "Amount", "Status")
+        tree = ttk.Treeview(
+            fines_window, columns=columns, show="headings", height=10
+        )
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=90, anchor="center")
+        tree.column("Book", width=200)
+        tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        buttons_frame = tk.Frame(fines_window, bg=BG_COLOR)
+        buttons_frame.pack(pady=5)
+
+        panel = {"next_page": None, "task": None}
+
+        def show_total(balance):
+            total, count = balance
+            total_label.config(text=f"Outstanding: {total} ({count} unpaid)")
+            self.show_balance(balance)
+
+        def show_page(page):
+            rows, panel["next_page"] = page
+            for fine_id, title, loan_date, return_date, amount, status in rows:
+                tree.insert(
+                    "",
+                    "end",
+                    iid=str(fine_id),
+                    values=(title, loan_date, return_date or "-", amount, status),
                 )
-                cursor.execute(query, (user_id,))
-                fines = cursor.fetchall()
+            more_button.config(
+                state="normal" if panel["next_page"] is not None else "disabled"
+            )
 
-                if fines:
-                    fines_message = "\n".join(
-                        f"Amount: {fine[0]} | Status: {fine[1]}"
-                        for fine in fines
-                    )
-                    messagebox.showinfo(
-                        "Fines Details", f"Your fines:\n{fines_message}"
-                    )
-                else:
-                    messagebox.showinfo("Fines Details", "You have no fines.")
-            else:
-                messagebox.showerror("Error", "User not found.")
-        except Error as e:
-            messagebox.showerror("Database Error", f"An error occurred: {e}")
+        def load_page():
+            if panel["task"] and not panel["task"].done():
+                return
+            panel["task"] = task_runner.submit(
+                fines_window,
+                library.fines_page,
+                self.user_id,
+                panel["next_page"],
+                on_success=show_page,
+                on_error=lambda e: messagebox.showerror(
+                    "Database Error", f"An error occurred: {e}"
+                ),
+            )
+
+        def reload():
+            tree.delete(*tree.get_children())
+            panel["next_page"] = None
+            task_runner.submit(
+                fines_window,
+                library.outstanding_fines,
+                self.user_id,
+                on_success=show_total,
+            )
+            load_page()
+
+        def pay_selected():
+            selection = tree.selection()
+            if not selection:
+                messagebox.showwarning(
+                    "Input Error", "Please select a fine to pay."
+                )
+                return
+
+            def on_paid(_):
+                messagebox.showinfo("Success", "Fine paid.")
+                reload()
+
+            task_runner.submit(
+                fines_window,
+                library.pay_fine,
+                self.user_id,
+                int(selection[0]),
+                on_success=on_paid,
+                on_error=lambda e: messagebox.showerror(
+                    "Error", f"Could not pay fine: {e}"
+                ),
+            )
+
+        def create_button(text, command):
+            button = tk.Button(
+                buttons_frame,
+                text=text,
+                font=("Consolas", 12),
+                width=12,
+                command=command,
+                bg=BUTTON_COLOR,
+                fg=FG_COLOR,
+                activebackground=BUTTON_HOVER_COLOR,
+                activeforeground=FG_COLOR,
+                relief="flat",
+            )
+            button.pack(side="left", padx=5)
+            return button
+
+        create_button("Pay Selected", pay_selected)
+        more_button = create_button("Load More", load_page)
+        create_button("Close", fines_window.destroy)
 
-    def fetch_notifications(self):
+        reload()
+
+    def load_balance(self):
         """
-        Fetch user notifications from the database.
+        Fetch the outstanding fine balance for the top bar.
         """
-        if cursor is None:
-            return []
-        query = (
-            "SELECT notification_type, message "
-            "FROM notifications WHERE user_id = %s"
+        if not library.available:
+            return
+        task_runner.submit(
+            self,
+            library.outstanding_fines,
+            self.user_id,
+            on_success=self.show_balance,
         )
-        cursor.execute(query, (self.user_id,))
-        return cursor.fetchall()
+
+    def show_balance(self, balance):
+        """
+        Store a freshly loaded fine balance and update the top bar.
+        """
+        self.context.fines = balance
+        self.render_summary()
+
+    def render_summary(self):
+        """
+        Show loans and fines from the session context in the top bar.
+        """
+        total, count = self.context.fines
+        parts = [f"{len(self.context.active_loans)} on loan"]
+        parts.append(f"Fines: {total}" if count else "No fines")
+        if self.context.membership:
+            parts.insert(0, self.context.membership[0].title())
+        self.balance_label.config(text="  ·  ".join(parts))
 
     def display_notifications(self, parent):
         """
-        Display notifications in the GUI.
+        Show the latest notifications and poll for new ones in the
+        background. Only NOTIFICATIONS_SHOWN entries are ever rendered,
+        however many the user has accumulated.
         """
-        notifications = self.fetch_notifications()
-        if not notifications:
+        self.notifications = []
+        self.notification_poll = None
+
+        self.notifications_list = tk.Frame(parent, bg=BG_COLOR)
+        self.notifications_list.pack(anchor="w", fill="x")
+
+        buttons_frame = tk.Frame(parent, bg=BG_COLOR)
+        buttons_frame.pack(anchor="w", padx=10, pady=5)
+        for text, command in (
+            ("Mark all read", self.mark_notifications_read),
+            ("History", self.show_notification_history),
+        ):
+            tk.Button(
+                buttons_frame,
+                text=text,
+                font=("Roboto", 9),
+                command=command,
+                bg=BUTTON_COLOR,
+                fg=FG_COLOR,
+                activebackground=BUTTON_HOVER_COLOR,
+                activeforeground=FG_COLOR,
+                relief="flat",
+            ).pack(side="left", padx=(0, 5))
+
+        if not library.available:
+            self.render_notifications()
+            return
+
+        loading = LoadingIndicator(self.notifications_list)
+        loading.pack(anchor="w", padx=10, pady=10)
+
+        # The unread count came with the session context
+        def on_loaded(notifications):
+            self.notifications = notifications
+            self.render_notifications()
+
+        def on_done():
+            loading.destroy()
+            # Start polling only once the initial page is in place
+            self.schedule_notification_poll()
+
+        task_runner.submit(
+            self.notifications_list,
+            library.notifications_page,
+            self.user_id,
+            limit=self.NOTIFICATIONS_SHOWN,
+            on_success=on_loaded,
+            on_error=lambda e: self.render_notifications(),
+            on_done=on_done,
+        )
+
+    def schedule_notification_poll(self):
+        """Check for new notifications again after the poll interval."""
+        self.notification_poll = self.after(
+            self.NOTIFICATION_POLL_MS, self.poll_notifications
+        )
+
+    def poll_notifications(self):
+        """
+        Fetch only notifications newer than the newest one shown, and the
+        unread count, which also covers new ones beyond the shown page.
+        """
+        latest = self.notifications[0][0] if self.notifications else None
+
+        def on_polled(polled):
+            new_notifications, unread = polled
+            if new_notifications or unread != self.context.unread_notifications:
+                self.context.unread_notifications = unread
+                self.notifications = (
+                    list(new_notifications) + self.notifications
+                )[: self.NOTIFICATIONS_SHOWN]
+                self.render_notifications()
+
+        task_runner.submit(
+            self,
+            library.poll_notifications,
+            self.user_id,
+            after=latest,
+            limit=self.NOTIFICATIONS_SHOWN,
+            on_success=on_polled,
+            on_done=self.schedule_notification_poll,
+        )
+
+    def render_notifications(self):
+        """
+        Render the cached notifications into the notifications frame.
+        """
+        for child in self.notifications_list.winfo_children():
+            child.destroy()
+
+        if self.context.unread_notifications:
             tk.Label(
-                parent,
+                self.notifications_list,
+                text=f"{self.context.unread_notifications} unread",
+                font=("Roboto", 10, "bold"),
+                bg=BG_COLOR,
+                fg=FG_COLOR,
+            ).pack(anchor="w", padx=10)
+
+        if not self.notifications:
+            tk.Label(
+                self.notifications_list,
                 text="No new notifications.",
                 font=("Roboto", 12),
                 bg=FG_COLOR,
@@ -698,21 +1001,109 @@ class Dashboard(tk.Frame):
             ).pack(anchor="w", padx=10, pady=10)
             return
 
-        for notification in notifications:
-            notification_type, message = notification
+        for notification in self.notifications:
+            notification_id, notification_type, message, created_at, unread = notification
             tk.Label(
-                parent,
+                self.notifications_list,
                 text=f"• {message}",
-                font=("Roboto", 10),
+                font=("Roboto", 10, "bold" if unread else "normal"),
                 bg=BG_COLOR,
                 fg=FG_COLOR,
                 wraplength=300,
                 justify="left",
             ).pack(anchor="w", padx=10, pady=5)
 
+    def mark_notifications_read(self):
+        """
+        Move the read marker up to the newest notification shown.
+        """
+        if not self.notifications:
+            return
+
+        def on_marked(_):
+            self.context.unread_notifications = 0
+            self.notifications = [
+                notification[:4] + (0,) for notification in self.notifications
+            ]
+            self.render_notifications()
+
+        task_runner.submit(
+            self,
+            library.mark_notifications_read,
+            self.user_id,
+            self.notifications[0][0],
+            on_success=on_marked,
+            on_error=lambda e: messagebox.showerror(
+                "Database Error", f"An error occurred: {e}"
+            ),
+        )
+
+    def show_notification_history(self):
+        """
+        Open a window paging backwards through all notifications.
+        """
+        history_window = tk.Toplevel(self)
+        history_window.title("Notification History")
+        history_window.geometry("600x400")
+        history_window.configure(bg=BG_COLOR)
+
+        columns = ("Received", "Type", "Message")
+        tree = ttk.Treeview(
+            history_window, columns=columns, show="headings", height=12
+        )
+        for col in columns:
+            tree.heading(col, text=col)
+        tree.column("Received", width=140, anchor="center")
+        tree.column("Type", width=70, anchor="center")
+        tree.column("Message", width=360)
+        tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        history = {"oldest": None, "task": None}
+
+        def show_page(rows):
+            for notification_id, notification_type, message, created_at, unread in rows:
+                tree.insert("", "end", values=(created_at, notification_type, message))
+            if rows:
+                history["oldest"] = rows[-1][0]
+            if len(rows) < Notifications.PAGE_SIZE:
+                more_button.config(state="disabled")
+
+        def load_page():
+            if history["task"] and not history["task"].done():
+                return
+            history["task"] = task_runner.submit(
+                history_window,
+                library.notifications_page,
+                self.user_id,
+                before=history["oldest"],
+                on_success=show_page,
+                on_error=lambda e: messagebox.showerror(
+                    "Database Error", f"An error occurred: {e}"
+                ),
+            )
+
+        more_button = tk.Button(
+            history_window,
+            text="Load More",
+            command=load_page,
+            bg=BG_COLOR,
+            fg=FG_COLOR,
+            activebackground=BUTTON_COLOR,
+            activeforeground=BUTTON_HOVER_COLOR,
+        )
+        more_button.pack(pady=10)
+
+        load_page()
+
+    def destroy(self):
+        if self.notification_poll:
+            self.after_cancel(self.notification_poll)
+            self.notification_poll = None
+        super().destroy()
+
     def issue_book(self):
         """
-        Open a new window allowing the user to issue a book.
+        Open a new window allowing the user to search for and issue a book.
         """
         issue_window = tk.Toplevel(self)
         issue_window.title("Issue Book")
@@ -728,86 +1119,168 @@ class Dashboard(tk.Frame):
             bg=BG_COLOR,
         ).pack(pady=10)
 
-        if cursor is None:
+        if not library.available:
             messagebox.showerror(
                 "Database Error", "No valid database connection found."
             )
             return
 
-        try:
-            cursor.execute(
-                """
-                SELECT book_id, title, available_copies
-                FROM books
-                WHERE available_copies > 0
-                """
-            )
-            available_books = cursor.fetchall()
-
-            if not available_books:
-                tk.Label(
-                    issue_window,
-                    text="No books available for issuing.",
-                    font=("Consolas", 12),
-                    fg=FG_COLOR,
-                    bg=BG_COLOR,
-                ).pack(pady=20)
-                return
-
-        except Exception as e:
-            messagebox.showerror("Database Error", f"Error fetching books: {e}")
-            return
-
-        book_options = [
-            f"{book[1]} (Available: {book[2]})" for book in available_books
-        ]
-        book_var = tk.StringVar(issue_window)
-        #book_var.set(book_options[0])
-
         tk.Label(
             issue_window,
-            text="Select a book to issue:",
+            text="Search by title, author or review words:",
             font=("Consolas", 12),
             fg=FG_COLOR,
             bg=BG_COLOR,
         ).pack(pady=5)
 
-        dropdown = ttk.Combobox(issue_window, textvariable=book_var, values=book_options)
-        dropdown.config(
+        search_var = tk.StringVar(issue_window)
+        tk.Entry(
+            issue_window,
+            textvariable=search_var,
             font=("Roboto", 12),
             width=40,
-            background=BG_COLOR,
-            foreground=BG_COLOR,
+            bg=BUTTON_COLOR,
+            fg=FG_COLOR,
+            relief="flat",
+        ).pack(pady=5)
+
+        list_frame = tk.Frame(issue_window, bg=BG_COLOR)
+        list_frame.pack(pady=5)
+        scrollbar = tk.Scrollbar(list_frame, orient="vertical")
+        results = tk.Listbox(
+            list_frame,
+            font=("Roboto", 10),
+            width=45,
+            height=10,
+            bg=BUTTON_COLOR,
+            fg=FG_COLOR,
+            selectbackground=BUTTON_HOVER_COLOR,
+            selectmode="multiple",
+            exportselection=False,
+            relief="flat",
+            highlightthickness=0,
         )
-        dropdown.pack(pady=10)
-    
+        scrollbar.pack(side="right", fill="y")
+        results.pack(side="left")
 
-        def submit_issue():
-            selected_index = book_options.index(book_var.get())
-            book_id = available_books[selected_index][0]
-
-            try:
-                cursor.execute(
-                    "INSERT INTO loans (user_id, book_id, loan_date) "
-                    "VALUES (%s, %s, CURDATE())",
-                    (self.user_id, book_id),
-                )
-                db_connection.conn.commit()
+        status = tk.Label(
+            issue_window,
+            text="",
+            font=("Consolas", 10),
+            fg=FG_COLOR,
+            bg=BG_COLOR,
+        )
+        status.pack()
+
+        # Listbox row -> book_id, filled page by page
+        book_ids = []
+        titles = {}
+        picker = {"term": "", "next_page": None, "task": None, "debounce": None}
+
+        def load_page(reset):
+            if picker["task"] and not picker["task"].done():
+                if not reset:
+                    return
+                picker["task"].cancel()
+
+            if reset:
+                results.delete(0, "end")
+                book_ids.clear()
+                picker["next_page"] = None
+
+            status.config(text="Searching...")
+            picker["task"] = task_runner.submit(
+                issue_window,
+                library.search_books,
+                picker["term"],
+                picker["next_page"],
+                on_success=show_page,
+                on_error=lambda e: status.config(
+                    text=f"Error fetching books: {e}"
+                ),
+            )
 
-                cursor.execute(
-                    "UPDATE books "
-                    "SET available_copies = available_copies - 1 "
-                    "WHERE book_id = %s",
-                    (book_id,),
-                )
-                db_connection.conn.commit()
+        def show_page(page):
+            rows, picker["next_page"] = page
+            for book_id, title, copies, author, genre in rows:
+                results.insert("end", f"{title} (Available: {copies})")
+                book_ids.append(book_id)
+                titles[book_id] = title
+
+            if not book_ids:
+                status.config(text="No books available for issuing.")
+            else:
+                status.config(text="")
+
+        def on_search_changed(*_):
+            if picker["debounce"]:
+                issue_window.after_cancel(picker["debounce"])
+
+            def run_search():
+                picker["debounce"] = None
+                picker["term"] = search_var.get()
+                load_page(reset=True)
+
+            picker["debounce"] = issue_window.after(250, run_search)
+
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            # Fetch the next page once the user nears the end of the list
+            if float(last) >= 0.9 and picker["next_page"] is not None:
+                load_page(reset=False)
+
+        results.config(yscrollcommand=on_scroll)
+        scrollbar.config(command=results.yview)
+        search_var.trace_add("write", on_search_changed)
+
+        def on_issued(outcomes):
+            missed = []
+            for book_id, loan in outcomes:
+                if loan is None:
+                    missed.append(titles[book_id])
+                else:
+                    self.context.loan_issued(loan)
+            self.render_summary()
 
-                messagebox.showinfo("Success", "Book issued successfully!")
+            issued = len(outcomes) - len(missed)
+            if not missed:
+                messagebox.showinfo(
+                    "Success", f"{issued} book(s) issued successfully!"
+                )
                 issue_window.destroy()
-            except Exception as ex:
-                messagebox.showerror("Error", f"Could not issue book: {ex}")
+                return
+            issue_button.config(state="normal")
+            messagebox.showwarning(
+                "Partially Issued",
+                f"{issued} book(s) issued. No copies left of:\n"
+                + "\n".join(missed),
+            )
+            load_page(reset=True)
 
-        tk.Button(
+        def on_failed(ex):
+            issue_button.config(state="normal")
+            messagebox.showerror("Error", f"Could not issue books: {ex}")
+
+        def submit_issue():
+            selection = results.curselection()
+            if not selection:
+                messagebox.showwarning(
+                    "Input Error", "Please select the books to issue."
+                )
+                return
+            selected = [book_ids[index] for index in selection]
+
+            issue_button.config(state="disabled")
+            task_runner.submit(
+                issue_window,
+                library.issue_many,
+                self.user_id,
+                selected,
+                on_success=on_issued,
+                on_error=on_failed,
+            )
+
+        issue_button = tk.Button(
             issue_window,
             text="Issue",
             font=("Consolas", 12),
@@ -818,7 +1291,10 @@ class Dashboard(tk.Frame):
             activebackground=BUTTON_HOVER_COLOR,
             activeforeground=FG_COLOR,
             relief="flat",
-        ).pack(pady=20)
+        )
+        issue_button.pack(pady=10)
+
+        load_page(reset=True)
 
     def donate_book(self):
         """
@@ -872,7 +1348,7 @@ class Dashboard(tk.Frame):
         publisher_entry = create_entry()
         publisher_entry.pack(pady=5)
 
-        if cursor is None:
+        if not library.available:
             messagebox.showerror(
                 "Database Error", "No valid database connection found."
             )
@@ -880,98 +1356,33 @@ class Dashboard(tk.Frame):
             return
 
         def submit_donation():
-            title = title_entry.get().title()
-            author = author_entry.get().title()
-            genre = genre_entry.get().title()
-            publisher = publisher_entry.get().title()
-
-            if not all([title, author, genre, publisher]):
-                messagebox.showwarning(
-                    "Input Error", "Please fill in all fields."
-                )
-                return
-
-            try:
-                # Check for author
-                first_name, last_name = author.split()[0], author.split()[-1]
-                cursor.execute(
-                    "SELECT author_id FROM authors "
-                    "WHERE first_name = %s AND last_name = %s",
-                    (first_name, last_name),
-                )
-                author_id = cursor.fetchone()
-
-                # If author not found, insert new
-                if not author_id:
-                    cursor.execute(
-                        "INSERT INTO authors (first_name, last_name) "
-                        "VALUES (%s, %s)",
-                        (first_name, last_name),
-                    )
-                    db_connection.conn.commit()
-                    author_id = cursor.lastrowid
-                else:
-                    author_id = author_id[0]
-
-                # Check for genre
-                cursor.execute(
-                    "SELECT genre_id FROM genres WHERE genre_name = %s",
-                    (genre,),
-                )
-                genre_id = cursor.fetchone()
-
-                # If genre not found, insert new
-                if not genre_id:
-                    cursor.execute(
-                        "INSERT INTO genres (genre_name) VALUES (%s)",
-                        (genre,),
-                    )
-                    db_connection.conn.commit()
-                    genre_id = cursor.lastrowid
-                else:
-                    genre_id = genre_id[0]
-
-                # Check for publisher
-                cursor.execute(
-                    "SELECT publisher_id FROM publishers "
-                    "WHERE publisher_name = %s",
-                    (publisher,),
-                )
-                publisher_id = cursor.fetchone()
-
-                # If publisher not found, insert new
-                if not publisher_id:
-                    cursor.execute(
-                        "INSERT INTO publishers (publisher_name) VALUES (%s)",
-                        (publisher,),
-                    )
-                    db_connection.conn.commit()
-                    publisher_id = cursor.lastrowid
-                else:
-                    publisher_id = publisher_id[0]
-
-                # Insert new book
-                cursor.execute(
-                    "INSERT INTO books (title, author_id, genre_id, publisher_id) "
-                    "VALUES (%s, %s, %s, %s)",
-                    (title, author_id, genre_id, publisher_id),
-                )
-                db_connection.conn.commit()
-
+            def on_donated(title):
                 messagebox.showinfo(
                     "Success", f"Book '{title}' donated successfully!"
                 )
                 donate_window.destroy()
-            except Error as err:
-                messagebox.showerror("Error", f"Error: {err}")
-            except ValueError:
-                # If user enters an author name with only one part
-                messagebox.showwarning(
-                    "Input Error",
-                    "Please enter author name in 'FirstName LastName' format.",
-                )
 
-        tk.Button(
+            def on_failed(err):
+                donate_button.config(state="normal")
+                if isinstance(err, ValueError):
+                    messagebox.showwarning("Input Error", str(err))
+                else:
+                    messagebox.showerror("Error", f"Error: {err}")
+
+            donate_button.config(state="disabled")
+            task_runner.submit(
+                donate_window,
+                library.donate,
+                title_entry.get(),
+                author_entry.get(),
+                genre_entry.get(),
+                publisher_entry.get(),
+                self.user_id,
+                on_success=on_donated,
+                on_error=on_failed,
+            )
+
+        donate_button = tk.Button(
             donate_window,
             text="Donate",
             font=("Consolas", 12),
@@ -982,7 +1393,8 @@ class Dashboard(tk.Frame):
             activebackground=BUTTON_HOVER_COLOR,
             activeforeground=FG_COLOR,
             relief="flat",
-        ).pack()
+        )
+        donate_button.pack()
 
     def return_book(self):
         """
@@ -990,7 +1402,7 @@ class Dashboard(tk.Frame):
         """
         return_window = tk.Toplevel(self)
         return_window.title("Return Book")
-        return_window.geometry("400x350")
+        return_window.geometry("400x400")
         return_window.resizable(0, 0)
         return_window.configure(bg=BG_COLOR)
 
@@ -1002,25 +1414,23 @@ class Dashboard(tk.Frame):
             bg=BG_COLOR,
         ).pack(pady=10)
 
-        if cursor is None:
+        if not library.available:
             messagebox.showerror(
                 "Database Error", "No valid database connection found."
             )
             return_window.destroy()
             return
 
-        try:
-            cursor.execute(
-                """
-                SELECT loans.loan_id, books.title, loans.loan_date
-                FROM loans
-                INNER JOIN books ON loans.book_id = books.book_id
-                WHERE loans.user_id = %s AND loans.return_date IS NULL
-                """,
-                (self.user_id,),
-            )
-            books_to_return = cursor.fetchall()
+        loading = LoadingIndicator(return_window)
+        loading.pack(pady=20)
 
+        def fetch_books_to_return():
+            # Open loans are tracked by the session context; this only
+            # queries when the context has been invalidated
+            self.context.refresh()
+            return list(self.context.active_loans)
+
+        def render_picker(books_to_return):
             if not books_to_return:
                 tk.Label(
                     return_window,
@@ -1031,239 +1441,237 @@ class Dashboard(tk.Frame):
                 ).pack(pady=20)
                 return
 
-        except Exception as e:
-            messagebox.showerror("Database Error", f"Error fetching books: {e}")
-            return
-
-        book_options = [
-            f"{book[1]} (Loaned on: {book[2]})" for book in books_to_return
-        ]
-        book_var = tk.StringVar(return_window)
-        book_var.set(book_options[0])
-
-        tk.Label(
-            return_window,
-            text="Select a book to return:",
-            font=("Consolas", 12),
-            fg=FG_COLOR,
-            bg=BG_COLOR,
-        ).pack(pady=5)
-
-        dropdown = tk.OptionMenu(return_window, book_var, *book_options)
-        dropdown.config(
-            width=40,
-            font=("Roboto", 12),
-            bg=BUTTON_COLOR,
-            fg=FG_COLOR,
-            activebackground=BUTTON_HOVER_COLOR,
-            activeforeground=FG_COLOR,
-            relief="flat",
-            bd=0,
-            highlightthickness=0,
-        )
-
-        dropdown.pack(pady=10)
-
-        def submit_return():
-            selected_index = book_options.index(book_var.get())
-            loan_id = books_to_return[selected_index][0]
+            tk.Label(
+                return_window,
+                text="Select the books to return:",
+                font=("Consolas", 12),
+                fg=FG_COLOR,
+                bg=BG_COLOR,
+            ).pack(pady=5)
 
-            try:
-                cursor.execute(
-                    "SELECT book_id FROM loans WHERE loan_id = %s",
-                    (loan_id,),
-                )
-                book_id = cursor.fetchone()[0]
+            loans_list = tk.Listbox(
+                return_window,
+                font=("Roboto", 10),
+                width=45,
+                height=8,
+                bg=BUTTON_COLOR,
+                fg=FG_COLOR,
+                selectbackground=BUTTON_HOVER_COLOR,
+                selectmode="multiple",
+                exportselection=False,
+                relief="flat",
+                highlightthickness=0,
+            )
+            for book in books_to_return:
+                loans_list.insert("end", f"{book[2]} (Loaned on: {book[3]})")
+            loans_list.pack(pady=10)
+
+            def on_returned(outcomes):
+                for loan_id, returned in outcomes:
+                    self.context.loan_returned(loan_id)
+                # Returning stops accrual; fetch the new balance
+                self.load_balance()
+                missed = sum(not returned for _, returned in outcomes)
+                if missed:
+                    # Closed elsewhere in the meantime; reload next time
+                    self.context.invalidate()
+                    messagebox.showwarning(
+                        "Partially Returned",
+                        f"{missed} of the selected loans were no longer open.",
+                    )
+                else:
+                    messagebox.showinfo(
+                        "Success",
+                        f"{len(outcomes)} book(s) returned successfully!",
+                    )
+                return_window.destroy()
 
-                cursor.execute(
-                    "UPDATE loans SET return_date = CURDATE() "
-                    "WHERE loan_id = %s",
-                    (loan_id,),
-                )
+            def on_failed(ex):
+                # The loan may have been closed elsewhere; reload next time
+                self.context.invalidate()
+                return_button.config(state="normal")
+                messagebox.showerror("Error", f"Could not return books: {ex}")
+
+            def submit_return():
+                selection = loans_list.curselection()
+                if not selection:
+                    messagebox.showwarning(
+                        "Input Error", "Please select the books to return."
+                    )
+                    return
+                loan_ids = [books_to_return[index][0] for index in selection]
 
-                cursor.execute(
-                    "UPDATE books SET available_copies = available_copies + 1 "
-                    "WHERE book_id = %s",
-                    (book_id,),
+                return_button.config(state="disabled")
+                task_runner.submit(
+                    return_window,
+                    library.return_many,
+                    self.user_id,
+                    loan_ids,
+                    on_success=on_returned,
+                    on_error=on_failed,
                 )
 
-                db_connection.conn.commit()
-
-                messagebox.showinfo("Success", "Book returned successfully!")
-                return_window.destroy()
-            except Exception as ex:
-                messagebox.showerror("Error", f"Could not return book: {ex}")
+            return_button = tk.Button(
+                return_window,
+                text="Return",
+                font=("Consolas", 12),
+                width=15,
+                command=submit_return,
+                bg=BUTTON_COLOR,
+                fg=FG_COLOR,
+                activebackground=BUTTON_HOVER_COLOR,
+                activeforeground=FG_COLOR,
+                relief="flat",
+            )
+            return_button.pack(pady=20)
 
-        tk.Button(
+        task_runner.submit(
             return_window,
-            text="Return",
-            font=("Consolas", 12),
-            width=15,
-            command=submit_return,
-            bg=BUTTON_COLOR,
-            fg=FG_COLOR,
-            activebackground=BUTTON_HOVER_COLOR,
-            activeforeground=FG_COLOR,
-            relief="flat",
-        ).pack(pady=20)
+            fetch_books_to_return,
+            on_success=render_picker,
+            on_error=lambda e: messagebox.showerror(
+                "Database Error", f"Error fetching books: {e}"
+            ),
+            on_done=loading.destroy,
+        )
 
     def review_menu(self):
-        def fetch_unrated_books():
-            try:
-                cursor.callproc("fetch_unrated_books", [self.user_id])
-                books = []
-                for result in cursor.stored_results():
-                    books = result.fetchall()
-                return books
-            except Exception as e:
-                messagebox.showerror(
-                    "Database Error", f"Error fetching books: {e}"
-                )
-                return []
-
-        def submit_review():
-            """Submit the review and rating to the database."""
-            selected_title = book_var.get()
-            book_id = book_mapping.get(selected_title)
-            review_text = review_entry.get()
-            rating = rating_var.get()
-
-            if not book_id or not rating:
-                messagebox.showerror(
-                    "Input Error", "Please select a book and provide a rating."
-                )
+        def open_review_window(books):
+            if not books:
+                messagebox.showinfo("No Books", "No unrated books available.")
                 return
 
-            try:
-                query = """
-                    INSERT INTO ratings (user_id, book_id, rating, review)
-                    VALUES (%s, %s, %s, %s)
-                """
-                cursor.execute(
-                    query, (self.user_id, book_id, rating, review_text)
-                )
-                db_connection.conn.commit()
-                messagebox.showinfo("Success", "Review submitted successfully!")
-                review_window.destroy()
-            except Exception as e:
-                messagebox.showerror(
-                    "Database Error", f"Error submitting review: {e}"
-                )
-
-        books = fetch_unrated_books()
-        if not books:
-            messagebox.showinfo("No Books", "No unrated books available.")
-            return
-
-        book_mapping = {book[1]: book[0] for book in books}
-
-        review_window = tk.Toplevel(self)
-        review_window.title("Add Review")
-        review_window.geometry("400x350")
-        review_window.resizable(0, 0)
-        review_window.configure(bg=BG_COLOR)
+            book_mapping = {book[1]: book[0] for book in books}
 
-        tk.Label(
-            review_window,
-            text="Review Book",
-            font=("Roboto", 18, "bold"),
-            fg=FG_COLOR,
-            bg=BG_COLOR,
-        ).pack(pady=10)
+            review_window = tk.Toplevel(self)
+            review_window.title("Add Review")
+            review_window.geometry("400x350")
+            review_window.resizable(0, 0)
+            review_window.configure(bg=BG_COLOR)
 
-        tk.Label(
-            review_window,
-            text="Select Book:",
-            font=("Roboto", 14),
-            fg=FG_COLOR,
-            bg=BG_COLOR,
-        ).pack(pady=5)
+            tk.Label(
+                review_window,
+                text="Review Book",
+                font=("Roboto", 18, "bold"),
+                fg=FG_COLOR,
+                bg=BG_COLOR,
+            ).pack(pady=10)
 
-        book_var = tk.StringVar()
-        book_menu = tk.OptionMenu(review_window, book_var, *book_mapping.keys())
-        book_menu.config(
-            width=40,
-            font=("Roboto", 12),
-            bg=BUTTON_COLOR,
-            fg=FG_COLOR,
-            activebackground=BUTTON_HOVER_COLOR,
-            activeforeground=FG_COLOR,
-            relief="flat",
-            bd=0,
-            highlightthickness=0,
-        )
+            tk.Label(
+                review_window,
+                text="Select Book:",
+                font=("Roboto", 14),
+                fg=FG_COLOR,
+                bg=BG_COLOR,
+            ).pack(pady=5)
 
-        book_menu.pack(pady=5)
+            book_var = tk.StringVar()
+            book_menu = tk.OptionMenu(review_window, book_var, *book_mapping.keys())
+            book_menu.config(
+                width=40,
+                font=("Roboto", 12),
+                bg=BUTTON_COLOR,
+                fg=FG_COLOR,
+                activebackground=BUTTON_HOVER_COLOR,
+                activeforeground=FG_COLOR,
+                relief="flat",
+                bd=0,
+                highlightthickness=0,
+            )
 
-        tk.Label(
-            review_window,
-            text="Write your review:",
-            font=("Roboto", 14),
-            fg=FG_COLOR,
-            bg=BG_COLOR,
-        ).pack(pady=5)
+            book_menu.pack(pady=5)
 
-        review_entry = tk.Entry(
-            review_window, bg=BUTTON_COLOR, fg=FG_COLOR, relief="flat", width=50
-        )
-        review_entry.pack(pady=5)
+            tk.Label(
+                review_window,
+                text="Write your review:",
+                font=("Roboto", 14),
+                fg=FG_COLOR,
+                bg=BG_COLOR,
+            ).pack(pady=5)
 
-        tk.Label(
-            review_window,
-            text="Rate:",
-            font=("Roboto", 14),
-            fg=FG_COLOR,
-            bg=BG_COLOR,
-        ).pack(pady=5)
+            review_entry = tk.Entry(
+                review_window, bg=BUTTON_COLOR, fg=FG_COLOR, relief="flat", width=50
+            )
+            review_entry.pack(pady=5)
 
-        rating_var = tk.IntVar(value=0)
-        for i in range(1, 6):
-            tk.Radiobutton(
+            tk.Label(
                 review_window,
-                text=i,
-                variable=rating_var,
-                value=i,
-                font=("Roboto", 10, "bold"),
+                text="Rate:",
+                font=("Roboto", 14),
+                fg=FG_COLOR,
                 bg=BG_COLOR,
+            ).pack(pady=5)
+
+            rating_var = tk.IntVar(value=0)
+            for i in range(1, 6):
+                tk.Radiobutton(
+                    review_window,
+                    text=i,
+                    variable=rating_var,
+                    value=i,
+                    font=("Roboto", 10, "bold"),
+                    bg=BG_COLOR,
+                    fg=FG_COLOR,
+                ).pack(side=tk.LEFT, padx=10)
+
+            def submit_review():
+                """Submit the review and rating to the database."""
+                selected_title = book_var.get()
+                book_id = book_mapping.get(selected_title)
+                review_text = review_entry.get()
+                rating = rating_var.get()
+
+                def on_saved(_):
+                    self.context.review_added()
+                    messagebox.showinfo("Success", "Review submitted successfully!")
+                    review_window.destroy()
+
+                task_runner.submit(
+                    review_window,
+                    library.add_review,
+                    self.user_id,
+                    book_id,
+                    rating,
+                    review_text,
+                    on_success=on_saved,
+                    on_error=report_error("Database Error"),
+                )
+
+            tk.Button(
+                review_window,
+                text="Submit",
+                font=("Consolas", 12),
+                command=submit_review,
+                bg=BUTTON_COLOR,
                 fg=FG_COLOR,
-            ).pack(side=tk.LEFT, padx=10)
+                activebackground=BUTTON_HOVER_COLOR,
+                activeforeground=FG_COLOR,
+                relief="flat",
+            ).pack()
 
-        tk.Button(
-            review_window,
-            text="Submit",
-            font=("Consolas", 12),
-            command=submit_review,
-            bg=BUTTON_COLOR,
-            fg=FG_COLOR,
-            activebackground=BUTTON_HOVER_COLOR,
-            activeforeground=FG_COLOR,
-            relief="flat",
-        ).pack()
+        task_runner.submit(
+            self,
+            library.unrated_books,
+            self.user_id,
+            on_success=open_review_window,
+            on_error=lambda e: messagebox.showerror(
+                "Database Error", f"Error fetching books: {e}"
+            ),
+        )
 
     def browse_menu(self):
-        """Displays a window for browsing reviews."""
-
-        def fetch_reviews():
-            """Fetches all reviews from the `all_reviews` view in the database."""
-            try:
-                query = "SELECT * FROM all_reviews"
-                cursor.execute(query)
-                return cursor.fetchall()
-            except Exception as e:
-                messagebox.showerror(
-                    "Database Error", f"Error fetching reviews: {e}"
-                )
-                return []
-
-        reviews = fetch_reviews()
+        """
+        Displays a window for browsing reviews.
 
-        if not reviews:
-            messagebox.showinfo("No Data", "No reviews found.")
-            return
+        Reviews are streamed in pages as the user scrolls and at most
+        MAX_ROWS of them are kept in the tree; pages scrolled far out of
+        view are dropped and re-fetched on the way back.
+        """
+        MAX_ROWS = Reviews.PAGE_SIZE * 3
 
         browse_window = tk.Toplevel(self)
         browse_window.title("Browse Reviews")
-        browse_window.geometry("700x400")
+        browse_window.geometry("700x450")
         browse_window.configure(bg=BG_COLOR)
 
         tk.Label(
@@ -1274,9 +1682,58 @@ class Dashboard(tk.Frame):
             fg=FG_COLOR,
         ).pack(pady=10)
 
+        filters_frame = tk.Frame(browse_window, bg=BG_COLOR)
+        filters_frame.pack(fill="x", padx=10)
+
+        def create_filter(text, width):
+            tk.Label(
+                filters_frame,
+                text=text,
+                font=("Consolas", 10),
+                fg=FG_COLOR,
+                bg=BG_COLOR,
+            ).pack(side="left", padx=(10, 2))
+            var = tk.StringVar(browse_window)
+            tk.Entry(
+                filters_frame,
+                textvariable=var,
+                width=width,
+                bg=BUTTON_COLOR,
+                fg=FG_COLOR,
+                relief="flat",
+            ).pack(side="left")
+            return var
+
+        book_var = create_filter("Book:", 18)
+        reviewer_var = create_filter("Reviewer:", 14)
+        text_var = create_filter("Words:", 18)
+
+        tk.Label(
+            filters_frame,
+            text="Rating:",
+            font=("Consolas", 10),
+            fg=FG_COLOR,
+            bg=BG_COLOR,
+        ).pack(side="left", padx=(10, 2))
+        rating_var = tk.StringVar(browse_window, value="Any")
+        ttk.Combobox(
+            filters_frame,
+            textvariable=rating_var,
+            values=["Any", "1", "2", "3", "4", "5"],
+            state="readonly",
+            width=4,
+        ).pack(side="left")
+
+        tree_frame = tk.Frame(browse_window, bg=BG_COLOR)
+        tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
         columns = ("Reviewer", "Book Title", "Rating", "Review")
+        sort_keys = {"Reviewer": "reviewer", "Book Title": "book", "Rating": "rating"}
         tree = ttk.Treeview(
-            browse_window, columns=columns, show="headings", height=15
+            tree_frame, columns=columns, show="headings", height=15
+        )
+        scrollbar = ttk.Scrollbar(
+            tree_frame, orient="vertical", command=tree.yview
         )
 
         for col in columns:
@@ -1287,23 +1744,171 @@ class Dashboard(tk.Frame):
         tree.column("Book Title", width=200)
         tree.column("Review", width=300)
 
-        for review in reviews:
-            tree.insert("", "end", values=review)
+        scrollbar.pack(side="right", fill="y")
+        tree.pack(side="left", fill="both", expand=True)
 
-        tree.pack(fill="both", expand=True, padx=10, pady=10)
+        status = tk.Label(
+            browse_window,
+            text="",
+            font=("Consolas", 10),
+            fg=FG_COLOR,
+            bg=BG_COLOR,
+        )
+        status.pack()
+
+        # Keyset position of every row currently materialised in the tree
+        keys = []
+        view = {
+            "sort": "book",
+            "descending": False,
+            "more_before": False,
+            "more_after": False,
+            "task": None,
+        }
+
+        def current_filters():
+            rating = rating_var.get()
+            return {
+                "book": book_var.get().strip() or None,
+                "reviewer": reviewer_var.get().strip() or None,
+                "text": text_var.get().strip() or None,
+                "rating": int(rating) if rating.isdigit() else None,
+            }
+
+        def fetch(after=None, before=None):
+            if view["task"] and not view["task"].done():
+                return False
+            status.config(text="Loading...")
+            view["task"] = task_runner.submit(
+                browse_window,
+                library.reviews_page,
+                view["sort"],
+                view["descending"],
+                after=after,
+                before=before,
+                on_success=lambda page: show_page(page, prepend=before is not None),
+                on_error=lambda e: status.config(
+                    text=f"Error fetching reviews: {e}"
+                ),
+                **current_filters(),
+            )
+            return True
+
+        def keep_position(item):
+            """Scroll so that ``item`` stays where the user was looking."""
+            children = tree.get_children()
+            if item and children:
+                tree.yview_moveto(tree.index(item) / len(children))
+
+        def show_page(page, prepend):
+            rows, has_more = page
+            status.config(text="")
+            anchor = tree.identify_row(5)
+            new_keys = [Reviews.page_key(row, view["sort"]) for row in rows]
+
+            if prepend:
+                view["more_before"] = has_more
+                for row in reversed(rows):
+                    tree.insert("", 0, values=row[1:5])
+                keys[:0] = new_keys
+                excess = len(keys) - MAX_ROWS
+                if excess > 0:
+                    tree.delete(*tree.get_children()[-excess:])
+                    del keys[-excess:]
+                    view["more_after"] = True
+            else:
+                view["more_after"] = has_more
+                for row in rows:
+                    tree.insert("", "end", values=row[1:5])
+                keys.extend(new_keys)
+                excess = len(keys) - MAX_ROWS
+                if excess > 0:
+                    tree.delete(*tree.get_children()[:excess])
+                    del keys[:excess]
+                    view["more_before"] = True
+
+            keep_position(anchor)
+            if not keys:
+                status.config(text="No reviews found.")
+
+        def reload(*_):
+            if view["task"]:
+                view["task"].cancel()
+            tree.delete(*tree.get_children())
+            keys.clear()
+            view["more_before"] = view["more_after"] = False
+            fetch()
+
+        def sort_by(column):
+            sort = sort_keys[column]
+            if view["sort"] == sort:
+                view["descending"] = not view["descending"]
+            else:
+                view["sort"], view["descending"] = sort, False
+            reload()
+
+        for column in sort_keys:
+            tree.heading(column, command=lambda c=column: sort_by(c))
+
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            if not keys:
+                return
+            if float(last) >= 0.9 and view["more_after"]:
+                fetch(after=keys[-1])
+            elif float(first) <= 0.1 and view["more_before"]:
+                fetch(before=keys[0])
 
+        tree.configure(yscrollcommand=on_scroll)
+
+        buttons_frame = tk.Frame(browse_window, bg=BG_COLOR)
+        buttons_frame.pack(pady=10)
         tk.Button(
-            browse_window,
+            buttons_frame,
+            text="Apply Filters",
+            command=reload,
+            bg=BG_COLOR,
+            fg=FG_COLOR,
+            activebackground=BUTTON_COLOR,
+            activeforeground=BUTTON_HOVER_COLOR,
+        ).pack(side="left", padx=5)
+        tk.Button(
+            buttons_frame,
             text="Close",
             command=browse_window.destroy,
             bg=BG_COLOR,
             fg=FG_COLOR,
             activebackground=BUTTON_COLOR,
             activeforeground=BUTTON_HOVER_COLOR,
-        ).pack(pady=10)
+        ).pack(side="left", padx=5)
+
+        if not library.available:
+            messagebox.showerror(
+                "Database Error", "No valid database connection found."
+            )
+            browse_window.destroy()
+            return
+
+        fetch()
 
 
 if __name__ == "__main__":
     window = tk.Tk()
     app = App(window)
+    instrumentation = db_connection.instrumentation
+    instrumentation.log_to_file()
+
+    def export_stats():
+        # Periodically, so a crash loses at most one interval
+        instrumentation.export()
+        window.after(instrumentation.EXPORT_MS, export_stats)
+
+    if library.available:
+        task_runner.submit(window, library.warm)
+        window.after(instrumentation.EXPORT_MS, export_stats)
     window.mainloop()
+    task_runner.shutdown()
+    if library.available:
+        library.close()
+        instrumentation.export()
+    db_connection.close_connection()
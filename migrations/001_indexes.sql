@@ -0,0 +1,20 @@
+-- Index pack for the hot query paths.
+-- Apply to an existing librarydb created before these indexes were added
+-- to librarySetup.sql. Duplicate user names, emails or reference rows must
+-- be merged first, otherwise the unique indexes cannot be built.
+USE librarydb;
+
+-- Login and register_user look users up by user_name or email
+CREATE UNIQUE INDEX IF NOT EXISTS uq_users_user_name ON users (user_name);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_users_email ON users (email);
+
+-- Donations probe the reference tables by name
+CREATE UNIQUE INDEX IF NOT EXISTS uq_authors_name ON authors (first_name, last_name);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_genres_name ON genres (genre_name);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_publishers_name ON publishers (publisher_name);
+
+-- Open loans of a user (return_book, fines, recommendations)
+CREATE INDEX IF NOT EXISTS idx_loans_user_return ON loans (user_id, return_date);
+
+-- Ratings already given by a user (fetch_unrated_books)
+CREATE INDEX IF NOT EXISTS idx_ratings_user_book ON ratings (user_id, book_id);
@@ -0,0 +1,4 @@
+-- Keyset pagination over the catalog orders by (title, book_id).
+USE librarydb;
+
+CREATE INDEX IF NOT EXISTS idx_books_title ON books (title);
@@ -0,0 +1,4 @@
+-- The review browser pages through ratings ordered by (rating, rating_id).
+USE librarydb;
+
+CREATE INDEX IF NOT EXISTS idx_ratings_rating ON ratings (rating);
@@ -0,0 +1,228 @@
+-- Precomputed recommendation aggregates.
+-- Creates the aggregate tables and the triggers that maintain them,
+-- replaces recommend_books with a version that reads them, and backfills
+-- them from the existing loans and ratings.
+USE librarydb;
+
+-- Recommendation aggregates, maintained incrementally by triggers
+CREATE TABLE book_stats (
+    book_id INT PRIMARY KEY,
+    rating_count INT NOT NULL DEFAULT 0,
+    rating_sum INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (book_id) REFERENCES books(book_id) ON DELETE CASCADE
+);
+
+
+CREATE TABLE user_genre_affinity (
+    user_id INT,
+    genre_id INT,
+    loan_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, genre_id),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (genre_id) REFERENCES genres(genre_id) ON DELETE CASCADE
+);
+
+
+CREATE TABLE book_co_loans (
+    book_id INT,
+    other_book_id INT,
+    co_loan_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (book_id, other_book_id),
+    FOREIGN KEY (book_id) REFERENCES books(book_id) ON DELETE CASCADE,
+    FOREIGN KEY (other_book_id) REFERENCES books(book_id) ON DELETE CASCADE
+);
+
+
+DROP PROCEDURE IF EXISTS recommend_books;
+
+DELIMITER $$
+
+CREATE PROCEDURE recommend_books(IN p_user_id INT)
+BEGIN
+    -- Well rated books from the user's five most borrowed genres
+    SELECT b.book_id, b.title, a.first_name, a.last_name, g.genre_name,
+           s.rating_sum / s.rating_count AS avg_rating
+    FROM (
+        SELECT genre_id
+        FROM user_genre_affinity
+        WHERE user_id = p_user_id
+        ORDER BY loan_count DESC
+        LIMIT 5
+    ) top_genres
+    JOIN books b ON b.genre_id = top_genres.genre_id
+    JOIN book_stats s ON b.book_id = s.book_id
+    LEFT JOIN authors a ON b.author_id = a.author_id
+    LEFT JOIN genres g ON b.genre_id = g.genre_id
+    WHERE s.rating_count > 0
+        AND s.rating_sum >= 3.5 * s.rating_count
+        AND NOT EXISTS (
+            SELECT 1 FROM loans l
+            WHERE l.user_id = p_user_id AND l.book_id = b.book_id
+        )
+    ORDER BY avg_rating DESC, b.title ASC
+    LIMIT 20;
+
+    -- Books most often borrowed together with the user's recent loans
+    SELECT b.book_id, b.title, a.first_name, a.last_name, g.genre_name,
+           s.rating_sum / NULLIF(s.rating_count, 0) AS avg_rating
+    FROM (
+        SELECT c.other_book_id AS book_id, SUM(c.co_loan_count) AS score
+        FROM (
+            SELECT book_id
+            FROM loans
+            WHERE user_id = p_user_id
+            GROUP BY book_id
+            ORDER BY MAX(loan_id) DESC
+            LIMIT 20
+        ) recent
+        JOIN book_co_loans c ON c.book_id = recent.book_id
+        GROUP BY c.other_book_id
+    ) co_borrowed
+    JOIN books b ON b.book_id = co_borrowed.book_id
+    LEFT JOIN book_stats s ON b.book_id = s.book_id
+    LEFT JOIN authors a ON b.author_id = a.author_id
+    LEFT JOIN genres g ON b.genre_id = g.genre_id
+    WHERE NOT EXISTS (
+        SELECT 1 FROM loans l
+        WHERE l.user_id = p_user_id AND l.book_id = b.book_id
+    )
+    ORDER BY co_borrowed.score DESC, b.title ASC
+    LIMIT 10;
+END$$
+
+DELIMITER ;
+
+
+DELIMITER $$
+
+CREATE PROCEDURE rebuild_recommendation_stats()
+BEGIN
+    -- Recompute every recommendation aggregate from the source tables.
+    -- Used to backfill existing data and to repair drift, e.g. after
+    -- ratings were removed by a cascading delete (which fires no triggers).
+    DELETE FROM book_stats;
+    INSERT INTO book_stats (book_id, rating_count, rating_sum)
+    SELECT book_id, COUNT(rating), COALESCE(SUM(rating), 0)
+    FROM ratings
+    GROUP BY book_id;
+
+    DELETE FROM user_genre_affinity;
+    INSERT INTO user_genre_affinity (user_id, genre_id, loan_count)
+    SELECT l.user_id, b.genre_id, COUNT(*)
+    FROM loans l
+    JOIN books b ON l.book_id = b.book_id
+    WHERE b.genre_id IS NOT NULL
+    GROUP BY l.user_id, b.genre_id;
+
+    DELETE FROM book_co_loans;
+    INSERT INTO book_co_loans (book_id, other_book_id, co_loan_count)
+    SELECT x.book_id, y.book_id, COUNT(*)
+    FROM (SELECT DISTINCT user_id, book_id FROM loans) x
+    JOIN (SELECT DISTINCT user_id, book_id FROM loans) y
+        ON x.user_id = y.user_id AND x.book_id <> y.book_id
+    GROUP BY x.book_id, y.book_id;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER track_loan_recommendations
+AFTER INSERT ON loans
+FOR EACH ROW
+BEGIN
+    DECLARE v_genre_id INT;
+
+    SELECT genre_id INTO v_genre_id FROM books WHERE book_id = NEW.book_id;
+
+    IF v_genre_id IS NOT NULL THEN
+        INSERT INTO user_genre_affinity (user_id, genre_id, loan_count)
+        VALUES (NEW.user_id, v_genre_id, 1)
+        ON DUPLICATE KEY UPDATE loan_count = loan_count + 1;
+    END IF;
+
+    -- Pair the book with the user's other recent books, once per user
+    IF NOT EXISTS (
+        SELECT 1 FROM loans
+        WHERE user_id = NEW.user_id
+            AND book_id = NEW.book_id
+            AND loan_id <> NEW.loan_id
+    ) THEN
+        INSERT INTO book_co_loans (book_id, other_book_id, co_loan_count)
+        SELECT NEW.book_id, prior.book_id, 1
+        FROM (
+            SELECT book_id FROM loans
+            WHERE user_id = NEW.user_id AND book_id <> NEW.book_id
+            GROUP BY book_id
+            ORDER BY MAX(loan_id) DESC
+            LIMIT 50
+        ) prior
+        ON DUPLICATE KEY UPDATE co_loan_count = co_loan_count + 1;
+
+        INSERT INTO book_co_loans (book_id, other_book_id, co_loan_count)
+        SELECT prior.book_id, NEW.book_id, 1
+        FROM (
+            SELECT book_id FROM loans
+            WHERE user_id = NEW.user_id AND book_id <> NEW.book_id
+            GROUP BY book_id
+            ORDER BY MAX(loan_id) DESC
+            LIMIT 50
+        ) prior
+        ON DUPLICATE KEY UPDATE co_loan_count = co_loan_count + 1;
+    END IF;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER add_rating_stats
+AFTER INSERT ON ratings
+FOR EACH ROW
+BEGIN
+    INSERT INTO book_stats (book_id, rating_count, rating_sum)
+    VALUES (NEW.book_id, 1, NEW.rating)
+    ON DUPLICATE KEY UPDATE
+        rating_count = rating_count + 1,
+        rating_sum = rating_sum + NEW.rating;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER update_rating_stats
+AFTER UPDATE ON ratings
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.book_id <=> NEW.book_id) OR NOT (OLD.rating <=> NEW.rating) THEN
+        UPDATE book_stats
+        SET rating_count = rating_count - 1,
+            rating_sum = rating_sum - OLD.rating
+        WHERE book_id = OLD.book_id;
+
+        INSERT INTO book_stats (book_id, rating_count, rating_sum)
+        VALUES (NEW.book_id, 1, NEW.rating)
+        ON DUPLICATE KEY UPDATE
+            rating_count = rating_count + 1,
+            rating_sum = rating_sum + NEW.rating;
+    END IF;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER remove_rating_stats
+AFTER DELETE ON ratings
+FOR EACH ROW
+BEGIN
+    UPDATE book_stats
+    SET rating_count = rating_count - 1,
+        rating_sum = rating_sum - OLD.rating
+    WHERE book_id = OLD.book_id;
+END$$
+
+DELIMITER ;
+
+CALL rebuild_recommendation_stats();
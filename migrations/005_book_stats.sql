@@ -0,0 +1,191 @@
+-- Materialised book statistics.
+-- Adds loan counters and a stored average rating to book_stats, keeps them
+-- current with triggers on loans, and backfills the table. Run
+-- CALL rebuild_book_stats(); at any time to recompute it from scratch.
+USE librarydb;
+
+ALTER TABLE book_stats
+    ADD COLUMN avg_rating DECIMAL(3,2) AS (rating_sum / NULLIF(rating_count, 0)) PERSISTENT,
+    ADD COLUMN loan_count INT NOT NULL DEFAULT 0,
+    ADD COLUMN last_loaned_date DATE;
+
+CREATE INDEX IF NOT EXISTS idx_loans_book_date ON loans (book_id, loan_date);
+CREATE INDEX IF NOT EXISTS idx_book_stats_rating ON book_stats (avg_rating);
+
+DROP PROCEDURE IF EXISTS recommend_books;
+DROP PROCEDURE IF EXISTS rebuild_recommendation_stats;
+
+DELIMITER $$
+
+CREATE PROCEDURE rebuild_book_stats()
+BEGIN
+    -- Recompute book_stats from ratings and loans. Used to backfill the
+    -- table and to repair drift, e.g. after ratings were removed by a
+    -- cascading delete (which fires no triggers).
+    DELETE FROM book_stats;
+    INSERT INTO book_stats
+        (book_id, rating_count, rating_sum, loan_count, last_loaned_date)
+    SELECT b.book_id,
+           COALESCE(r.rating_count, 0),
+           COALESCE(r.rating_sum, 0),
+           COALESCE(l.loan_count, 0),
+           l.last_loaned_date
+    FROM books b
+    LEFT JOIN (
+        SELECT book_id, COUNT(rating) AS rating_count, SUM(rating) AS rating_sum
+        FROM ratings
+        GROUP BY book_id
+    ) r ON b.book_id = r.book_id
+    LEFT JOIN (
+        SELECT book_id, COUNT(*) AS loan_count, MAX(loan_date) AS last_loaned_date
+        FROM loans
+        GROUP BY book_id
+    ) l ON b.book_id = l.book_id
+    WHERE r.book_id IS NOT NULL OR l.book_id IS NOT NULL;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE PROCEDURE recommend_books(IN p_user_id INT)
+BEGIN
+    -- Well rated books from the user's five most borrowed genres
+    SELECT b.book_id, b.title, a.first_name, a.last_name, g.genre_name,
+           s.avg_rating
+    FROM (
+        SELECT genre_id
+        FROM user_genre_affinity
+        WHERE user_id = p_user_id
+        ORDER BY loan_count DESC
+        LIMIT 5
+    ) top_genres
+    JOIN books b ON b.genre_id = top_genres.genre_id
+    JOIN book_stats s ON b.book_id = s.book_id
+    LEFT JOIN authors a ON b.author_id = a.author_id
+    LEFT JOIN genres g ON b.genre_id = g.genre_id
+    WHERE s.avg_rating >= 3.5
+        AND NOT EXISTS (
+            SELECT 1 FROM loans l
+            WHERE l.user_id = p_user_id AND l.book_id = b.book_id
+        )
+    ORDER BY avg_rating DESC, b.title ASC
+    LIMIT 20;
+
+    -- Books most often borrowed together with the user's recent loans
+    SELECT b.book_id, b.title, a.first_name, a.last_name, g.genre_name,
+           s.avg_rating
+    FROM (
+        SELECT c.other_book_id AS book_id, SUM(c.co_loan_count) AS score
+        FROM (
+            SELECT book_id
+            FROM loans
+            WHERE user_id = p_user_id
+            GROUP BY book_id
+            ORDER BY MAX(loan_id) DESC
+            LIMIT 20
+        ) recent
+        JOIN book_co_loans c ON c.book_id = recent.book_id
+        GROUP BY c.other_book_id
+    ) co_borrowed
+    JOIN books b ON b.book_id = co_borrowed.book_id
+    LEFT JOIN book_stats s ON b.book_id = s.book_id
+    LEFT JOIN authors a ON b.author_id = a.author_id
+    LEFT JOIN genres g ON b.genre_id = g.genre_id
+    WHERE NOT EXISTS (
+        SELECT 1 FROM loans l
+        WHERE l.user_id = p_user_id AND l.book_id = b.book_id
+    )
+    ORDER BY co_borrowed.score DESC, b.title ASC
+    LIMIT 10;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE PROCEDURE rebuild_recommendation_stats()
+BEGIN
+    -- Recompute every recommendation aggregate from the source tables
+    CALL rebuild_book_stats();
+
+    DELETE FROM user_genre_affinity;
+    INSERT INTO user_genre_affinity (user_id, genre_id, loan_count)
+    SELECT l.user_id, b.genre_id, COUNT(*)
+    FROM loans l
+    JOIN books b ON l.book_id = b.book_id
+    WHERE b.genre_id IS NOT NULL
+    GROUP BY l.user_id, b.genre_id;
+
+    DELETE FROM book_co_loans;
+    INSERT INTO book_co_loans (book_id, other_book_id, co_loan_count)
+    SELECT x.book_id, y.book_id, COUNT(*)
+    FROM (SELECT DISTINCT user_id, book_id FROM loans) x
+    JOIN (SELECT DISTINCT user_id, book_id FROM loans) y
+        ON x.user_id = y.user_id AND x.book_id <> y.book_id
+    GROUP BY x.book_id, y.book_id;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER add_loan_stats
+AFTER INSERT ON loans
+FOR EACH ROW
+BEGIN
+    INSERT INTO book_stats (book_id, loan_count, last_loaned_date)
+    VALUES (NEW.book_id, 1, NEW.loan_date)
+    ON DUPLICATE KEY UPDATE
+        loan_count = loan_count + 1,
+        last_loaned_date = GREATEST(
+            COALESCE(last_loaned_date, NEW.loan_date), NEW.loan_date
+        );
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER update_loan_stats
+AFTER UPDATE ON loans
+FOR EACH ROW
+BEGIN
+    -- Returning a book only sets return_date and leaves the stats alone
+    IF NOT (OLD.book_id <=> NEW.book_id) OR NOT (OLD.loan_date <=> NEW.loan_date) THEN
+        UPDATE book_stats
+        SET loan_count = loan_count - 1,
+            last_loaned_date = (
+                SELECT MAX(loan_date) FROM loans WHERE book_id = OLD.book_id
+            )
+        WHERE book_id = OLD.book_id;
+
+        INSERT INTO book_stats (book_id, loan_count, last_loaned_date)
+        VALUES (NEW.book_id, 1, NEW.loan_date)
+        ON DUPLICATE KEY UPDATE
+            loan_count = loan_count + 1,
+            last_loaned_date = (
+                SELECT MAX(loan_date) FROM loans WHERE book_id = NEW.book_id
+            );
+    END IF;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER remove_loan_stats
+AFTER DELETE ON loans
+FOR EACH ROW
+BEGIN
+    UPDATE book_stats
+    SET loan_count = loan_count - 1,
+        last_loaned_date = (
+            SELECT MAX(loan_date) FROM loans WHERE book_id = OLD.book_id
+        )
+    WHERE book_id = OLD.book_id;
+END$$
+
+DELIMITER ;
+
+CALL rebuild_book_stats();
@@ -0,0 +1,79 @@
+-- Incremental fine accrual.
+-- Replaces the daily full rewrite of every unpaid fine with accrue_fines(),
+-- which only opens fines for loans that crossed the 14-day threshold since
+-- its previous run. Unpaid amounts are derived on read by fine_balances.
+USE librarydb;
+
+ALTER TABLE fines
+    ADD COLUMN accrues_from DATE AFTER loan_id,
+    MODIFY COLUMN amount DECIMAL(7,2);
+
+UPDATE fines f
+JOIN loans l ON f.loan_id = l.loan_id
+SET f.accrues_from = DATE_ADD(l.loan_date, INTERVAL 14 DAY);
+
+CREATE TABLE IF NOT EXISTS job_state (
+    job_name VARCHAR(50) PRIMARY KEY,
+    last_run DATE
+);
+
+CREATE INDEX IF NOT EXISTS idx_loans_date_return ON loans (loan_date, return_date);
+
+CREATE VIEW fine_balances AS
+SELECT
+    f.fine_id,
+    f.loan_id,
+    l.user_id,
+    f.status,
+    CASE
+        WHEN f.status = 'paid' THEN f.amount
+        -- 5 per day from the first overdue day until today or the return
+        ELSE DATEDIFF(COALESCE(l.return_date, CURDATE()), f.accrues_from) * 5
+    END AS amount
+FROM fines f
+JOIN loans l ON f.loan_id = l.loan_id;
+
+DELIMITER $$
+
+CREATE PROCEDURE accrue_fines()
+BEGIN
+    -- Open a fine for every loan that became overdue since the last run.
+    -- Amounts are not stored while a fine is unpaid: fine_balances derives
+    -- them from accrues_from, so existing fines never need rewriting.
+    DECLARE v_last_run DATE;
+
+    SELECT last_run INTO v_last_run
+    FROM job_state
+    WHERE job_name = 'accrue_fines';
+
+    INSERT INTO fines (loan_id, accrues_from, status)
+    SELECT l.loan_id, DATE_ADD(l.loan_date, INTERVAL 14 DAY), 'unpaid'
+    FROM loans l
+    WHERE l.loan_date < DATE_SUB(CURDATE(), INTERVAL 14 DAY)
+        -- Loans already overdue at the previous run were handled then
+        AND (v_last_run IS NULL
+             OR l.loan_date >= DATE_SUB(v_last_run, INTERVAL 14 DAY))
+        AND l.return_date IS NULL
+        AND NOT EXISTS (
+            SELECT 1 FROM fines f WHERE f.loan_id = l.loan_id
+        );
+
+    INSERT INTO job_state (job_name, last_run)
+    VALUES ('accrue_fines', CURDATE())
+    ON DUPLICATE KEY UPDATE last_run = CURDATE();
+END$$
+
+DELIMITER ;
+
+DROP EVENT IF EXISTS update_fines;
+
+DELIMITER $$
+CREATE EVENT update_fines
+ON SCHEDULE EVERY 1 DAY
+STARTS CURRENT_TIMESTAMP
+DO
+BEGIN
+    CALL accrue_fines();
+END$$
+
+DELIMITER ;
@@ -0,0 +1,55 @@
+-- Fines panel.
+-- Exposes book and loan dates through fine_balances for the per-loan
+-- detail view and adds pay_fine().
+USE librarydb;
+
+CREATE OR REPLACE VIEW fine_balances AS
+SELECT
+    f.fine_id,
+    f.loan_id,
+    l.user_id,
+    l.book_id,
+    l.loan_date,
+    l.return_date,
+    f.status,
+    CASE
+        WHEN f.status = 'paid' THEN f.amount
+        -- 5 per day from the first overdue day until today or the return
+        ELSE DATEDIFF(COALESCE(l.return_date, CURDATE()), f.accrues_from) * 5
+    END AS amount
+FROM fines f
+JOIN loans l ON f.loan_id = l.loan_id;
+
+DELIMITER $$
+
+CREATE PROCEDURE pay_fine(
+    IN p_user_id INT,
+    IN p_fine_id INT
+)
+BEGIN
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+
+    -- Freeze the amount accrued so far and mark the fine as settled
+    UPDATE fines f
+    JOIN loans l ON f.loan_id = l.loan_id
+    SET f.amount = DATEDIFF(COALESCE(l.return_date, CURDATE()), f.accrues_from) * 5,
+        f.status = 'paid'
+    WHERE f.fine_id = p_fine_id
+        AND l.user_id = p_user_id
+        AND f.status = 'unpaid';
+
+    IF ROW_COUNT() = 0 THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'This fine is not payable.';
+    END IF;
+
+    COMMIT;
+END$$
+
+DELIMITER ;
@@ -0,0 +1,12 @@
+-- Incremental notification feed.
+-- Adds per-user read markers and the index that serves both the newest
+-- page and "since last seen id" polling.
+USE librarydb;
+
+CREATE TABLE IF NOT EXISTS notification_reads (
+    user_id INT PRIMARY KEY,
+    last_read_id INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_notifications_user ON notifications (user_id, notification_id);
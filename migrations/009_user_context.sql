@@ -0,0 +1,51 @@
+-- Session context.
+-- Adds load_user_context(), which returns a user's profile, membership,
+-- open loans, fine balance, unread count and review count in one call.
+USE librarydb;
+
+DELIMITER $$
+
+CREATE PROCEDURE load_user_context(IN p_user_id INT)
+BEGIN
+    -- Everything the dashboard needs at login, one result set each
+
+    -- Profile with the current membership, if any
+    SELECT u.first_name, u.last_name, u.email, u.role,
+           m.membership_type, m.end_date
+    FROM users u
+    LEFT JOIN memberships m ON m.membership_id = (
+        SELECT membership_id
+        FROM memberships
+        WHERE user_id = u.user_id
+            AND (end_date IS NULL OR end_date >= CURDATE())
+        ORDER BY end_date DESC
+        LIMIT 1
+    )
+    WHERE u.user_id = p_user_id;
+
+    -- Open loans
+    SELECT l.loan_id, l.book_id, b.title, l.loan_date
+    FROM loans l
+    JOIN books b ON l.book_id = b.book_id
+    WHERE l.user_id = p_user_id AND l.return_date IS NULL
+    ORDER BY l.loan_date, l.loan_id;
+
+    -- Outstanding fines
+    SELECT COALESCE(SUM(amount), 0), COUNT(*)
+    FROM fine_balances
+    WHERE user_id = p_user_id AND status = 'unpaid';
+
+    -- Unread notifications
+    SELECT COUNT(*)
+    FROM notifications n
+    LEFT JOIN notification_reads r ON r.user_id = n.user_id
+    WHERE n.user_id = p_user_id
+        AND n.notification_id > COALESCE(r.last_read_id, 0);
+
+    -- Reviews written
+    SELECT COUNT(*)
+    FROM ratings
+    WHERE user_id = p_user_id;
+END$$
+
+DELIMITER ;
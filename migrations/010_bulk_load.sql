@@ -0,0 +1,101 @@
+-- Bulk-load switch for the aggregate triggers.
+-- Sessions that set @bulk_load skip the per-row maintenance of book_stats,
+-- user_genre_affinity and book_co_loans; they are expected to
+-- CALL rebuild_recommendation_stats(); once the load is done.
+USE librarydb;
+
+DROP TRIGGER IF EXISTS track_loan_recommendations;
+
+DELIMITER $$
+
+CREATE TRIGGER track_loan_recommendations
+AFTER INSERT ON loans
+FOR EACH ROW
+BEGIN
+    DECLARE v_genre_id INT;
+
+    -- Bulk loads set @bulk_load and rebuild the aggregates afterwards
+    IF @bulk_load IS NULL THEN
+        SELECT genre_id INTO v_genre_id FROM books WHERE book_id = NEW.book_id;
+
+        IF v_genre_id IS NOT NULL THEN
+            INSERT INTO user_genre_affinity (user_id, genre_id, loan_count)
+            VALUES (NEW.user_id, v_genre_id, 1)
+            ON DUPLICATE KEY UPDATE loan_count = loan_count + 1;
+        END IF;
+
+        -- Pair the book with the user's other recent books, once per user
+        IF NOT EXISTS (
+            SELECT 1 FROM loans
+            WHERE user_id = NEW.user_id
+                AND book_id = NEW.book_id
+                AND loan_id <> NEW.loan_id
+        ) THEN
+            INSERT INTO book_co_loans (book_id, other_book_id, co_loan_count)
+            SELECT NEW.book_id, prior.book_id, 1
+            FROM (
+                SELECT book_id FROM loans
+                WHERE user_id = NEW.user_id AND book_id <> NEW.book_id
+                GROUP BY book_id
+                ORDER BY MAX(loan_id) DESC
+                LIMIT 50
+            ) prior
+            ON DUPLICATE KEY UPDATE co_loan_count = co_loan_count + 1;
+
+            INSERT INTO book_co_loans (book_id, other_book_id, co_loan_count)
+            SELECT prior.book_id, NEW.book_id, 1
+            FROM (
+                SELECT book_id FROM loans
+                WHERE user_id = NEW.user_id AND book_id <> NEW.book_id
+                GROUP BY book_id
+                ORDER BY MAX(loan_id) DESC
+                LIMIT 50
+            ) prior
+            ON DUPLICATE KEY UPDATE co_loan_count = co_loan_count + 1;
+        END IF;
+    END IF;
+END$$
+
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS add_loan_stats;
+
+DELIMITER $$
+
+CREATE TRIGGER add_loan_stats
+AFTER INSERT ON loans
+FOR EACH ROW
+BEGIN
+    -- Bulk loads set @bulk_load and rebuild the aggregates afterwards
+    IF @bulk_load IS NULL THEN
+        INSERT INTO book_stats (book_id, loan_count, last_loaned_date)
+        VALUES (NEW.book_id, 1, NEW.loan_date)
+        ON DUPLICATE KEY UPDATE
+            loan_count = loan_count + 1,
+            last_loaned_date = GREATEST(
+                COALESCE(last_loaned_date, NEW.loan_date), NEW.loan_date
+            );
+    END IF;
+END$$
+
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS add_rating_stats;
+
+DELIMITER $$
+
+CREATE TRIGGER add_rating_stats
+AFTER INSERT ON ratings
+FOR EACH ROW
+BEGIN
+    -- Bulk loads set @bulk_load and rebuild the aggregates afterwards
+    IF @bulk_load IS NULL THEN
+        INSERT INTO book_stats (book_id, rating_count, rating_sum)
+        VALUES (NEW.book_id, 1, NEW.rating)
+        ON DUPLICATE KEY UPDATE
+            rating_count = rating_count + 1,
+            rating_sum = rating_sum + NEW.rating;
+    END IF;
+END$$
+
+DELIMITER ;
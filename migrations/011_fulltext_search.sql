@@ -0,0 +1,8 @@
+-- Ranked full-text search over titles, author names and reviews.
+-- Word prefixes shorter than innodb_ft_min_token_size (3) are not indexed;
+-- the application falls back to LIKE prefix search for those.
+USE librarydb;
+
+CREATE FULLTEXT INDEX IF NOT EXISTS ft_books_title ON books (title);
+CREATE FULLTEXT INDEX IF NOT EXISTS ft_authors_name ON authors (first_name, last_name);
+CREATE FULLTEXT INDEX IF NOT EXISTS ft_ratings_review ON ratings (review);
@@ -0,0 +1,444 @@
+-- Partitioned logs and notifications, archived loan history.
+-- logs and notifications become RANGE COLUMNS partitioned by month on
+-- created_at, so expiring old rows is a DROP PARTITION instead of a
+-- DELETE. Partitioned InnoDB tables cannot have foreign keys, and the
+-- partitioning column must be part of the primary key.
+-- loans stays unpartitioned (fines reference it and every access is by
+-- loan_id or user); archive_loans() instead moves closed loans older than
+-- N months into loan_history, keeping the hot table small.
+-- The history_maintenance event runs both jobs daily.
+USE librarydb;
+
+ALTER TABLE logs
+    DROP FOREIGN KEY IF EXISTS logs_ibfk_1,
+    MODIFY COLUMN created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (log_id, created_at);
+
+ALTER TABLE logs
+    PARTITION BY RANGE COLUMNS (created_at) (
+        PARTITION p_future VALUES LESS THAN (MAXVALUE)
+    );
+
+ALTER TABLE notifications
+    DROP FOREIGN KEY IF EXISTS notifications_ibfk_1,
+    MODIFY COLUMN created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (notification_id, created_at);
+
+ALTER TABLE notifications
+    PARTITION BY RANGE COLUMNS (created_at) (
+        PARTITION p_future VALUES LESS THAN (MAXVALUE)
+    );
+
+CREATE TABLE IF NOT EXISTS loan_history (
+    loan_id INT PRIMARY KEY,
+    user_id INT NOT NULL,
+    book_id INT NOT NULL,
+    loan_date DATE NOT NULL,
+    return_date DATE NOT NULL,
+    -- Sum of the paid fines of the loan, if any
+    fine_amount DECIMAL(7,2)
+);
+
+CREATE INDEX IF NOT EXISTS idx_loan_history_user_book
+    ON loan_history (user_id, book_id);
+
+-- Every loan ever made, for rebuilds and reporting
+CREATE OR REPLACE VIEW all_loans AS
+SELECT loan_id, user_id, book_id, loan_date, return_date FROM loans
+UNION ALL
+SELECT loan_id, user_id, book_id, loan_date, return_date FROM loan_history;
+
+CREATE OR REPLACE VIEW standard_user_loans AS
+SELECT
+    u.user_id,
+    CONCAT(u.first_name, ' ', u.last_name) AS full_name,
+    COUNT(l.loan_id) AS total_loans
+FROM
+    users u
+JOIN
+    memberships m ON u.user_id = m.user_id
+JOIN
+    all_loans l ON u.user_id = l.user_id
+WHERE
+    m.membership_type = 'standard'
+GROUP BY
+    u.user_id, u.first_name, u.last_name;
+
+CREATE OR REPLACE VIEW premium_user_loans AS
+SELECT
+    u.user_id,
+    CONCAT(u.first_name, ' ', u.last_name) AS full_name,
+    COUNT(l.loan_id) AS total_loans
+FROM
+    users u
+JOIN
+    memberships m ON u.user_id = m.user_id
+JOIN
+    all_loans l ON u.user_id = l.user_id
+WHERE
+    m.membership_type = 'premium'
+GROUP BY
+    u.user_id, u.first_name, u.last_name;
+
+DROP PROCEDURE IF EXISTS maintain_partitions;
+DROP PROCEDURE IF EXISTS archive_loans;
+DROP PROCEDURE IF EXISTS fetch_unrated_books;
+DROP PROCEDURE IF EXISTS recommend_books;
+DROP PROCEDURE IF EXISTS rebuild_book_stats;
+DROP PROCEDURE IF EXISTS rebuild_recommendation_stats;
+DROP TRIGGER IF EXISTS track_loan_recommendations;
+DROP TRIGGER IF EXISTS remove_loan_stats;
+
+DELIMITER $$
+
+CREATE PROCEDURE maintain_partitions(
+    IN p_table VARCHAR(64),
+    IN p_keep_months INT
+)
+BEGIN
+    -- Partition pYYYYMM holds the rows created before the month after
+    -- YYYYMM (the oldest one also holds everything before); p_future
+    -- catches rows beyond the last monthly partition.
+    DECLARE v_month DATE DEFAULT DATE_FORMAT(CURDATE(), '%Y-%m-01');
+    DECLARE v_oldest_kept VARCHAR(64) DEFAULT CONCAT(
+        'p', DATE_FORMAT(DATE_SUB(CURDATE(), INTERVAL p_keep_months MONTH), '%Y%m')
+    );
+    DECLARE v_name VARCHAR(64);
+
+    IF p_table NOT IN ('logs', 'notifications') THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Table is not partitioned by month.';
+    END IF;
+
+    -- Split this month and the next two off p_future ahead of time
+    WHILE v_month <= DATE_ADD(CURDATE(), INTERVAL 2 MONTH) DO
+        SET v_name = CONCAT('p', DATE_FORMAT(v_month, '%Y%m'));
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = p_table
+                AND PARTITION_NAME >= v_name
+                AND PARTITION_NAME <> 'p_future'
+        ) THEN
+            EXECUTE IMMEDIATE CONCAT(
+                'ALTER TABLE ', p_table,
+                ' REORGANIZE PARTITION p_future INTO (PARTITION ', v_name,
+                ' VALUES LESS THAN (''', DATE_ADD(v_month, INTERVAL 1 MONTH),
+                '''), PARTITION p_future VALUES LESS THAN (MAXVALUE))'
+            );
+        END IF;
+        SET v_month = DATE_ADD(v_month, INTERVAL 1 MONTH);
+    END WHILE;
+
+    -- Expire whole months past the retention period
+    drop_expired: LOOP
+        SELECT MIN(PARTITION_NAME) INTO v_name
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE()
+            AND TABLE_NAME = p_table
+            AND PARTITION_NAME < v_oldest_kept
+            AND PARTITION_NAME <> 'p_future';
+
+        IF v_name IS NULL THEN
+            LEAVE drop_expired;
+        END IF;
+        EXECUTE IMMEDIATE CONCAT(
+            'ALTER TABLE ', p_table, ' DROP PARTITION ', v_name
+        );
+    END LOOP;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE PROCEDURE archive_loans(IN p_months INT)
+BEGIN
+    -- Move loans returned more than p_months ago, and their paid fines,
+    -- into loan_history in batches. Loans with unpaid fines stay put.
+    DECLARE v_cutoff DATE DEFAULT DATE_SUB(CURDATE(), INTERVAL p_months MONTH);
+    DECLARE v_moved INT DEFAULT 1;
+
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        SET @archiving = NULL;
+        DROP TEMPORARY TABLE IF EXISTS archive_batch;
+        RESIGNAL;
+    END;
+
+    -- Archived loans still count towards book_stats and the other
+    -- aggregates, so remove_loan_stats must not undo them
+    SET @archiving = 1;
+    CREATE TEMPORARY TABLE archive_batch (loan_id INT PRIMARY KEY);
+
+    WHILE v_moved > 0 DO
+        START TRANSACTION;
+
+        -- A loan is returned after it was made, so the loan_date range
+        -- (idx_loans_date_return) bounds the scan
+        INSERT INTO archive_batch (loan_id)
+        SELECT l.loan_id
+        FROM loans l
+        WHERE l.loan_date < v_cutoff
+            AND l.return_date < v_cutoff
+            AND NOT EXISTS (
+                SELECT 1 FROM fines f
+                WHERE f.loan_id = l.loan_id AND f.status = 'unpaid'
+            )
+        LIMIT 5000;
+
+        INSERT INTO loan_history
+            (loan_id, user_id, book_id, loan_date, return_date, fine_amount)
+        SELECT l.loan_id, l.user_id, l.book_id, l.loan_date, l.return_date,
+               (SELECT SUM(f.amount) FROM fines f WHERE f.loan_id = l.loan_id)
+        FROM archive_batch a
+        JOIN loans l ON l.loan_id = a.loan_id;
+
+        DELETE f FROM fines f JOIN archive_batch a ON f.loan_id = a.loan_id;
+        DELETE l FROM loans l JOIN archive_batch a ON l.loan_id = a.loan_id;
+        SET v_moved = ROW_COUNT();
+
+        DELETE FROM archive_batch;
+        COMMIT;
+    END WHILE;
+
+    DROP TEMPORARY TABLE archive_batch;
+    SET @archiving = NULL;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE PROCEDURE fetch_unrated_books (
+    IN p_user_id INT
+)
+BEGIN
+    SELECT b.book_id, b.title
+    FROM (
+        SELECT book_id FROM loans WHERE user_id = p_user_id
+        UNION
+        SELECT book_id FROM loan_history WHERE user_id = p_user_id
+    ) borrowed
+    JOIN books b ON borrowed.book_id = b.book_id
+    LEFT JOIN ratings r ON borrowed.book_id = r.book_id AND r.user_id = p_user_id
+    WHERE r.rating IS NULL;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE PROCEDURE recommend_books(IN p_user_id INT)
+BEGIN
+    -- Well rated books from the user's five most borrowed genres
+    SELECT b.book_id, b.title, a.first_name, a.last_name, g.genre_name,
+           s.avg_rating
+    FROM (
+        SELECT genre_id
+        FROM user_genre_affinity
+        WHERE user_id = p_user_id
+        ORDER BY loan_count DESC
+        LIMIT 5
+    ) top_genres
+    JOIN books b ON b.genre_id = top_genres.genre_id
+    JOIN book_stats s ON b.book_id = s.book_id
+    LEFT JOIN authors a ON b.author_id = a.author_id
+    LEFT JOIN genres g ON b.genre_id = g.genre_id
+    WHERE s.avg_rating >= 3.5
+        AND NOT EXISTS (
+            SELECT 1 FROM loans l
+            WHERE l.user_id = p_user_id AND l.book_id = b.book_id
+        )
+        AND NOT EXISTS (
+            SELECT 1 FROM loan_history h
+            WHERE h.user_id = p_user_id AND h.book_id = b.book_id
+        )
+    ORDER BY avg_rating DESC, b.title ASC
+    LIMIT 20;
+
+    -- Books most often borrowed together with the user's recent loans
+    -- (archived loans are old enough not to count as recent)
+    SELECT b.book_id, b.title, a.first_name, a.last_name, g.genre_name,
+           s.avg_rating
+    FROM (
+        SELECT c.other_book_id AS book_id, SUM(c.co_loan_count) AS score
+        FROM (
+            SELECT book_id
+            FROM loans
+            WHERE user_id = p_user_id
+            GROUP BY book_id
+            ORDER BY MAX(loan_id) DESC
+            LIMIT 20
+        ) recent
+        JOIN book_co_loans c ON c.book_id = recent.book_id
+        GROUP BY c.other_book_id
+    ) co_borrowed
+    JOIN books b ON b.book_id = co_borrowed.book_id
+    LEFT JOIN book_stats s ON b.book_id = s.book_id
+    LEFT JOIN authors a ON b.author_id = a.author_id
+    LEFT JOIN genres g ON b.genre_id = g.genre_id
+    WHERE NOT EXISTS (
+        SELECT 1 FROM loans l
+        WHERE l.user_id = p_user_id AND l.book_id = b.book_id
+    )
+        AND NOT EXISTS (
+            SELECT 1 FROM loan_history h
+            WHERE h.user_id = p_user_id AND h.book_id = b.book_id
+        )
+    ORDER BY co_borrowed.score DESC, b.title ASC
+    LIMIT 10;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE PROCEDURE rebuild_book_stats()
+BEGIN
+    -- Recompute book_stats from ratings and loans. Used to backfill the
+    -- table and to repair drift, e.g. after ratings were removed by a
+    -- cascading delete (which fires no triggers).
+    DELETE FROM book_stats;
+    INSERT INTO book_stats
+        (book_id, rating_count, rating_sum, loan_count, last_loaned_date)
+    SELECT b.book_id,
+           COALESCE(r.rating_count, 0),
+           COALESCE(r.rating_sum, 0),
+           COALESCE(l.loan_count, 0),
+           l.last_loaned_date
+    FROM books b
+    LEFT JOIN (
+        SELECT book_id, COUNT(rating) AS rating_count, SUM(rating) AS rating_sum
+        FROM ratings
+        GROUP BY book_id
+    ) r ON b.book_id = r.book_id
+    LEFT JOIN (
+        SELECT book_id, COUNT(*) AS loan_count, MAX(loan_date) AS last_loaned_date
+        FROM all_loans
+        GROUP BY book_id
+    ) l ON b.book_id = l.book_id
+    WHERE r.book_id IS NOT NULL OR l.book_id IS NOT NULL;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE PROCEDURE rebuild_recommendation_stats()
+BEGIN
+    -- Recompute every recommendation aggregate from the source tables
+    CALL rebuild_book_stats();
+
+    DELETE FROM user_genre_affinity;
+    INSERT INTO user_genre_affinity (user_id, genre_id, loan_count)
+    SELECT l.user_id, b.genre_id, COUNT(*)
+    FROM all_loans l
+    JOIN books b ON l.book_id = b.book_id
+    WHERE b.genre_id IS NOT NULL
+    GROUP BY l.user_id, b.genre_id;
+
+    DELETE FROM book_co_loans;
+    INSERT INTO book_co_loans (book_id, other_book_id, co_loan_count)
+    SELECT x.book_id, y.book_id, COUNT(*)
+    FROM (SELECT DISTINCT user_id, book_id FROM all_loans) x
+    JOIN (SELECT DISTINCT user_id, book_id FROM all_loans) y
+        ON x.user_id = y.user_id AND x.book_id <> y.book_id
+    GROUP BY x.book_id, y.book_id;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER track_loan_recommendations
+AFTER INSERT ON loans
+FOR EACH ROW
+BEGIN
+    DECLARE v_genre_id INT;
+
+    -- Bulk loads set @bulk_load and rebuild the aggregates afterwards
+    IF @bulk_load IS NULL THEN
+        SELECT genre_id INTO v_genre_id FROM books WHERE book_id = NEW.book_id;
+
+        IF v_genre_id IS NOT NULL THEN
+            INSERT INTO user_genre_affinity (user_id, genre_id, loan_count)
+            VALUES (NEW.user_id, v_genre_id, 1)
+            ON DUPLICATE KEY UPDATE loan_count = loan_count + 1;
+        END IF;
+
+        -- Pair the book with the user's other recent books, once per user
+        IF NOT EXISTS (
+            SELECT 1 FROM loans
+            WHERE user_id = NEW.user_id
+                AND book_id = NEW.book_id
+                AND loan_id <> NEW.loan_id
+        ) AND NOT EXISTS (
+            SELECT 1 FROM loan_history
+            WHERE user_id = NEW.user_id AND book_id = NEW.book_id
+        ) THEN
+            INSERT INTO book_co_loans (book_id, other_book_id, co_loan_count)
+            SELECT NEW.book_id, prior.book_id, 1
+            FROM (
+                SELECT book_id FROM loans
+                WHERE user_id = NEW.user_id AND book_id <> NEW.book_id
+                GROUP BY book_id
+                ORDER BY MAX(loan_id) DESC
+                LIMIT 50
+            ) prior
+            ON DUPLICATE KEY UPDATE co_loan_count = co_loan_count + 1;
+
+            INSERT INTO book_co_loans (book_id, other_book_id, co_loan_count)
+            SELECT prior.book_id, NEW.book_id, 1
+            FROM (
+                SELECT book_id FROM loans
+                WHERE user_id = NEW.user_id AND book_id <> NEW.book_id
+                GROUP BY book_id
+                ORDER BY MAX(loan_id) DESC
+                LIMIT 50
+            ) prior
+            ON DUPLICATE KEY UPDATE co_loan_count = co_loan_count + 1;
+        END IF;
+    END IF;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER remove_loan_stats
+AFTER DELETE ON loans
+FOR EACH ROW
+BEGIN
+    -- Archiving moves loans to loan_history; they still count
+    IF @archiving IS NULL THEN
+        UPDATE book_stats
+        SET loan_count = loan_count - 1,
+            last_loaned_date = (
+                SELECT MAX(loan_date) FROM loans WHERE book_id = OLD.book_id
+            )
+        WHERE book_id = OLD.book_id;
+    END IF;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE EVENT IF NOT EXISTS history_maintenance
+ON SCHEDULE EVERY 1 DAY
+STARTS CURRENT_TIMESTAMP
+DO
+BEGIN
+    CALL maintain_partitions('logs', 24);
+    CALL maintain_partitions('notifications', 12);
+    CALL archive_loans(12);
+END$$
+
+DELIMITER ;
+
+CALL maintain_partitions('logs', 24);
+CALL maintain_partitions('notifications', 12);
@@ -0,0 +1,7 @@
+-- Deferred audit logging.
+-- Loans, returns and donations are now logged by the application's
+-- AuditLog, which batches them into multi-row INSERTs outside the
+-- transactions they describe, instead of by a per-row trigger.
+USE librarydb;
+
+DROP TRIGGER IF EXISTS log_loan_operations;
@@ -0,0 +1,146 @@
+-- Batch checkout and return.
+-- issue_books() and return_books() take JSON arrays of ids and handle a
+-- whole desk transaction (5-10 items) in one call and one transaction:
+-- availability of every item is checked under one locking read and the
+-- copy counts are updated set-wise.
+USE librarydb;
+
+DELIMITER $$
+
+CREATE PROCEDURE issue_books(
+    IN p_user_id INT,
+    IN p_book_ids TEXT
+)
+BEGIN
+    -- Lend one copy per entry of the JSON array p_book_ids (an id repeated
+    -- n times asks for n copies) in a single transaction. Entries without
+    -- a copy left are skipped; the loans opened are returned in request
+    -- order as (loan_id, book_id, title, loan_date).
+    DECLARE v_locked INT;
+    DECLARE v_first_loan INT;
+    DECLARE v_issued INT;
+
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        DROP TEMPORARY TABLE IF EXISTS issue_claims;
+        RESIGNAL;
+    END;
+
+    DROP TEMPORARY TABLE IF EXISTS issue_claims;
+    START TRANSACTION;
+
+    -- Lock every requested book with one read so the claims below see
+    -- the final counts
+    SELECT COUNT(*) INTO v_locked
+    FROM books
+    WHERE book_id IN (
+        SELECT book_id
+        FROM JSON_TABLE(p_book_ids, '$[*]' COLUMNS (book_id INT PATH '$')) req
+    )
+    FOR UPDATE;
+
+    -- The nth request for a book is granted if it has at least n copies
+    CREATE TEMPORARY TABLE issue_claims ENGINE = MEMORY AS
+    SELECT req.item, req.book_id
+    FROM (
+        SELECT item, book_id,
+               ROW_NUMBER() OVER (PARTITION BY book_id ORDER BY item) AS copy
+        FROM JSON_TABLE(
+            p_book_ids, '$[*]'
+            COLUMNS (item FOR ORDINALITY, book_id INT PATH '$')
+        ) j
+    ) req
+    JOIN books b ON b.book_id = req.book_id
+    WHERE req.copy <= b.available_copies;
+
+    UPDATE books b
+    JOIN (
+        SELECT book_id, COUNT(*) AS copies
+        FROM issue_claims
+        GROUP BY book_id
+    ) c ON b.book_id = c.book_id
+    SET b.available_copies = b.available_copies - c.copies;
+
+    INSERT INTO loans (user_id, book_id, loan_date)
+    SELECT p_user_id, book_id, CURDATE()
+    FROM issue_claims
+    ORDER BY item;
+    SET v_issued = ROW_COUNT();
+    SET v_first_loan = LAST_INSERT_ID();
+
+    COMMIT;
+    DROP TEMPORARY TABLE issue_claims;
+
+    SELECT l.loan_id, l.book_id, b.title, l.loan_date
+    FROM loans l
+    JOIN books b ON l.book_id = b.book_id
+    WHERE l.loan_id >= v_first_loan AND l.user_id = p_user_id
+    ORDER BY l.loan_id
+    LIMIT v_issued;
+END$$
+
+DELIMITER ;
+
+
+DELIMITER $$
+
+CREATE PROCEDURE return_books(
+    IN p_user_id INT,
+    IN p_loan_ids TEXT
+)
+BEGIN
+    -- Close every open loan of the user listed in the JSON array
+    -- p_loan_ids and restock the copies in a single transaction. Returns
+    -- the loan_id of each loan that was closed.
+    DECLARE v_locked INT;
+
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        DROP TEMPORARY TABLE IF EXISTS return_claims;
+        RESIGNAL;
+    END;
+
+    DROP TEMPORARY TABLE IF EXISTS return_claims;
+    START TRANSACTION;
+
+    SELECT COUNT(*) INTO v_locked
+    FROM loans
+    WHERE loan_id IN (
+        SELECT loan_id
+        FROM JSON_TABLE(p_loan_ids, '$[*]' COLUMNS (loan_id INT PATH '$')) req
+    )
+        AND user_id = p_user_id
+    FOR UPDATE;
+
+    CREATE TEMPORARY TABLE return_claims ENGINE = MEMORY AS
+    SELECT l.loan_id, l.book_id
+    FROM loans l
+    WHERE l.loan_id IN (
+        SELECT loan_id
+        FROM JSON_TABLE(p_loan_ids, '$[*]' COLUMNS (loan_id INT PATH '$')) req
+    )
+        AND l.user_id = p_user_id
+        AND l.return_date IS NULL;
+
+    UPDATE loans l
+    JOIN return_claims c ON l.loan_id = c.loan_id
+    SET l.return_date = CURDATE();
+
+    -- Several loans may return copies of the same book
+    UPDATE books b
+    JOIN (
+        SELECT book_id, COUNT(*) AS copies
+        FROM return_claims
+        GROUP BY book_id
+    ) c ON b.book_id = c.book_id
+    SET b.available_copies = b.available_copies + c.copies;
+
+    COMMIT;
+
+    SELECT loan_id FROM return_claims ORDER BY loan_id;
+    DROP TEMPORARY TABLE return_claims;
+END$$
+
+DELIMITER ;
@@ -0,0 +1,12 @@
+-- Item-item collaborative filtering.
+-- build_neighbours.py fills book_neighbours offline with the top-K most
+-- similar books of each book (cosine over loans and ratings); the
+-- dashboard reads a user's recommendations from it by primary key.
+USE librarydb;
+
+CREATE TABLE IF NOT EXISTS book_neighbours (
+    book_id INT,
+    neighbour_id INT,
+    score FLOAT NOT NULL,
+    PRIMARY KEY (book_id, neighbour_id)
+);
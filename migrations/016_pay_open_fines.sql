@@ -0,0 +1,63 @@
+-- Fines on loans that are still open.
+-- Paying such a fine used to end the charges for good, because
+-- accrue_fines() never opens a second fine for a loan. pay_fine() now
+-- opens a follow-on fine accruing from the day of payment while the book
+-- is still out, and refuses fines with nothing accrued yet.
+USE librarydb;
+
+DROP PROCEDURE IF EXISTS pay_fine;
+
+DELIMITER $$
+
+CREATE PROCEDURE pay_fine(
+    IN p_user_id INT,
+    IN p_fine_id INT
+)
+BEGIN
+    DECLARE v_loan_id INT;
+    DECLARE v_open BOOLEAN;
+
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+
+    -- Only fines with something accrued are payable; one opened today by
+    -- an earlier payment owes nothing yet
+    SELECT f.loan_id, l.return_date IS NULL
+    INTO v_loan_id, v_open
+    FROM fines f
+    JOIN loans l ON f.loan_id = l.loan_id
+    WHERE f.fine_id = p_fine_id
+        AND l.user_id = p_user_id
+        AND f.status = 'unpaid'
+        AND f.accrues_from < COALESCE(l.return_date, CURDATE())
+    FOR UPDATE;
+
+    IF v_loan_id IS NULL THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'This fine is not payable.';
+    END IF;
+
+    -- Freeze the amount accrued so far (every day before today) and mark
+    -- the fine as settled
+    UPDATE fines f
+    JOIN loans l ON f.loan_id = l.loan_id
+    SET f.amount = DATEDIFF(COALESCE(l.return_date, CURDATE()), f.accrues_from) * 5,
+        f.status = 'paid'
+    WHERE f.fine_id = p_fine_id;
+
+    -- The book is still out: keep charging from today on. accrue_fines
+    -- never revisits a loan that already has a fine.
+    IF v_open THEN
+        INSERT INTO fines (loan_id, accrues_from, status)
+        VALUES (v_loan_id, CURDATE(), 'unpaid');
+    END IF;
+
+    COMMIT;
+END$$
+
+DELIMITER ;
@@ -0,0 +1,97 @@
+-- Catalog search by title, author and genre together.
+-- books.search_text holds the title, author name and genre name of each
+-- book under one FULLTEXT index, so a query such as "orwell 1984" whose
+-- words span title and author matches, and genre names match again.
+-- Triggers keep the column current; renaming an author or genre clears
+-- it on their books, which makes the books trigger recompute it.
+USE librarydb;
+
+ALTER TABLE books ADD COLUMN IF NOT EXISTS search_text VARCHAR(255);
+
+DROP TRIGGER IF EXISTS add_book_search_text;
+DROP TRIGGER IF EXISTS update_book_search_text;
+DROP TRIGGER IF EXISTS rename_author_search_text;
+DROP TRIGGER IF EXISTS rename_genre_search_text;
+DROP FUNCTION IF EXISTS book_search_text;
+
+DELIMITER $$
+
+-- Words a catalog search matches: title, author name and genre name
+CREATE FUNCTION book_search_text(
+    p_title VARCHAR(50),
+    p_author_id INT,
+    p_genre_id INT
+)
+RETURNS VARCHAR(255)
+READS SQL DATA
+BEGIN
+    RETURN CONCAT_WS(
+        ' ',
+        p_title,
+        (SELECT CONCAT_WS(' ', first_name, last_name)
+         FROM authors WHERE author_id = p_author_id),
+        (SELECT genre_name FROM genres WHERE genre_id = p_genre_id)
+    );
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER add_book_search_text
+BEFORE INSERT ON books
+FOR EACH ROW
+BEGIN
+    SET NEW.search_text = book_search_text(NEW.title, NEW.author_id, NEW.genre_id);
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER update_book_search_text
+BEFORE UPDATE ON books
+FOR EACH ROW
+BEGIN
+    -- Loans update available_copies; only recompute when the words change,
+    -- or when an author or genre rename cleared the column
+    IF NEW.search_text IS NULL
+       OR NOT (NEW.title <=> OLD.title)
+       OR NOT (NEW.author_id <=> OLD.author_id)
+       OR NOT (NEW.genre_id <=> OLD.genre_id) THEN
+        SET NEW.search_text = book_search_text(NEW.title, NEW.author_id, NEW.genre_id);
+    END IF;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER rename_author_search_text
+AFTER UPDATE ON authors
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.first_name <=> OLD.first_name AND NEW.last_name <=> OLD.last_name) THEN
+        UPDATE books SET search_text = NULL WHERE author_id = NEW.author_id;
+    END IF;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER rename_genre_search_text
+AFTER UPDATE ON genres
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.genre_name <=> OLD.genre_name) THEN
+        UPDATE books SET search_text = NULL WHERE genre_id = NEW.genre_id;
+    END IF;
+END$$
+
+DELIMITER ;
+
+UPDATE books SET search_text = book_search_text(title, author_id, genre_id);
+
+CREATE FULLTEXT INDEX IF NOT EXISTS ft_books_search ON books (search_text);
+DROP INDEX IF EXISTS ft_authors_name ON authors;
@@ -0,0 +1,160 @@
+-- Co-loan pairs rebuilt by the trigger's own rule.
+-- rebuild_recommendation_stats() paired every two books a user ever
+-- borrowed, a self-join quadratic in each user's history, while the
+-- trigger only paired a new book with the user's 50 most recently
+-- borrowed open loans, so a rebuild changed the counts. Both now number a
+-- user's books by first loan (loans and loan_history alike) and pair each
+-- book with the 50 before it; the rebuild does it with a window over a
+-- temporary table, linear in the number of loans.
+USE librarydb;
+
+DROP PROCEDURE IF EXISTS rebuild_co_loans;
+DROP PROCEDURE IF EXISTS rebuild_recommendation_stats;
+DROP TRIGGER IF EXISTS track_loan_recommendations;
+
+DELIMITER $$
+
+CREATE PROCEDURE rebuild_co_loans()
+BEGIN
+    -- Same rule as track_loan_recommendations: number each user's books
+    -- in order of first loan, and pair every book with the 50 books
+    -- numbered just before and after it. At most 100 pairs per borrowed
+    -- book, so the cost grows linearly with the loans.
+    DECLARE v_user_id INT DEFAULT 0;
+    DECLARE v_last_user_id INT;
+
+    DROP TEMPORARY TABLE IF EXISTS first_loans;
+    CREATE TEMPORARY TABLE first_loans (
+        user_id INT NOT NULL,
+        seq INT NOT NULL,
+        book_id INT NOT NULL,
+        PRIMARY KEY (user_id, seq)
+    );
+    INSERT INTO first_loans (user_id, seq, book_id)
+    SELECT user_id,
+           ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY first_loan_id),
+           book_id
+    FROM (
+        SELECT user_id, book_id, MIN(loan_id) AS first_loan_id
+        FROM all_loans
+        GROUP BY user_id, book_id
+    ) f;
+    SELECT MAX(user_id) INTO v_last_user_id FROM first_loans;
+
+    DELETE FROM book_co_loans;
+    COMMIT;
+
+    -- A thousand users per statement keeps each sort and transaction small
+    WHILE v_user_id <= v_last_user_id DO
+        INSERT INTO book_co_loans (book_id, other_book_id, co_loan_count)
+        SELECT x.book_id, y.book_id, COUNT(*)
+        FROM first_loans x
+        JOIN first_loans y
+            ON y.user_id = x.user_id
+            AND y.seq BETWEEN x.seq - 50 AND x.seq + 50
+            AND y.seq <> x.seq
+        WHERE x.user_id BETWEEN v_user_id AND v_user_id + 999
+        GROUP BY x.book_id, y.book_id
+        ON DUPLICATE KEY UPDATE
+            co_loan_count = co_loan_count + VALUES(co_loan_count);
+        COMMIT;
+        SET v_user_id = v_user_id + 1000;
+    END WHILE;
+
+    DROP TEMPORARY TABLE first_loans;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE PROCEDURE rebuild_recommendation_stats()
+BEGIN
+    -- Recompute every recommendation aggregate from the source tables
+    CALL rebuild_book_stats();
+
+    DELETE FROM user_genre_affinity;
+    INSERT INTO user_genre_affinity (user_id, genre_id, loan_count)
+    SELECT l.user_id, b.genre_id, COUNT(*)
+    FROM all_loans l
+    JOIN books b ON l.book_id = b.book_id
+    WHERE b.genre_id IS NOT NULL
+    GROUP BY l.user_id, b.genre_id;
+
+    CALL rebuild_co_loans();
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER track_loan_recommendations
+AFTER INSERT ON loans
+FOR EACH ROW
+BEGIN
+    DECLARE v_genre_id INT;
+
+    -- Bulk loads set @bulk_load and rebuild the aggregates afterwards
+    IF @bulk_load IS NULL THEN
+        SELECT genre_id INTO v_genre_id FROM books WHERE book_id = NEW.book_id;
+
+        IF v_genre_id IS NOT NULL THEN
+            INSERT INTO user_genre_affinity (user_id, genre_id, loan_count)
+            VALUES (NEW.user_id, v_genre_id, 1)
+            ON DUPLICATE KEY UPDATE loan_count = loan_count + 1;
+        END IF;
+
+        -- The first loan of a book by a user pairs it with the 50 books
+        -- that user first borrowed just before it (rebuild_co_loans
+        -- applies the same rule)
+        IF NOT EXISTS (
+            SELECT 1 FROM loans
+            WHERE user_id = NEW.user_id
+                AND book_id = NEW.book_id
+                AND loan_id <> NEW.loan_id
+        ) AND NOT EXISTS (
+            SELECT 1 FROM loan_history
+            WHERE user_id = NEW.user_id AND book_id = NEW.book_id
+        ) THEN
+            INSERT INTO book_co_loans (book_id, other_book_id, co_loan_count)
+            SELECT NEW.book_id, prior.book_id, 1
+            FROM (
+                SELECT book_id
+                FROM (
+                    SELECT book_id, loan_id FROM loans
+                    WHERE user_id = NEW.user_id
+                    UNION ALL
+                    SELECT book_id, loan_id FROM loan_history
+                    WHERE user_id = NEW.user_id
+                ) seen
+                WHERE book_id <> NEW.book_id
+                GROUP BY book_id
+                ORDER BY MIN(loan_id) DESC
+                LIMIT 50
+            ) prior
+            ON DUPLICATE KEY UPDATE co_loan_count = co_loan_count + 1;
+
+            INSERT INTO book_co_loans (book_id, other_book_id, co_loan_count)
+            SELECT prior.book_id, NEW.book_id, 1
+            FROM (
+                SELECT book_id
+                FROM (
+                    SELECT book_id, loan_id FROM loans
+                    WHERE user_id = NEW.user_id
+                    UNION ALL
+                    SELECT book_id, loan_id FROM loan_history
+                    WHERE user_id = NEW.user_id
+                ) seen
+                WHERE book_id <> NEW.book_id
+                GROUP BY book_id
+                ORDER BY MIN(loan_id) DESC
+                LIMIT 50
+            ) prior
+            ON DUPLICATE KEY UPDATE co_loan_count = co_loan_count + 1;
+        END IF;
+    END IF;
+END$$
+
+DELIMITER ;
+
+CALL rebuild_co_loans();
@@ -0,0 +1,84 @@
+-- Atomic issue_book() and return_book() for existing databases.
+-- Both procedures and the CHECK on books.available_copies were only added
+-- to librarySetup.sql, so databases created before them never got them.
+-- Any rows that already went negative are clamped to 0 first so that the
+-- constraint can be added.
+USE librarydb;
+
+UPDATE books SET available_copies = 0 WHERE available_copies < 0;
+-- Named like the column-level CHECK of librarySetup.sql, so fresh
+-- installs already have it
+ALTER TABLE books
+    ADD CONSTRAINT IF NOT EXISTS available_copies
+    CHECK (available_copies >= 0);
+
+DROP PROCEDURE IF EXISTS issue_book;
+DROP PROCEDURE IF EXISTS return_book;
+
+DELIMITER $$
+
+CREATE PROCEDURE issue_book(
+    IN p_user_id INT,
+    IN p_book_id INT
+)
+BEGIN
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+
+    -- Claim a copy only if one is still available; the row lock taken by
+    -- the UPDATE serialises concurrent checkouts of the same book
+    UPDATE books
+    SET available_copies = available_copies - 1
+    WHERE book_id = p_book_id AND available_copies > 0;
+
+    IF ROW_COUNT() = 0 THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'No copies of this book are available.';
+    END IF;
+
+    INSERT INTO loans (user_id, book_id, loan_date)
+    VALUES (p_user_id, p_book_id, CURDATE());
+
+    COMMIT;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE PROCEDURE return_book(
+    IN p_user_id INT,
+    IN p_loan_id INT
+)
+BEGIN
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+
+    -- Close the loan and give the copy back in a single statement
+    UPDATE loans l
+    JOIN books b ON l.book_id = b.book_id
+    SET l.return_date = CURDATE(),
+        b.available_copies = b.available_copies + 1
+    WHERE l.loan_id = p_loan_id
+        AND l.user_id = p_user_id
+        AND l.return_date IS NULL;
+
+    IF ROW_COUNT() = 0 THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'This loan is not open.';
+    END IF;
+
+    COMMIT;
+END$$
+
+DELIMITER ;
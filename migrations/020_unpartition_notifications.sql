@@ -0,0 +1,101 @@
+-- Unpartition notifications.
+-- The feed, the unread count and polling all look notifications up by
+-- user and id, never by created_at, so every query read all monthly
+-- partitions. notifications goes back to a plain table with its
+-- original primary key and foreign key to users; history_maintenance
+-- deletes rows older than 12 months instead of dropping partitions.
+USE librarydb;
+
+ALTER TABLE notifications REMOVE PARTITIONING;
+ALTER TABLE notifications
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (notification_id);
+
+-- Users deleted while the table had no foreign key
+DELETE n FROM notifications n
+LEFT JOIN users u ON n.user_id = u.user_id
+WHERE n.user_id IS NOT NULL AND u.user_id IS NULL;
+
+ALTER TABLE notifications
+    ADD CONSTRAINT notifications_ibfk_1
+    FOREIGN KEY IF NOT EXISTS (user_id) REFERENCES users(user_id);
+CREATE INDEX IF NOT EXISTS idx_notifications_created ON notifications (created_at);
+
+DROP PROCEDURE IF EXISTS maintain_partitions;
+DROP EVENT IF EXISTS history_maintenance;
+
+DELIMITER $$
+
+CREATE PROCEDURE maintain_partitions(
+    IN p_table VARCHAR(64),
+    IN p_keep_months INT
+)
+BEGIN
+    -- Partition pYYYYMM holds the rows created before the month after
+    -- YYYYMM (the oldest one also holds everything before); p_future
+    -- catches rows beyond the last monthly partition.
+    DECLARE v_month DATE DEFAULT DATE_FORMAT(CURDATE(), '%Y-%m-01');
+    DECLARE v_oldest_kept VARCHAR(64) DEFAULT CONCAT(
+        'p', DATE_FORMAT(DATE_SUB(CURDATE(), INTERVAL p_keep_months MONTH), '%Y%m')
+    );
+    DECLARE v_name VARCHAR(64);
+
+    IF p_table <> 'logs' THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Table is not partitioned by month.';
+    END IF;
+
+    -- Split this month and the next two off p_future ahead of time
+    WHILE v_month <= DATE_ADD(CURDATE(), INTERVAL 2 MONTH) DO
+        SET v_name = CONCAT('p', DATE_FORMAT(v_month, '%Y%m'));
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = p_table
+                AND PARTITION_NAME >= v_name
+                AND PARTITION_NAME <> 'p_future'
+        ) THEN
+            EXECUTE IMMEDIATE CONCAT(
+                'ALTER TABLE ', p_table,
+                ' REORGANIZE PARTITION p_future INTO (PARTITION ', v_name,
+                ' VALUES LESS THAN (''', DATE_ADD(v_month, INTERVAL 1 MONTH),
+                '''), PARTITION p_future VALUES LESS THAN (MAXVALUE))'
+            );
+        END IF;
+        SET v_month = DATE_ADD(v_month, INTERVAL 1 MONTH);
+    END WHILE;
+
+    -- Expire whole months past the retention period
+    drop_expired: LOOP
+        SELECT MIN(PARTITION_NAME) INTO v_name
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE()
+            AND TABLE_NAME = p_table
+            AND PARTITION_NAME < v_oldest_kept
+            AND PARTITION_NAME <> 'p_future';
+
+        IF v_name IS NULL THEN
+            LEAVE drop_expired;
+        END IF;
+        EXECUTE IMMEDIATE CONCAT(
+            'ALTER TABLE ', p_table, ' DROP PARTITION ', v_name
+        );
+    END LOOP;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE EVENT history_maintenance
+ON SCHEDULE EVERY 1 DAY
+STARTS CURRENT_TIMESTAMP
+DO
+BEGIN
+    CALL maintain_partitions('logs', 24);
+    DELETE FROM notifications
+    WHERE created_at < DATE_SUB(CURDATE(), INTERVAL 12 MONTH);
+    CALL archive_loans(12);
+END$$
+
+DELIMITER ;
@@ -0,0 +1,8 @@
+-- Keyset order of the review browser.
+-- The book and reviewer sorts page on (title, book_id, rating_id) and
+-- (user_name, user_id, rating_id), so each book's or user's ratings are
+-- read in rating_id order from an index. ratings(book_id) already has
+-- that order through the implicit primary key; reviewers need this one.
+USE librarydb;
+
+CREATE INDEX IF NOT EXISTS idx_ratings_user_rating ON ratings (user_id, rating_id);
@@ -0,0 +1,73 @@
+-- Reviews without a rating in book_stats.
+-- ratings.rating is nullable, but the rating triggers counted such rows
+-- and added NULL to rating_sum, while rebuild_book_stats() uses
+-- COUNT(rating) and SUM(rating). The triggers now skip NULL ratings, and
+-- the table is rebuilt once to drop the drift.
+USE librarydb;
+
+DROP TRIGGER IF EXISTS add_rating_stats;
+DROP TRIGGER IF EXISTS update_rating_stats;
+DROP TRIGGER IF EXISTS remove_rating_stats;
+
+DELIMITER $$
+
+CREATE TRIGGER add_rating_stats
+AFTER INSERT ON ratings
+FOR EACH ROW
+BEGIN
+    -- Bulk loads set @bulk_load and rebuild the aggregates afterwards;
+    -- reviews without a rating count for nothing, as in rebuild_book_stats
+    IF @bulk_load IS NULL AND NEW.rating IS NOT NULL THEN
+        INSERT INTO book_stats (book_id, rating_count, rating_sum)
+        VALUES (NEW.book_id, 1, NEW.rating)
+        ON DUPLICATE KEY UPDATE
+            rating_count = rating_count + 1,
+            rating_sum = rating_sum + NEW.rating;
+    END IF;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER update_rating_stats
+AFTER UPDATE ON ratings
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.book_id <=> NEW.book_id) OR NOT (OLD.rating <=> NEW.rating) THEN
+        IF OLD.rating IS NOT NULL THEN
+            UPDATE book_stats
+            SET rating_count = rating_count - 1,
+                rating_sum = rating_sum - OLD.rating
+            WHERE book_id = OLD.book_id;
+        END IF;
+
+        IF NEW.rating IS NOT NULL THEN
+            INSERT INTO book_stats (book_id, rating_count, rating_sum)
+            VALUES (NEW.book_id, 1, NEW.rating)
+            ON DUPLICATE KEY UPDATE
+                rating_count = rating_count + 1,
+                rating_sum = rating_sum + NEW.rating;
+        END IF;
+    END IF;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+CREATE TRIGGER remove_rating_stats
+AFTER DELETE ON ratings
+FOR EACH ROW
+BEGIN
+    IF OLD.rating IS NOT NULL THEN
+        UPDATE book_stats
+        SET rating_count = rating_count - 1,
+            rating_sum = rating_sum - OLD.rating
+        WHERE book_id = OLD.book_id;
+    END IF;
+END$$
+
+DELIMITER ;
+
+CALL rebuild_book_stats();
@@ -0,0 +1,56 @@
+from queries import MAX_ID, QueryRegistry
+
+
+class Notifications:
+    """
+    Incremental access to a user's notifications.
+
+    Notifications are only ever appended, so the notification_id doubles
+    as a cursor: the dashboard keeps the highest id it has seen and asks
+    for anything newer, and history is paged backwards from the lowest.
+    Read state is a per-user high-water mark in notification_reads.
+    """
+
+    PAGE_SIZE = 20
+
+    def __init__(self, db_connection, queries=None):
+        self.db = db_connection
+        self.queries = queries or QueryRegistry(db_connection)
+
+    def fetch_page(self, user_id, after=None, before=None, limit=None):
+        """
+        Return up to ``limit`` notifications, newest first.
+
+        ``after`` restricts the page to ids above the given one (polling
+        for new notifications), ``before`` to ids below it (history).
+        Rows are ``(notification_id, notification_type, message,
+        created_at, unread)``.
+        """
+        limit = limit or Notifications.PAGE_SIZE
+        # Open bounds become the full id range so a single prepared
+        # statement serves polling, history and the first page
+        return self.queries.fetchall(
+            "notifications_page",
+            (
+                user_id,
+                0 if after is None else after,
+                MAX_ID if before is None else before,
+                limit,
+            ),
+        )
+
+    def poll(self, user_id, after=None, limit=None):
+        """
+        Return ``(rows, unread)``: the newest notifications above
+        ``after`` as for ``fetch_page``, and the unread count, which still
+        includes new notifications beyond ``limit``.
+        """
+        return self.fetch_page(user_id, after, None, limit), self.unread_count(user_id)
+
+    def unread_count(self, user_id):
+        """Number of notifications above the user's read marker."""
+        return self.queries.fetchone("unread_notifications", (user_id,))[0]
+
+    def mark_read(self, user_id, up_to_id):
+        """Move the user's read marker forward to ``up_to_id``."""
+        self.queries.run("mark_notifications_read", (user_id, up_to_id))
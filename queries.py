@@ -0,0 +1,251 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from mysql.connector import Error
+
+
+# Upper bound for open-ended id ranges in prepared statements
+MAX_ID = 2 ** 31 - 1
+
+# Returned by the server when a prepared statement no longer exists,
+# e.g. after the connection was re-established by a ping
+ER_UNKNOWN_STMT_HANDLER = 1243
+
+
+class QueryRegistry:
+    """
+    Named SQL statements, timed per statement by the connection's
+    Instrumentation.
+
+    Hot statements are executed through server-side prepared cursors.
+    Each pooled connection keeps one prepared cursor per statement, so a
+    statement is parsed once per connection rather than once per call.
+    Procedures that return result sets, and statements that run rarely,
+    go through plain cursors but are still timed.
+    """
+
+    # name -> (kind, SQL or procedure name)
+    # kind is "prepared", "text" or "proc"
+    STATEMENTS = {
+        # Login and registration
+        "login": (
+            "prepared",
+            "SELECT user_id, password FROM users WHERE user_name = %s",
+        ),
+        "upgrade_password": (
+            "prepared",
+            "UPDATE users SET password = %s "
+            "WHERE user_id = %s AND password = %s",
+        ),
+        "register_user": ("proc", "register_user"),
+        "load_user_context": ("proc", "load_user_context"),
+
+        # Loans
+        "issue_book": ("prepared", "CALL issue_book(%s, %s)"),
+        "issued_loan": (
+            "prepared",
+            """
+            SELECT l.loan_id, l.book_id, b.title, l.loan_date
+            FROM loans l
+            JOIN books b ON l.book_id = b.book_id
+            WHERE l.loan_id = LAST_INSERT_ID()
+            """,
+        ),
+        "return_book": ("prepared", "CALL return_book(%s, %s)"),
+        "issue_books": ("proc", "issue_books"),
+        "return_books": ("proc", "return_books"),
+        "donate_book": (
+            "text",
+            "INSERT INTO books (title, author_id, genre_id, publisher_id) "
+            "VALUES (%s, %s, %s, %s)",
+        ),
+
+        # Fines
+        "fine_balance": (
+            "prepared",
+            "SELECT COALESCE(SUM(amount), 0), COUNT(*) "
+            "FROM fine_balances "
+            "WHERE user_id = %s AND status = 'unpaid'",
+        ),
+        "fines_page": (
+            "prepared",
+            """
+            SELECT fb.fine_id, b.title, fb.loan_date, fb.return_date,
+                   fb.amount, fb.status
+            FROM fine_balances fb
+            JOIN books b ON fb.book_id = b.book_id
+            WHERE fb.user_id = %s AND fb.fine_id < %s
+            ORDER BY fb.fine_id DESC
+            LIMIT %s
+            """,
+        ),
+        "pay_fine": ("prepared", "CALL pay_fine(%s, %s)"),
+
+        # Notifications
+        "notifications_page": (
+            "prepared",
+            """
+            SELECT n.notification_id, n.notification_type, n.message,
+                   n.created_at,
+                   n.notification_id > COALESCE(r.last_read_id, 0) AS unread
+            FROM notifications n
+            LEFT JOIN notification_reads r ON r.user_id = n.user_id
+            WHERE n.user_id = %s
+                AND n.notification_id > %s
+                AND n.notification_id < %s
+            ORDER BY n.notification_id DESC
+            LIMIT %s
+            """,
+        ),
+        "unread_notifications": (
+            "prepared",
+            """
+            SELECT COUNT(*)
+            FROM notifications n
+            LEFT JOIN notification_reads r ON r.user_id = n.user_id
+            WHERE n.user_id = %s
+                AND n.notification_id > COALESCE(r.last_read_id, 0)
+            """,
+        ),
+        "mark_notifications_read": (
+            "prepared",
+            """
+            INSERT INTO notification_reads (user_id, last_read_id)
+            VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE
+                last_read_id = GREATEST(last_read_id, VALUES(last_read_id))
+            """,
+        ),
+
+        # Recommendations and reviews
+        "neighbour_recommendations": (
+            "prepared",
+            """
+            SELECT b.book_id, b.title, a.first_name, a.last_name, g.genre_name,
+                   s.avg_rating
+            FROM (
+                SELECT n.neighbour_id AS book_id, SUM(n.score) AS score
+                FROM (
+                    SELECT book_id
+                    FROM loans
+                    WHERE user_id = %s
+                    GROUP BY book_id
+                    ORDER BY MAX(loan_id) DESC
+                    LIMIT 20
+                ) recent
+                JOIN book_neighbours n ON n.book_id = recent.book_id
+                GROUP BY n.neighbour_id
+            ) similar
+            JOIN books b ON b.book_id = similar.book_id
+            LEFT JOIN book_stats s ON b.book_id = s.book_id
+            LEFT JOIN authors a ON b.author_id = a.author_id
+            LEFT JOIN genres g ON b.genre_id = g.genre_id
+            WHERE NOT EXISTS (
+                SELECT 1 FROM loans l
+                WHERE l.user_id = %s AND l.book_id = b.book_id
+            )
+                AND NOT EXISTS (
+                    SELECT 1 FROM loan_history h
+                    WHERE h.user_id = %s AND h.book_id = b.book_id
+                )
+            ORDER BY similar.score DESC, b.title ASC
+            LIMIT 20
+            """,
+        ),
+        "recommend_books": ("proc", "recommend_books"),
+        "fetch_unrated_books": ("proc", "fetch_unrated_books"),
+        "add_review": (
+            "text",
+            "INSERT INTO ratings (user_id, book_id, rating, review) "
+            "VALUES (%s, %s, %s, %s)",
+        ),
+    }
+
+    def __init__(self, db_connection):
+        self.db = db_connection
+        # underlying connection -> {statement name: prepared cursor}
+        self.prepared = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def connection(self, commit=False):
+        """
+        Context manager yielding a pooled connection for ``execute``, for
+        statements that must share a session or a transaction.
+        """
+        with self.db.connection() as conn:
+            yield conn
+            if commit:
+                conn.commit()
+
+    def execute(self, conn, name, params=()):
+        """
+        Run statement ``name`` on ``conn`` and return all of its rows, or
+        an empty list when it returns none.
+        """
+        kind, sql = QueryRegistry.STATEMENTS[name]
+        start = time.perf_counter()
+        try:
+            if kind == "prepared":
+                rows = self.execute_prepared(conn, name, sql, params)
+            else:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(sql, params)
+                    rows = cursor.fetchall() if cursor.with_rows else []
+                finally:
+                    cursor.close()
+        except Exception:
+            self.db.instrumentation.record(
+                name, (time.perf_counter() - start) * 1000, failed=True
+            )
+            raise
+        self.db.instrumentation.observe(
+            conn, name, sql, params, time.perf_counter() - start, len(rows)
+        )
+        return rows
+
+    def execute_prepared(self, conn, name, sql, params):
+        # Pooled connections hand out a new wrapper on every checkout;
+        # prepared statements belong to the connection underneath
+        cnx = getattr(conn, "_cnx", conn)
+        with self.lock:
+            cursors = self.prepared.setdefault(cnx, {})
+
+        for attempt in range(2):
+            cursor = cursors.get(name)
+            if cursor is None:
+                cursor = cursors[name] = cnx.cursor(prepared=True)
+            try:
+                cursor.execute(sql, params)
+                return cursor.fetchall() if cursor.with_rows else []
+            except Error as e:
+                if e.errno != ER_UNKNOWN_STMT_HANDLER or attempt:
+                    raise
+                # The connection was re-established; prepare everything again
+                cursors.clear()
+
+    def fetchall(self, name, params=()):
+        """Run a read-only statement on its own connection."""
+        with self.connection() as conn:
+            return self.execute(conn, name, params)
+
+    def fetchone(self, name, params=()):
+        rows = self.fetchall(name, params)
+        return rows[0] if rows else None
+
+    def run(self, name, params=()):
+        """Run a statement on its own connection and commit it."""
+        with self.connection(commit=True) as conn:
+            self.execute(conn, name, params)
+
+    def call(self, name, args=(), commit=False):
+        """
+        Call the stored procedure registered as ``name`` and return a
+        list with the rows of each result set it produced.
+        """
+        kind, procedure = QueryRegistry.STATEMENTS[name]
+        with self.db.cursor(commit=commit, operation=name) as cursor:
+            cursor.callproc(procedure, args)
+            return [result.fetchall() for result in cursor.stored_results()]
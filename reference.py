@@ -0,0 +1,171 @@
+import threading
+import time
+
+
+class ReferenceCache:
+    """
+    In-process read-through cache of the authors, genres and publishers
+    lookup tables.
+
+    The tables are small and almost never change, so each one is loaded
+    whole and kept for TTL seconds. Names missing from the cache are
+    resolved with a single upsert against the table's unique key.
+    """
+
+    TTL = 600
+
+    # kind -> (table, id column, name columns)
+    TABLES = {
+        "author": ("authors", "author_id", ("first_name", "last_name")),
+        "genre": ("genres", "genre_id", ("genre_name",)),
+        "publisher": ("publishers", "publisher_id", ("publisher_name",)),
+    }
+
+    def __init__(self, db_connection, ttl=None):
+        self.db = db_connection
+        self.ttl = ttl or ReferenceCache.TTL
+        self.entries = {}
+        self.loaded_at = {}
+        self.lock = threading.Lock()
+
+    def warm(self):
+        """Bulk-load every lookup table, e.g. at application start."""
+        with self.db.cursor(operation="reference_data") as cursor:
+            for kind in ReferenceCache.TABLES:
+                self.load(cursor, kind)
+
+    def load(self, cursor, kind):
+        """Replace the cached copy of one lookup table."""
+        table, id_column, name_columns = ReferenceCache.TABLES[kind]
+        cursor.execute(
+            f"SELECT {id_column}, {', '.join(name_columns)} FROM {table}"
+        )
+        entries = {
+            ReferenceCache.key(row[1:]): row[0] for row in cursor.fetchall()
+        }
+        with self.lock:
+            self.entries[kind] = entries
+            self.loaded_at[kind] = time.monotonic()
+
+    def lookup(self, cursor, kind, *names):
+        """
+        Return the cached id for ``names``, or None if it is unknown.
+        The table is (re)loaded through ``cursor`` when stale.
+        """
+        with self.lock:
+            loaded_at = self.loaded_at.get(kind)
+        if loaded_at is None or time.monotonic() - loaded_at > self.ttl:
+            self.load(cursor, kind)
+
+        with self.lock:
+            return self.entries[kind].get(ReferenceCache.key(names))
+
+    def resolve(self, cursor, kind, *names):
+        """
+        Return the id for ``names``, inserting the row if it is missing.
+
+        Runs on the caller's cursor so a new row joins the caller's
+        transaction; call ``invalidate`` if that transaction rolls back.
+        """
+        ref_id = self.lookup(cursor, kind, *names)
+        if ref_id is not None:
+            return ref_id
+
+        table, id_column, name_columns = ReferenceCache.TABLES[kind]
+        # LAST_INSERT_ID(id) makes lastrowid return the existing row's id
+        # when another session inserted the same name in the meantime
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(name_columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(name_columns))}) "
+            f"ON DUPLICATE KEY UPDATE "
+            f"{id_column} = LAST_INSERT_ID({id_column})",
+            names,
+        )
+        ref_id = cursor.lastrowid
+
+        with self.lock:
+            self.entries.setdefault(kind, {})[ReferenceCache.key(names)] = ref_id
+        return ref_id
+
+    def resolve_many(self, cursor, kind, names_list):
+        """
+        Resolve many names at once, inserting the missing ones.
+
+        Returns a dict mapping ``key(names)`` to the id. Costs at most one
+        multi-row INSERT IGNORE and one SELECT, whatever the batch size.
+        The SELECT matches the requested names in SQL, so names the
+        collation treats as equal (accents, trailing spaces) resolve to
+        the row INSERT IGNORE kept for them.
+        """
+        resolved = {}
+        missing = {}
+        for names in names_list:
+            key = ReferenceCache.key(names)
+            if key in resolved or key in missing:
+                continue
+            ref_id = self.lookup(cursor, kind, *names)
+            if ref_id is None:
+                missing[key] = tuple(names)
+            else:
+                resolved[key] = ref_id
+
+        if not missing:
+            return resolved
+
+        table, id_column, name_columns = ReferenceCache.TABLES[kind]
+        columns = ", ".join(name_columns)
+        row = f"({', '.join(['%s'] * len(name_columns))})"
+        cursor.executemany(
+            f"INSERT IGNORE INTO {table} ({columns}) VALUES {row}",
+            list(missing.values()),
+        )
+        # The requested names come back alongside each id, compared with
+        # the table's own collation rather than with key()
+        requested = " UNION ALL ".join(
+            ["SELECT " + ", ".join(
+                f"%s AS n{i}" for i in range(len(name_columns))
+            )] * len(missing)
+        )
+        matches = " AND ".join(
+            f"t.{column} = requested.n{i}" for i, column in enumerate(name_columns)
+        )
+        cursor.execute(
+            f"SELECT t.{id_column}, "
+            f"{', '.join(f'requested.n{i}' for i in range(len(name_columns)))} "
+            f"FROM ({requested}) requested JOIN {table} t ON {matches}",
+            [name for names in missing.values() for name in names],
+        )
+
+        found = {
+            ReferenceCache.key(row[1:]): row[0] for row in cursor.fetchall()
+        }
+        with self.lock:
+            self.entries.setdefault(kind, {}).update(found)
+        resolved.update(found)
+        return resolved
+
+    def invalidate(self, kind=None):
+        """Forget one lookup table, or all of them."""
+        with self.lock:
+            kinds = [kind] if kind else list(self.loaded_at)
+            for name in kinds:
+                self.entries.pop(name, None)
+                self.loaded_at.pop(name, None)
+
+    @staticmethod
+    def split_author(name):
+        """
+        Split a full author name into (first_name, last_name); everything
+        after the first word is the last name, e.g. "Gabriel Garcia
+        Marquez". Raises ValueError for a single-word name.
+        """
+        parts = name.split(maxsplit=1)
+        if len(parts) != 2:
+            raise ValueError(f"Author name {name!r} needs a first and last name")
+        return parts[0], parts[1]
+
+    @staticmethod
+    def key(names):
+        # Cache key only; the tables' utf8mb4_general_ci also ignores
+        # accents and trailing spaces, which resolve_many leaves to SQL
+        return tuple(name.casefold() for name in names)
@@ -0,0 +1,116 @@
+from database import fulltext_prefix, like_prefix
+
+
+class Reviews:
+    """
+    Paged access to book reviews.
+
+    Pages are keyset-paginated on (sort column, ..., rating_id) in either
+    direction, so a browser can walk forwards and backwards through
+    millions of ratings while only holding a few pages at a time. Book
+    and reviewer sorts break ties on book_id or user_id first, so the
+    order follows the title and user_name indexes into the ratings of
+    each book or user instead of sorting all matches.
+    """
+
+    PAGE_SIZE = 100
+
+    # Sort key -> (SQL keyset columns, index of each in a returned row)
+    SORT_COLUMNS = {
+        "reviewer": (("u.user_name", "r.user_id", "r.rating_id"), (1, 5, 0)),
+        "book": (("b.title", "r.book_id", "r.rating_id"), (2, 6, 0)),
+        "rating": (("r.rating", "r.rating_id"), (3, 0)),
+    }
+
+    def __init__(self, db_connection):
+        self.db = db_connection
+
+    def fetch_page(
+        self,
+        sort="book",
+        descending=False,
+        book=None,
+        reviewer=None,
+        rating=None,
+        text=None,
+        after=None,
+        before=None,
+        limit=None,
+    ):
+        """
+        Return one page of reviews as ``(rows, has_more)``.
+
+        Rows are ``(rating_id, reviewer, book_title, rating, review,
+        user_id, book_id)`` in display order. ``after``/``before`` are keys obtained from
+        ``page_key`` of the last/first row currently shown; ``has_more``
+        tells whether further rows exist in the requested direction.
+        ``book`` and ``reviewer`` filter by prefix, ``rating`` by value
+        and ``text`` by words (or word prefixes) found in the review.
+        """
+        limit = limit or Reviews.PAGE_SIZE
+        columns = Reviews.SORT_COLUMNS[sort][0]
+        forward = before is None
+        key = after if forward else before
+
+        # Walking backwards through a descending sort reads the index in
+        # ascending order and vice versa; the page is flipped afterwards.
+        ascending = forward != descending
+        comparison = ">" if ascending else "<"
+        order = "ASC" if ascending else "DESC"
+
+        query = """
+            SELECT r.rating_id, u.user_name, b.title, r.rating, r.review,
+                   r.user_id, r.book_id
+            FROM ratings r
+            JOIN users u ON r.user_id = u.user_id
+            JOIN books b ON r.book_id = b.book_id
+            WHERE 1 = 1
+        """
+        params = []
+
+        if book:
+            query += " AND b.title LIKE %s"
+            params.append(like_prefix(book))
+        if reviewer:
+            query += " AND u.user_name LIKE %s"
+            params.append(like_prefix(reviewer))
+        if rating:
+            query += " AND r.rating = %s"
+            params.append(rating)
+        if text:
+            against = fulltext_prefix(text)
+            if against is None:
+                raise ValueError("Search words need at least 3 letters.")
+            query += " AND MATCH (r.review) AGAINST (%s IN BOOLEAN MODE)"
+            params.append(against)
+
+        if key is not None:
+            # (a, b, c) > (x, y, z) spelled out, which the optimizer can
+            # turn into an index range unlike a row constructor comparison
+            terms = []
+            for i, column in enumerate(columns):
+                equal = [f"{previous} = %s" for previous in columns[:i]]
+                terms.append(
+                    "(" + " AND ".join([*equal, f"{column} {comparison} %s"]) + ")"
+                )
+                params.extend(key[:i + 1])
+            query += " AND (" + " OR ".join(terms) + ")"
+
+        ordering = ", ".join(f"{column} {order}" for column in columns)
+        query += f" ORDER BY {ordering} LIMIT %s"
+        params.append(limit + 1)
+
+        with self.db.cursor(operation="all_reviews") as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not forward:
+            rows.reverse()
+        return rows, has_more
+
+    @staticmethod
+    def page_key(row, sort="book"):
+        """Keyset position of a row returned by ``fetch_page``."""
+        return tuple(row[i] for i in Reviews.SORT_COLUMNS[sort][1])
@@ -0,0 +1,397 @@
+"""
+JSON HTTP API over the LibraryService for kiosks and the web catalog.
+
+One listening socket is shared by several forked worker processes, each
+with its own connection pool and a thread per connection, so a single
+library database can serve many concurrent clients.
+
+    python server.py --port 8080 --workers 4
+
+Endpoints (authenticated ones need "Authorization: Bearer <token>"):
+
+    POST /sessions                  {"username", "password"} -> {"token"}
+    GET  /books?q=&genre=&after=&limit=  ranked catalog search
+    POST /loans                     {"book_id"}              (auth)
+    POST /loans/<loan_id>/return                             (auth)
+    POST /loans/batch               {"book_ids": [...]}      (auth)
+    POST /returns                   {"loan_ids": [...]}      (auth)
+    GET  /reviews?sort=&desc=&book=&reviewer=&rating=&text=&after=
+    POST /reviews                   {"book_id", "rating", "review"} (auth)
+    GET  /recommendations                                    (auth)
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import re
+import secrets
+import signal
+import socket
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from mysql.connector import Error
+
+from database import Connection
+from service import LibraryService
+
+
+class ApiError(Exception):
+    """An error answered with ``status`` and a JSON message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def integer(value, name, required=False):
+    """
+    ``value`` as an int, None left as None unless ``required``; anything
+    else is a ValueError, answered 400.
+    """
+    if value is None:
+        if required:
+            raise ValueError(f"{name} is required.")
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"{name} must be an integer.")
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer.") from None
+
+
+def integer_list(value, name):
+    if not isinstance(value, list) or None in value:
+        raise ValueError(f"{name} must be a list of integers.")
+    return [integer(item, name) for item in value]
+
+
+def page_limit(query, maximum):
+    """The ``limit`` parameter: None when absent, at most ``maximum``."""
+    limit = integer(query.get("limit"), "limit")
+    if limit is None:
+        return None
+    if limit < 1:
+        raise ValueError("limit must be at least 1.")
+    return min(limit, maximum)
+
+
+def page_key(query, size):
+    """The ``after`` parameter: a JSON array of ``size`` keyset values."""
+    if "after" not in query:
+        return None
+    after = json.loads(query["after"])
+    if not isinstance(after, list) or len(after) != size:
+        raise ValueError(f"after must be a JSON array of {size} values.")
+    return after
+
+
+class Tokens:
+    """
+    Stateless bearer tokens: ``user_id.expiry.hmac``. Any worker holding
+    the shared secret can verify a token issued by another one.
+    """
+
+    TTL = 8 * 3600
+
+    def __init__(self, secret):
+        self.secret = secret
+
+    def issue(self, user_id):
+        payload = f"{user_id}.{int(time.time()) + Tokens.TTL}"
+        return f"{payload}.{self.sign(payload)}"
+
+    def verify(self, token):
+        """Return the token's user_id, or None if it is invalid or expired."""
+        payload, _, signature = token.rpartition(".")
+        # compare_digest rejects str arguments with non-ASCII characters
+        if not hmac.compare_digest(self.sign(payload).encode(), signature.encode()):
+            return None
+        user_id, _, expires = payload.partition(".")
+        if int(expires) < time.time():
+            return None
+        return int(user_id)
+
+    def sign(self, payload):
+        return hmac.new(self.secret, payload.encode(), hashlib.sha256).hexdigest()
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """
+    Routes requests to LibraryService methods and encodes their results.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "LibraryAPI/1.0"
+
+    # (method, path pattern, handler name, requires a token)
+    ROUTES = (
+        ("POST", re.compile(r"/sessions"), "create_session", False),
+        ("GET", re.compile(r"/books"), "search_books", False),
+        ("POST", re.compile(r"/loans"), "issue_book", True),
+        ("POST", re.compile(r"/loans/(\d+)/return"), "return_book", True),
+        ("POST", re.compile(r"/loans/batch"), "issue_books", True),
+        ("POST", re.compile(r"/returns"), "return_books", True),
+        ("GET", re.compile(r"/reviews"), "list_reviews", False),
+        ("POST", re.compile(r"/reviews"), "add_review", True),
+        ("GET", re.compile(r"/recommendations"), "recommendations", True),
+    )
+
+    MAX_BODY = 64 * 1024
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            for verb, pattern, name, needs_token in ApiHandler.ROUTES:
+                match = pattern.fullmatch(url.path)
+                if match and verb == method:
+                    break
+            else:
+                raise ApiError(404, "Not found.")
+
+            body = self.read_body() if method == "POST" else {}
+            args = [query, body, *match.groups()]
+            if needs_token:
+                args.insert(0, self.authenticated_user())
+            status, result = 200, getattr(self, name)(*args)
+        except ApiError as e:
+            status, result = e.status, {"error": str(e)}
+        except ValueError as e:
+            status, result = 400, {"error": str(e)}
+        except Error as e:
+            # SIGNALs from the procedures are business rule rejections
+            if e.sqlstate == "45000":
+                status, result = 409, {"error": e.msg}
+            else:
+                self.log_error("database error: %s", e)
+                status, result = 500, {"error": "Database error."}
+        except Exception as e:
+            # Keep the worker thread answering; the traceback-free log
+            # line is enough to find the request again
+            self.log_error("%s %s failed: %r", method, url.path, e)
+            status, result = 500, {"error": "Internal server error."}
+        self.send_json(status, result)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > ApiHandler.MAX_BODY:
+            raise ApiError(413, "Request body too large.")
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except json.JSONDecodeError:
+            raise ApiError(400, "Request body must be JSON.") from None
+        if not isinstance(body, dict):
+            raise ApiError(400, "Request body must be a JSON object.")
+        return body
+
+    def authenticated_user(self):
+        scheme, _, token = (self.headers.get("Authorization") or "").partition(" ")
+        user_id = None
+        if scheme == "Bearer" and token:
+            try:
+                user_id = self.server.tokens.verify(token)
+            except (ValueError, TypeError):
+                pass
+        if user_id is None:
+            raise ApiError(401, "A valid session token is required.")
+        return user_id
+
+    def send_json(self, status, result):
+        payload = json.dumps(result, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    # Endpoints
+
+    def create_session(self, query, body):
+        user_id = self.server.library.authenticate(
+            body.get("username"), body.get("password")
+        )
+        if user_id is None:
+            raise ApiError(401, "Invalid username or password.")
+        return {"user_id": user_id, "token": self.server.tokens.issue(user_id)}
+
+    def search_books(self, query, body):
+        rows, next_page = self.server.library.search_books(
+            query.get("q", ""),
+            page_key(query, 2),
+            page_limit(query, self.server.library.catalog.PAGE_SIZE * 4),
+            genre=query.get("genre"),
+        )
+        columns = ("book_id", "title", "available_copies", "author", "genre")
+        return {
+            "books": [dict(zip(columns, row)) for row in rows],
+            "next": next_page,
+        }
+
+    def issue_book(self, user_id, query, body):
+        loan = self.server.library.issue(
+            user_id, integer(body.get("book_id"), "book_id", required=True)
+        )
+        return dict(zip(("loan_id", "book_id", "title", "loan_date"), loan))
+
+    def return_book(self, user_id, query, body, loan_id):
+        return {"loan_id": self.server.library.return_loan(user_id, int(loan_id))}
+
+    def issue_books(self, user_id, query, body):
+        columns = ("loan_id", "book_id", "title", "loan_date")
+        outcomes = self.server.library.issue_many(
+            user_id, integer_list(body.get("book_ids", []), "book_ids")
+        )
+        return {
+            "items": [
+                {"book_id": book_id, "loan": dict(zip(columns, loan)) if loan else None}
+                for book_id, loan in outcomes
+            ]
+        }
+
+    def return_books(self, user_id, query, body):
+        outcomes = self.server.library.return_many(
+            user_id, integer_list(body.get("loan_ids", []), "loan_ids")
+        )
+        return {
+            "items": [
+                {"loan_id": loan_id, "returned": returned}
+                for loan_id, returned in outcomes
+            ]
+        }
+
+    def list_reviews(self, query, body):
+        reviews = self.server.library.reviews
+        sort = query.get("sort", "book")
+        if sort not in reviews.SORT_COLUMNS:
+            raise ValueError(f"Unknown sort {sort!r}.")
+        rows, has_more = self.server.library.reviews_page(
+            sort=sort,
+            descending=query.get("desc") == "1",
+            book=query.get("book"),
+            reviewer=query.get("reviewer"),
+            rating=int(query["rating"]) if "rating" in query else None,
+            text=query.get("text"),
+            after=page_key(query, len(reviews.SORT_COLUMNS[sort][1])),
+            limit=page_limit(query, reviews.PAGE_SIZE * 4),
+        )
+        columns = (
+            "rating_id", "reviewer", "title", "rating", "review", "user_id", "book_id"
+        )
+        return {
+            "reviews": [dict(zip(columns, row)) for row in rows],
+            "next": reviews.page_key(rows[-1], sort)
+            if rows and has_more else None,
+        }
+
+    def add_review(self, user_id, query, body):
+        self.server.library.add_review(
+            user_id,
+            integer(body.get("book_id"), "book_id", required=True),
+            integer(body.get("rating"), "rating", required=True),
+            body.get("review", ""),
+        )
+        return {"ok": True}
+
+    def recommendations(self, user_id, query, body):
+        columns = ("book_id", "title", "first_name", "last_name", "genre", "avg_rating")
+        sections = self.server.library.recommend(user_id)
+        return {
+            "sections": [
+                [dict(zip(columns, row)) for row in rows] for rows in sections
+            ]
+        }
+
+
+class ApiServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server bound to an already listening socket, so that
+    forked workers can share it.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, sock, library, tokens, quiet=False):
+        super().__init__(sock.getsockname(), ApiHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.library = library
+        self.tokens = tokens
+        self.quiet = quiet
+
+
+def serve(sock, tokens, args):
+    """Run one worker: its own pool, its own service, the shared socket."""
+    db = Connection(pool_size=args.pool_size)
+    if not db.available:
+        raise SystemExit("No valid database connection found.")
+    library = LibraryService(db)
+    library.warm()
+    server = ApiServer(sock, library, tokens, args.quiet)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        library.close()
+        db.close_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--quiet", action="store_true", help="no access log")
+    args = parser.parse_args()
+
+    # Set LIBRARY_API_SECRET to keep tokens valid across restarts
+    secret = os.environ.get("LIBRARY_API_SECRET", "").encode() or secrets.token_bytes(32)
+    tokens = Tokens(secret)
+    sock = socket.create_server((args.host, args.port), backlog=1024)
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} worker(s)")
+
+    if args.workers == 1 or not hasattr(os, "fork"):
+        # Windows has no fork; run a single threaded worker
+        serve(sock, tokens, args)
+        return
+
+    children = []
+    for _ in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                serve(sock, tokens, args)
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import json
+from collections import defaultdict, deque
+from contextlib import closing
+
+from audit import AuditLog
+from catalog import Catalog
+from credentials import Credentials
+from fines import Fines
+from notifications import Notifications
+from queries import QueryRegistry
+from reference import ReferenceCache
+from reviews import Reviews
+from session import UserContext
+
+
+class LibraryService:
+    """
+    UI-independent library operations.
+
+    Every method blocks, takes and returns plain values and is safe to
+    call from several threads, so the same API serves the Tk dashboard
+    (through the TaskRunner), the benchmarks and other front-ends.
+    Invalid input raises ValueError with a message fit for the user;
+    database failures propagate as mysql.connector errors.
+    """
+
+    # Most items a single batch checkout or return may carry
+    MAX_BATCH = 20
+
+    # Neighbour recommendations below which the genre and co-borrowing
+    # sections are computed as well
+    MIN_SIMILAR = 10
+
+    def __init__(self, db_connection):
+        self.db = db_connection
+        self.queries = QueryRegistry(db_connection)
+        self.credentials = Credentials(db_connection, self.queries)
+        self.catalog = Catalog(db_connection)
+        self.reviews = Reviews(db_connection)
+        self.fines = Fines(db_connection, self.queries)
+        self.notifications = Notifications(db_connection, self.queries)
+        self.reference = ReferenceCache(db_connection)
+        self.audit = AuditLog(db_connection)
+
+    @property
+    def available(self):
+        return self.db.available
+
+    def warm(self):
+        """Preload caches, e.g. at application start."""
+        self.reference.warm()
+
+    def close(self):
+        """Flush pending audit events, e.g. at application exit."""
+        self.audit.close()
+
+    # Accounts
+
+    def authenticate(self, username, password):
+        """Return the user_id of a valid login, or None."""
+        if not username or not password:
+            raise ValueError("Username and password are required.")
+        return self.credentials.authenticate(username, password)
+
+    def login(self, username, password):
+        """
+        Return the UserContext of a valid login, or None.
+        """
+        user_id = self.authenticate(username, password)
+        if user_id is None:
+            return None
+        return UserContext.load(self.db, user_id, username, self.queries)
+
+    def register(self, first_name, last_name, username, phone_number, email,
+                 password):
+        if not all([first_name, last_name, username, password, email]):
+            raise ValueError("All fields are required.")
+        self.credentials.register(
+            first_name.title(),
+            last_name.title(),
+            username,
+            phone_number,
+            email,
+            password,
+        )
+
+    # Books and loans
+
+    def search_books(self, term="", after=None, limit=None, available_only=True,
+                     genre=None):
+        """Ranked catalog search; see Catalog.search."""
+        return self.catalog.search(term, genre, after, limit, available_only)
+
+    def issue(self, user_id, book_id):
+        """
+        Lend a copy of ``book_id`` and return the new loan as
+        ``(loan_id, book_id, title, loan_date)``.
+        """
+        # The procedure checks availability and commits atomically
+        with self.queries.connection() as conn:
+            self.queries.execute(conn, "issue_book", (user_id, book_id))
+            # LAST_INSERT_ID() still holds the loan the procedure created
+            loan = self.queries.execute(conn, "issued_loan")[0]
+        self.audit.record(
+            user_id, "loan", f"User borrowed the book with ID: {book_id}"
+        )
+        return loan
+
+    def return_loan(self, user_id, loan_id):
+        """Close one of the user's open loans and restock the copy."""
+        with self.queries.connection() as conn:
+            self.queries.execute(conn, "return_book", (user_id, loan_id))
+        self.audit.record(
+            user_id, "return", f"User returned the book of loan ID: {loan_id}"
+        )
+        return loan_id
+
+    def issue_many(self, user_id, book_ids):
+        """
+        Lend one copy per entry of ``book_ids`` in one transaction; repeat
+        an id to borrow several copies. Returns a ``(book_id, loan)`` pair
+        per entry, in order, where ``loan`` is as returned by ``issue`` or
+        None when no copy was left for that entry.
+        """
+        book_ids = [int(book_id) for book_id in book_ids]
+        self.check_batch(book_ids, "book")
+        results = self.queries.call(
+            "issue_books", (user_id, json.dumps(book_ids))
+        )
+        loans = defaultdict(deque)
+        for loan in results[-1] if results else []:
+            loans[loan[1]].append(loan)
+
+        outcomes = []
+        for book_id in book_ids:
+            loan = loans[book_id].popleft() if loans[book_id] else None
+            if loan is not None:
+                self.audit.record(
+                    user_id, "loan", f"User borrowed the book with ID: {book_id}"
+                )
+            outcomes.append((book_id, loan))
+        return outcomes
+
+    def return_many(self, user_id, loan_ids):
+        """
+        Close several of the user's open loans in one transaction.
+        Returns a ``(loan_id, returned)`` pair per entry, in order;
+        ``returned`` is False for loans that were not open.
+        """
+        loan_ids = [int(loan_id) for loan_id in loan_ids]
+        self.check_batch(loan_ids, "loan")
+        results = self.queries.call(
+            "return_books", (user_id, json.dumps(loan_ids))
+        )
+        closed = {row[0] for row in results[-1]} if results else set()
+        for loan_id in closed:
+            self.audit.record(
+                user_id, "return", f"User returned the book of loan ID: {loan_id}"
+            )
+        return [(loan_id, loan_id in closed) for loan_id in loan_ids]
+
+    @staticmethod
+    def check_batch(ids, kind):
+        if not ids:
+            raise ValueError(f"Please select at least one {kind}.")
+        if len(ids) > LibraryService.MAX_BATCH:
+            raise ValueError(
+                f"At most {LibraryService.MAX_BATCH} items can be handled at once."
+            )
+
+    def donate(self, title, author, genre, publisher, user_id=None):
+        """
+        Add a donated book; ``author`` is the full "First Last" name and
+        ``user_id`` the donor, if known. Returns the normalised title.
+        """
+        title, author = title.title(), author.title()
+        genre, publisher = genre.title(), publisher.title()
+        if not all([title, author, genre, publisher]):
+            raise ValueError("Please fill in all fields.")
+        try:
+            first_name, last_name = ReferenceCache.split_author(author)
+        except ValueError:
+            raise ValueError(
+                "Please enter author name in 'FirstName LastName' format."
+            ) from None
+
+        try:
+            with self.queries.connection(commit=True) as conn:
+                # IDs come from the cache; only unseen names hit the DB
+                with closing(conn.cursor()) as cursor:
+                    author_id = self.reference.resolve(
+                        cursor, "author", first_name, last_name
+                    )
+                    genre_id = self.reference.resolve(cursor, "genre", genre)
+                    publisher_id = self.reference.resolve(
+                        cursor, "publisher", publisher
+                    )
+
+                self.queries.execute(
+                    conn,
+                    "donate_book",
+                    (title, author_id, genre_id, publisher_id),
+                )
+        except Exception:
+            # Rows upserted in the rolled back transaction are gone
+            self.reference.invalidate()
+            raise
+        self.audit.record(user_id, "donate", f"User donated the book: {title}")
+        return title
+
+    # Reviews and recommendations
+
+    def unrated_books(self, user_id):
+        """Books the user borrowed but has not rated, as (book_id, title)."""
+        results = self.queries.call("fetch_unrated_books", (user_id,))
+        return results[-1] if results else []
+
+    def add_review(self, user_id, book_id, rating, review):
+        if not book_id or not rating:
+            raise ValueError("Please select a book and provide a rating.")
+        if not 1 <= int(rating) <= 5:
+            raise ValueError("Ratings go from 1 to 5.")
+        self.queries.run("add_review", (user_id, book_id, rating, review))
+
+    def reviews_page(self, sort="book", descending=False, book=None,
+                     reviewer=None, rating=None, text=None, after=None,
+                     before=None, limit=None):
+        """One page of all reviews; see Reviews.fetch_page."""
+        return self.reviews.fetch_page(
+            sort, descending, book, reviewer, rating, text, after, before, limit
+        )
+
+    def recommend(self, user_id):
+        """
+        Return the recommendation sections: books most similar to the
+        user's recent loans (from the offline book_neighbours table), well
+        rated books from the user's favourite genres, then books borrowed
+        together with the user's books. The last two are only computed,
+        and otherwise empty, when fewer than MIN_SIMILAR neighbours were
+        found, e.g. for new users or before build_neighbours.py has run.
+        """
+        similar = self.queries.fetchall(
+            "neighbour_recommendations", (user_id, user_id, user_id)
+        )
+        if len(similar) >= LibraryService.MIN_SIMILAR:
+            return [similar, [], []]
+        return [similar, *self.queries.call("recommend_books", (user_id,))]
+
+    # Fines
+
+    def outstanding_fines(self, user_id):
+        return self.fines.outstanding(user_id)
+
+    def fines_page(self, user_id, after=None, limit=None):
+        return self.fines.fetch_page(user_id, after, limit)
+
+    def pay_fine(self, user_id, fine_id):
+        self.fines.pay(user_id, fine_id)
+
+    # Notifications
+
+    def notifications_page(self, user_id, after=None, before=None, limit=None):
+        return self.notifications.fetch_page(user_id, after, before, limit)
+
+    def poll_notifications(self, user_id, after=None, limit=None):
+        return self.notifications.poll(user_id, after, limit)
+
+    def unread_notifications(self, user_id):
+        return self.notifications.unread_count(user_id)
+
+    def mark_notifications_read(self, user_id, up_to_id):
+        self.notifications.mark_read(user_id, up_to_id)
@@ -0,0 +1,79 @@
+import threading
+
+from queries import QueryRegistry
+
+
+class UserContext:
+    """
+    Per-session snapshot of the logged-in user.
+
+    Loaded once at login through load_user_context(), which returns the
+    profile, membership, open loans, fine balance, unread notification
+    count and review count as separate result sets of a single call.
+    The dashboard then keeps it current in place after its own actions;
+    ``invalidate`` marks it stale so the next ``refresh`` reloads it.
+    """
+
+    def __init__(self, db_connection, user_id, username, queries=None):
+        self.db = db_connection
+        self.queries = queries or QueryRegistry(db_connection)
+        self.user_id = user_id
+        self.username = username
+        # (first_name, last_name, email, role)
+        self.profile = None
+        # (membership_type, end_date), or None without a current membership
+        self.membership = None
+        # [(loan_id, book_id, title, loan_date)], oldest first
+        self.active_loans = []
+        # (total, count) of unpaid fines
+        self.fines = (0, 0)
+        self.unread_notifications = 0
+        self.review_count = 0
+        self.stale = True
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, db_connection, user_id, username, queries=None):
+        """Create and populate the context for a user who just logged in."""
+        context = cls(db_connection, user_id, username, queries)
+        context.refresh()
+        return context
+
+    def refresh(self):
+        """Reload everything from the database if the context is stale."""
+        with self.lock:
+            if not self.stale:
+                return
+
+        profile, loans, fines, unread, reviews = self.queries.call(
+            "load_user_context", (self.user_id,)
+        )
+
+        with self.lock:
+            self.profile = profile[0][:4]
+            self.membership = profile[0][4:] if profile[0][4] else None
+            self.active_loans = list(loans)
+            self.fines = fines[0]
+            self.unread_notifications = unread[0][0]
+            self.review_count = reviews[0][0]
+            self.stale = False
+
+    def invalidate(self):
+        """Have the next ``refresh`` reload from the database."""
+        with self.lock:
+            self.stale = True
+
+    def loan_issued(self, loan):
+        """Record a new loan ``(loan_id, book_id, title, loan_date)``."""
+        with self.lock:
+            self.active_loans.append(loan)
+
+    def loan_returned(self, loan_id):
+        with self.lock:
+            self.active_loans = [
+                loan for loan in self.active_loans if loan[0] != loan_id
+            ]
+
+    def review_added(self):
+        with self.lock:
+            self.review_count += 1
@@ -0,0 +1,95 @@
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Task:
+    """
+    Handle for a unit of work submitted to the TaskRunner.
+    """
+
+    def __init__(self, future):
+        self.future = future
+        self.cancelled = False
+
+    def cancel(self):
+        """
+        Cancel the task. Work that has not started yet is dropped; work
+        already running finishes in the background but its result is
+        discarded instead of being delivered to the UI.
+        """
+        self.cancelled = True
+        self.future.cancel()
+
+    def done(self):
+        """True once the task has finished, failed or been cancelled."""
+        return self.cancelled or self.future.done()
+
+
+class TaskRunner:
+    """
+    Runs blocking database calls on worker threads so the Tk mainloop
+    never stalls, and marshals the results back onto the Tk thread.
+
+    Tkinter is not thread-safe, so callbacks are never invoked from the
+    worker threads: the owning widget polls the future with ``after()``
+    and dispatches the callbacks from the mainloop.
+    """
+
+    def __init__(self, max_workers=4, poll_interval=30):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="library-db"
+        )
+        self.poll_interval = poll_interval
+
+    def submit(
+        self,
+        widget,
+        func,
+        *args,
+        on_success=None,
+        on_error=None,
+        on_done=None,
+        **kwargs,
+    ):
+        """
+        Run ``func(*args, **kwargs)`` on a worker thread.
+
+        ``on_done`` is always called first once the work has finished,
+        followed by ``on_success(result)`` or ``on_error(exception)``. All
+        callbacks run on the Tk thread. If ``widget`` is destroyed before
+        the work completes, the task is cancelled and no callback runs.
+        """
+        task = Task(self.executor.submit(func, *args, **kwargs))
+
+        def poll():
+            if task.cancelled:
+                return
+
+            try:
+                alive = widget.winfo_exists()
+            except tk.TclError:
+                alive = False
+            if not alive:
+                task.cancel()
+                return
+
+            if not task.future.done():
+                widget.after(self.poll_interval, poll)
+                return
+
+            if on_done:
+                on_done()
+
+            error = task.future.exception()
+            if error is not None:
+                if on_error:
+                    on_error(error)
+            elif on_success:
+                on_success(task.future.result())
+
+        widget.after(self.poll_interval, poll)
+        return task
+
+    def shutdown(self):
+        """Stop accepting work and drop everything still queued."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
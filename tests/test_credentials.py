@@ -0,0 +1,116 @@
+import unittest
+
+from credentials import Credentials
+
+
+class FakeQueries:
+    """Answers the login lookup from a dict and records other statements."""
+
+    def __init__(self, users=None):
+        self.users = users or {}
+        self.runs = []
+
+    def fetchone(self, name, params):
+        assert name == "login"
+        return self.users.get(params[0])
+
+    def run(self, name, params):
+        self.runs.append((name, params))
+
+
+def credentials(queries=None, n=2 ** 4, iterations=1000, scheme=None):
+    # Tiny work factors keep the tests fast
+    creds = Credentials(None, queries or FakeQueries(), n=n, iterations=iterations)
+    if scheme:
+        creds.scheme = scheme
+    return creds
+
+
+class HashFormatTest(unittest.TestCase):
+    def test_scrypt_hash_format(self):
+        creds = credentials(scheme="scrypt")
+        scheme, n, r, p, salt, digest = creds.hash("secret").split("$")
+        self.assertEqual(scheme, "scrypt")
+        self.assertEqual(
+            (int(n), int(r), int(p)),
+            (2 ** 4, Credentials.SCRYPT_R, Credentials.SCRYPT_P),
+        )
+        self.assertEqual(len(Credentials.decode(salt)), Credentials.SALT_BYTES)
+        self.assertEqual(len(Credentials.decode(digest)), 32)
+
+    def test_pbkdf2_hash_format(self):
+        creds = credentials(scheme="pbkdf2")
+        scheme, iterations, salt, digest = creds.hash("secret").split("$")
+        self.assertEqual((scheme, int(iterations)), ("pbkdf2", 1000))
+        self.assertEqual(len(Credentials.decode(salt)), Credentials.SALT_BYTES)
+        self.assertEqual(len(Credentials.decode(digest)), 32)
+
+    def test_salt_differs_per_hash(self):
+        creds = credentials()
+        self.assertNotEqual(creds.hash("secret"), creds.hash("secret"))
+
+    def test_verify_current_hash(self):
+        for scheme in ("scrypt", "pbkdf2"):
+            with self.subTest(scheme=scheme):
+                creds = credentials(scheme=scheme)
+                stored = creds.hash("secret")
+                self.assertEqual(creds.verify(stored, "secret"), (True, False))
+                self.assertEqual(creds.verify(stored, "Secret"), (False, False))
+
+
+class LegacyPlaintextTest(unittest.TestCase):
+    def test_verify_plaintext_asks_for_rehash(self):
+        creds = credentials()
+        self.assertEqual(creds.verify("secret", "secret"), (True, True))
+        self.assertFalse(creds.verify("secret", "other")[0])
+
+    def test_authenticate_upgrades_plaintext(self):
+        queries = FakeQueries({"dex": (7, "secret")})
+        creds = credentials(queries)
+
+        self.assertEqual(creds.authenticate("dex", "secret"), 7)
+        [(name, (new_hash, user_id, old_value))] = queries.runs
+        self.assertEqual((name, user_id, old_value), ("upgrade_password", 7, "secret"))
+        self.assertEqual(creds.verify(new_hash, "secret"), (True, False))
+
+    def test_wrong_password_is_not_upgraded(self):
+        queries = FakeQueries({"dex": (7, "secret")})
+        self.assertIsNone(credentials(queries).authenticate("dex", "wrong"))
+        self.assertEqual(queries.runs, [])
+
+    def test_unknown_user(self):
+        queries = FakeQueries()
+        self.assertIsNone(credentials(queries).authenticate("nobody", "secret"))
+        self.assertEqual(queries.runs, [])
+
+
+class CostChangeTest(unittest.TestCase):
+    def test_raised_scrypt_cost_asks_for_rehash(self):
+        stored = credentials(n=2 ** 4, scheme="scrypt").hash("secret")
+        creds = credentials(n=2 ** 5, scheme="scrypt")
+        self.assertEqual(creds.verify(stored, "secret"), (True, True))
+
+    def test_raised_pbkdf2_iterations_ask_for_rehash(self):
+        stored = credentials(iterations=1000, scheme="pbkdf2").hash("secret")
+        creds = credentials(iterations=2000, scheme="pbkdf2")
+        self.assertEqual(creds.verify(stored, "secret"), (True, True))
+
+    def test_scheme_change_asks_for_rehash(self):
+        stored = credentials(scheme="pbkdf2").hash("secret")
+        creds = credentials(scheme="scrypt")
+        self.assertEqual(creds.verify(stored, "secret"), (True, True))
+
+    def test_authenticate_rehashes_with_current_cost(self):
+        stored = credentials(n=2 ** 4, scheme="scrypt").hash("secret")
+        queries = FakeQueries({"dex": (7, stored)})
+        creds = credentials(queries, n=2 ** 5, scheme="scrypt")
+
+        self.assertEqual(creds.authenticate("dex", "secret"), 7)
+        [(name, (new_hash, user_id, old_value))] = queries.runs
+        self.assertEqual((name, user_id, old_value), ("upgrade_password", 7, stored))
+        self.assertEqual(new_hash.split("$")[1], str(2 ** 5))
+        self.assertEqual(creds.verify(new_hash, "secret"), (True, False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import time
+import unittest
+from unittest import mock
+
+from server import Tokens
+
+
+class TokensTest(unittest.TestCase):
+    def setUp(self):
+        self.tokens = Tokens(b"test-secret")
+
+    def test_issue_and_verify(self):
+        token = self.tokens.issue(42)
+        self.assertEqual(token.split(".")[0], "42")
+        self.assertEqual(self.tokens.verify(token), 42)
+
+    def test_other_secret_is_rejected(self):
+        token = Tokens(b"other-secret").issue(42)
+        self.assertIsNone(self.tokens.verify(token))
+
+    def test_tampered_payload_is_rejected(self):
+        user_id, expires, signature = self.tokens.issue(42).split(".")
+        self.assertIsNone(self.tokens.verify(f"1.{expires}.{signature}"))
+        self.assertIsNone(
+            self.tokens.verify(f"{user_id}.{int(expires) + 3600}.{signature}")
+        )
+
+    def test_tampered_signature_is_rejected(self):
+        token = self.tokens.issue(42)
+        forged = token[:-1] + ("0" if token[-1] != "0" else "1")
+        self.assertIsNone(self.tokens.verify(forged))
+
+    def test_non_ascii_signature_is_rejected(self):
+        token = self.tokens.issue(42)
+        self.assertIsNone(self.tokens.verify(token[:-1] + "é"))
+
+    def test_expired_token_is_rejected(self):
+        issued_at = time.time()
+        with mock.patch("server.time.time", return_value=issued_at):
+            token = self.tokens.issue(42)
+        with mock.patch("server.time.time", return_value=issued_at + Tokens.TTL - 60):
+            self.assertEqual(self.tokens.verify(token), 42)
+        with mock.patch("server.time.time", return_value=issued_at + Tokens.TTL + 60):
+            self.assertIsNone(self.tokens.verify(token))
+
+
+if __name__ == "__main__":
+    unittest.main()